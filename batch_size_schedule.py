@@ -0,0 +1,105 @@
+import bisect
+
+'''
+Batch size schedules, for growing the batch size during training instead of (or as well as) decaying the learning rate
+Smith et al, 'Don't Decay the Learning Rate, Increase the Batch Size'
+
+The schedulers track samples seen rather than batches, with a BatchSizeRamp their position in the lr schedule
+moves on by numb_samples / batch_size per batch_step, so the lr curve over samples stays the same
+while the run takes fewer, larger steps.  RampBatchSampler makes a pytorch DataLoader follow the ramp.
+usage:
+>>>ramp = BatchSizeRamp([64, 128, 256], sample_milestones=[10 * numb_images, 20 * numb_images])
+>>>scheduler = OneCycle_Scheduler(optimizer, ..., batch_size=64, batch_size_schedule=ramp)
+>>>loader = DataLoader(dataset, batch_sampler=RampBatchSampler(RandomSampler(dataset), scheduler))
+>>>for data, target in loader:
+>>>    ...
+>>>    scheduler.batch_step(len(data))
+'''
+
+class BatchSizeRamp(object):
+    '''
+    piecewise constant batch size over samples seen
+    '''
+    def __init__(self, batch_sizes, sample_milestones):
+        '''
+        :param batch_sizes: batch size for each phase, first one from the start
+        :param sample_milestones: samples seen at which each following phase starts, increasing,
+                                  one less than batch_sizes
+        '''
+        if len(sample_milestones) != len(batch_sizes) - 1:
+            raise ValueError("need one milestone less than batch sizes, got {} and {}".format(len(sample_milestones),
+                                                                                             len(batch_sizes)))
+        if list(sample_milestones) != sorted(sample_milestones):
+            raise ValueError("sample_milestones must be increasing, got {}".format(sample_milestones))
+        self.batch_sizes = [int(batch_size) for batch_size in batch_sizes]
+        self.sample_milestones = [int(milestone) for milestone in sample_milestones]
+
+    @classmethod
+    def linear(cls, start_batch_size, end_batch_size, numb_samples, numb_phases, multiple_of=8):
+        '''
+        numb_phases equal phases over numb_samples, batch size stepping evenly from start_batch_size
+        to end_batch_size, rounded to multiple_of (hardware friendly sizes)
+        '''
+        batch_sizes = []
+        for phase in range(numb_phases):
+            frac = phase / (numb_phases - 1) if numb_phases > 1 else 0.0
+            batch_size = start_batch_size + frac * (end_batch_size - start_batch_size)
+            batch_sizes.append(max(multiple_of, int(round(batch_size / multiple_of)) * multiple_of))
+        milestones = [numb_samples * phase // numb_phases for phase in range(1, numb_phases)]
+        return cls(batch_sizes, milestones)
+
+    def batch_size_at(self, samples_seen):
+        '''
+        :return: int, batch size to use once samples_seen samples have been trained on
+        '''
+        return self.batch_sizes[bisect.bisect_right(self.sample_milestones, samples_seen)]
+
+    def describe(self):
+        return list(self.batch_sizes), list(self.sample_milestones)
+
+class RampBatchSampler(object):
+    '''
+    batch sampler for torch.utils.data.DataLoader(batch_sampler=...), batch sizes follow
+    the scheduler's batch_size_schedule
+    '''
+    def __init__(self, sampler, scheduler, drop_last=False):
+        '''
+        :param sampler: iterable of dataset indices, like torch.utils.data.RandomSampler
+        :param scheduler: any Cyclic_Scheduler
+        :param drop_last: drop the last batch of the epoch if it comes up short
+        '''
+        self.sampler = sampler
+        self.scheduler = scheduler
+        self.drop_last = drop_last
+
+    def __iter__(self):
+        # sized by the samples drawn so far rather than what the scheduler has seen,
+        # DataLoader workers prefetch batches before batch_step is called for the earlier ones
+        samples_drawn = self.scheduler.samples_seen
+        batch = []
+        batch_size = self.scheduler.next_batch_size(samples_drawn)
+        for idx in self.sampler:
+            batch.append(idx)
+            if len(batch) == batch_size:
+                yield batch
+                samples_drawn += batch_size
+                batch = []
+                batch_size = self.scheduler.next_batch_size(samples_drawn)
+        if batch and not self.drop_last:
+            yield batch
+
+    def __len__(self):
+        '''
+        batches in an epoch starting from the scheduler's current samples_seen, the same walk as __iter__
+        '''
+        samples_left = len(self.sampler)
+        samples_drawn = self.scheduler.samples_seen
+        numb_batches = 0
+        while samples_left > 0:
+            batch_size = self.scheduler.next_batch_size(samples_drawn)
+            if batch_size > samples_left:
+                return numb_batches if self.drop_last else numb_batches + 1
+            numb_batches += 1
+            samples_left -= batch_size
+            samples_drawn += batch_size
+        return numb_batches
@@ -0,0 +1,36 @@
+'''
+micro-benchmark, per step cost of CyclicLR_Scheduler.batch_step as the dataset grows
+
+batch_step looks values up with Vals.value_at, so the time per step should stay flat
+from a toy dataset all the way up to ImageNet (1.28M images)
+
+from the repo root
+python benchmarks/bench_cyclic_step.py
+'''
+import timeit
+
+from bench_utils import DummyOptimizer
+from cyclic_LR_scheduler import CyclicLR_Scheduler
+from sequence_generators import CosignVals, TriangularVals
+
+DATASET_SIZES = [1000, 10000, 100000, 1281167]
+NUMB_STEPS = 20000
+
+def bench_cyclic_step(dataset_sizes=DATASET_SIZES, numb_steps=NUMB_STEPS, batch_size=64):
+    '''
+    :return: list of (numb_images_in_dataset, microseconds per batch_step)
+    '''
+    results = []
+    for numb_images in dataset_sizes:
+        scheduler = CyclicLR_Scheduler(DummyOptimizer(), min_lr=0.01, max_lr=1.0, numb_images_in_dataset=numb_images,
+                                       LR=TriangularVals(), LR_anneal=CosignVals(), batch_size=batch_size,
+                                       step_size=[4] * 10)
+        numb_steps = min(numb_steps, sum(scheduler.cycle_lengths))
+        secs = timeit.timeit(scheduler.batch_step, number=numb_steps)
+        results.append((numb_images, secs / numb_steps * 1e6))
+    return results
+
+if __name__ == '__main__':
+    print("{:>12} {:>12}".format("images", "us/step"))
+    for numb_images, usecs in bench_cyclic_step():
+        print("{:>12} {:>12.2f}".format(numb_images, usecs))
@@ -0,0 +1,79 @@
+'''
+schedule generation: Vals.getVals for every generator over a range of lengths,
+and building the full 1cycle schedule (time and peak memory, lists and structured array)
+
+from the repo root
+python benchmarks/bench_generators.py
+'''
+import time
+import tracemalloc
+
+import numpy as np
+
+import bench_utils
+from learning_rate_generators import get1Cycle_LR_and_Momentum, get1Cycle_schedule
+from sequence_generators import CosignVals, ExponentialIncreaseVals, LinearDecrease, LinearIncreaseVals, \
+    ReverseTriangularVals, TriangularVals
+
+GENERATORS = [CosignVals, TriangularVals, ReverseTriangularVals, LinearIncreaseVals, LinearDecrease,
+              ExponentialIncreaseVals]
+
+#1e3 .. 1e7 steps by default, 1e8 works but getVals then needs several GB for the list
+MIN_EXPONENT = 3
+MAX_EXPONENT = 7
+
+def bench_getVals(min_exponent=MIN_EXPONENT, max_exponent=MAX_EXPONENT):
+    '''
+    :return: list of (generator name, numb_iterations, seconds for one getVals),
+             'name out' for filling a preallocated array with getVals(out=...)
+    '''
+    results = []
+    for exponent in range(min_exponent, max_exponent + 1):
+        numb_iterations = 10 ** exponent
+        out = np.empty(numb_iterations)
+        for gen in GENERATORS:
+            start = time.perf_counter()
+            gen().getVals(numb_iterations, max_val=1.0, min_val=0.001)
+            results.append((gen.__name__, numb_iterations, time.perf_counter() - start))
+
+            start = time.perf_counter()
+            gen().getVals(numb_iterations, max_val=1.0, min_val=0.001, out=out)
+            results.append((gen.__name__ + ' out', numb_iterations, time.perf_counter() - start))
+    return results
+
+def _build_1cycle(numb_batches, dtype):
+    numb_annihlation_batches = numb_batches // 10
+    args = (numb_batches - numb_annihlation_batches, numb_annihlation_batches, 100, 1.0, 0.1, 0.95, 0.85)
+    if dtype is None:
+        return get1Cycle_LR_and_Momentum(*args)
+    return get1Cycle_schedule(*args, dtype=dtype)
+
+def bench_get1Cycle(min_exponent=MIN_EXPONENT, max_exponent=MAX_EXPONENT):
+    '''
+    :return: list of (storage, numb_batches, seconds to build, peak bytes while building)
+    '''
+    results = []
+    for exponent in range(min_exponent, max_exponent + 1):
+        numb_batches = 10 ** exponent
+        for storage, dtype in (('list', None), ('float64', np.float64), ('float32', np.float32)):
+            start = time.perf_counter()
+            schedule = _build_1cycle(numb_batches, dtype)
+            secs = time.perf_counter() - start
+            del schedule
+
+            # separate run for memory, tracemalloc slows things down
+            tracemalloc.start()
+            schedule = _build_1cycle(numb_batches, dtype)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del schedule
+            results.append((storage, numb_batches, secs, peak))
+    return results
+
+if __name__ == '__main__':
+    print("{:>24} {:>12} {:>10}".format("generator", "iterations", "ms"))
+    for name, numb_iterations, secs in bench_getVals():
+        print("{:>24} {:>12} {:>10.2f}".format(name, numb_iterations, secs * 1e3))
+    print("\n{:>24} {:>12} {:>10} {:>10}".format("1cycle storage", "batches", "ms", "peak MB"))
+    for storage, numb_batches, secs, peak in bench_get1Cycle():
+        print("{:>24} {:>12} {:>10.2f} {:>10.2f}".format(storage, numb_batches, secs * 1e3, peak / 1e6))
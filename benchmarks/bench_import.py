@@ -0,0 +1,37 @@
+'''
+cold import time of the schedulers, each measured in a fresh interpreter with python -X importtime
+
+from the repo root
+python benchmarks/bench_import.py
+'''
+import subprocess
+import sys
+
+import bench_utils
+
+MODULES = ['sequence_generators', 'learning_rate_generators', 'cyclic_LR_scheduler']
+NUMB_REPEATS = 5
+
+def get_import_time(module):
+    '''
+    :return: cumulative import time of module in microseconds, from a fresh interpreter
+    '''
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], cwd=bench_utils.rootDir,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in proc.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        fields = line[len('import time:'):].split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise RuntimeError("no import time reported for " + module)
+
+def bench_import(modules=MODULES, numb_repeats=NUMB_REPEATS):
+    '''
+    :return: list of (module, best cumulative import time in microseconds over numb_repeats fresh interpreters)
+    '''
+    return [(module, min(get_import_time(module) for _ in range(numb_repeats))) for module in modules]
+
+if __name__ == '__main__':
+    print("{:>28} {:>10}".format("module", "ms"))
+    for module, usecs in bench_import():
+        print("{:>28} {:>10.1f}".format(module, usecs / 1e3))
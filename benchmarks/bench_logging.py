@@ -0,0 +1,35 @@
+'''
+what logging every step through the scheduler's writer adds to batch_step
+
+from the repo root
+python benchmarks/bench_logging.py
+'''
+import os
+import tempfile
+import timeit
+
+from bench_utils import DummyOptimizer
+from cyclic_LR_scheduler import OneCycle_Scheduler
+
+NUMB_STEPS = 100000
+
+def bench_logging(numb_steps=NUMB_STEPS):
+    '''
+    :return: list of (writer, microseconds per batch_step)
+    '''
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, writer in (('none', None), ('jsonl', os.path.join(tmp, 'metrics.jsonl')),
+                             ('csv', os.path.join(tmp, 'metrics.csv'))):
+            scheduler = OneCycle_Scheduler(DummyOptimizer(), num_batches=numb_steps, numb_annihlation_batches=10,
+                                           annihilation_divisor=100, max_lr=1.0, min_lr=0.1, max_momentum=0.95,
+                                           min_momentum=0.85, writer=writer)
+            secs = timeit.timeit(scheduler.batch_step, number=numb_steps)
+            scheduler.close()
+            results.append((name, secs / numb_steps * 1e6))
+    return results
+
+if __name__ == '__main__':
+    print("{:>10} {:>10}".format("writer", "us/step"))
+    for name, usecs in bench_logging():
+        print("{:>10} {:>10.2f}".format(name, usecs))
@@ -0,0 +1,159 @@
+'''
+end to end training throughput of the MNIST example (test/test_mnist.py Net, train and test) on an in memory
+synthetic dataset, no download, for every scheduler and for no scheduler at all
+
+reports training samples per second and the share of the step time spent in the scheduler
+(batch_step, plus record_loss for the learning rate finder), the scheduler should never cost measurable throughput
+
+from the repo root
+python benchmarks/bench_mnist_throughput.py --batch-size 64 --threads 1 --param-groups 1
+'''
+import argparse
+import contextlib
+import io
+import math
+import time
+
+import numpy as np
+
+import bench_utils   #also puts the test directory on sys.path, for test_mnist
+
+import torch
+import torch.optim as optim
+from torch.utils.data import DataLoader, TensorDataset
+
+from cyclic_LR_scheduler import CyclicLR_Scheduler, LearningRateFinder, OneCycle_Scheduler, Piecewise_Scheduler
+from schedule_compiler import ScheduleBuilder
+from sequence_generators import CosignVals, TriangularVals
+from test_mnist import Net, test, train
+
+SCHEDULERS = ['none', 'OneCycle_Scheduler', 'OneCycle_Scheduler_float32', 'LearningRateFinder', 'CyclicLR_Scheduler',
+              'Piecewise_Scheduler']
+NUMB_BATCHES = 200
+NUMB_WARMUP_BATCHES = 20
+
+class NoScheduler(object):
+    def batch_step(self):
+        pass
+
+class TimedScheduler(object):
+    '''
+    wraps a scheduler, adding up the time spent in it
+    '''
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.secs = 0.0
+        if hasattr(scheduler, 'record_loss'):
+            self.record_loss = self._record_loss
+
+    def batch_step(self):
+        start = time.perf_counter()
+        self.scheduler.batch_step()
+        self.secs += time.perf_counter() - start
+
+    def _record_loss(self, loss):
+        start = time.perf_counter()
+        done = self.scheduler.record_loss(loss)
+        self.secs += time.perf_counter() - start
+        return done
+
+    def get_currentLR(self):
+        return self.scheduler.get_currentLR()
+
+def get_synthetic_loader(numb_samples, batch_size, seed=0):
+    '''
+    :return: DataLoader over random MNIST shaped images and labels, held in memory
+    '''
+    generator = torch.Generator().manual_seed(seed)
+    images = torch.randn(numb_samples, 1, 28, 28, generator=generator)
+    labels = torch.randint(0, 10, (numb_samples,), generator=generator)
+    return DataLoader(TensorDataset(images, labels), batch_size=batch_size, shuffle=False)
+
+def get_optimizer(model, numb_param_groups):
+    '''
+    SGD with the model's parameters dealt round robin into numb_param_groups groups (some empty if there are more
+    groups than parameter tensors, the scheduler still has to update them)
+    '''
+    params = list(model.parameters())
+    groups = [{'params': params[idx::numb_param_groups]} for idx in range(numb_param_groups)]
+    return optim.SGD(groups, lr=0.01, momentum=0.9)
+
+def get_scheduler(name, optimizer, numb_batches, batch_size):
+    '''
+    :param numb_batches: the schedule covers at least this many
+    '''
+    if name == 'none':
+        return NoScheduler()
+    if name.startswith('OneCycle_Scheduler'):
+        num_annihlation_batches = math.ceil(numb_batches * 0.1)
+        return OneCycle_Scheduler(optimizer, num_batches=numb_batches, numb_annihlation_batches=num_annihlation_batches,
+                                  annihilation_divisor=100, max_lr=0.05, min_lr=0.005, max_momentum=0.95,
+                                  min_momentum=0.85, batch_size=batch_size,
+                                  dtype=np.float32 if name.endswith('float32') else None)
+    if name == 'LearningRateFinder':
+        return LearningRateFinder(optimizer, min_lr=1e-5, max_lr=0.05, num_batches=numb_batches, mode='exponential',
+                                  divergence_threshold=None)
+    if name == 'CyclicLR_Scheduler':
+        return CyclicLR_Scheduler(optimizer, min_lr=0.005, max_lr=0.05,
+                                  numb_images_in_dataset=numb_batches * batch_size, LR=TriangularVals(),
+                                  LR_anneal=CosignVals(), batch_size=batch_size, step_size=[1])
+    if name == 'Piecewise_Scheduler':
+        lrs = ScheduleBuilder().warmup(numb_batches // 10, 0.005, 0.05).cosine(numb_batches, 0.05, 0.005).compile()
+        moms = ScheduleBuilder().linear(numb_batches // 10, 0.95, 0.85).constant(numb_batches, 0.85).compile()
+        return Piecewise_Scheduler(optimizer, lr_schedule=lrs, momentum_schedule=moms, batch_size=batch_size)
+    raise ValueError("unknown scheduler {}".format(name))
+
+def bench_mnist_throughput(schedulers=SCHEDULERS, batch_size=64, threads=1, numb_param_groups=1,
+                           numb_batches=NUMB_BATCHES, numb_warmup_batches=NUMB_WARMUP_BATCHES):
+    '''
+    :return: list of (scheduler, training samples/second, fraction of step time in the scheduler,
+             microseconds per batch_step, test samples/second)
+    '''
+    torch.set_num_threads(threads)
+    device = torch.device('cpu')
+    warmup_loader = get_synthetic_loader(numb_warmup_batches * batch_size, batch_size, seed=1)
+    train_loader = get_synthetic_loader(numb_batches * batch_size, batch_size)
+    args = argparse.Namespace(log_interval=numb_batches + numb_warmup_batches)
+
+    results = []
+    for name in schedulers:
+        torch.manual_seed(0)
+        model = Net().to(device)
+        optimizer = get_optimizer(model, numb_param_groups)
+        scheduler = TimedScheduler(get_scheduler(name, optimizer, numb_batches + numb_warmup_batches, batch_size))
+
+        with contextlib.redirect_stdout(io.StringIO()):   # train and test print progress
+            train(args, model, device, warmup_loader, optimizer, 1, scheduler)
+            scheduler.secs = 0.0
+
+            start = time.perf_counter()
+            train(args, model, device, train_loader, optimizer, 2, scheduler)
+            train_secs = time.perf_counter() - start
+
+            start = time.perf_counter()
+            test(args, model, device, train_loader)
+            test_secs = time.perf_counter() - start
+
+        numb_samples = numb_batches * batch_size
+        results.append((name, numb_samples / train_secs, scheduler.secs / train_secs,
+                        scheduler.secs / numb_batches * 1e6, numb_samples / test_secs))
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='synthetic MNIST training throughput per scheduler')
+    parser.add_argument('--batch-size', type=int, default=64, help='(default: 64)')
+    parser.add_argument('--threads', type=int, default=1, help='torch threads (default: 1)')
+    parser.add_argument('--param-groups', type=int, default=1, help='optimizer param groups (default: 1)')
+    parser.add_argument('--batches', type=int, default=NUMB_BATCHES,
+                        help='timed training batches (default: {})'.format(NUMB_BATCHES))
+    parser.add_argument('--schedulers', nargs='+', default=SCHEDULERS, choices=SCHEDULERS)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    print("{:>28} {:>12} {:>12} {:>12} {:>12}".format("scheduler", "samples/s", "sched share", "us/step",
+                                                      "test samp/s"))
+    for name, samples_per_sec, share, usecs, test_samples_per_sec in bench_mnist_throughput(
+            args.schedulers, args.batch_size, args.threads, args.param_groups, args.batches):
+        print("{:>28} {:>12.0f} {:>11.3f}% {:>12.2f} {:>12.0f}".format(name, samples_per_sec, share * 100, usecs,
+                                                                     test_samples_per_sec))
@@ -0,0 +1,51 @@
+'''
+per step cost of batch_step for each scheduler against the number of optimizer param_groups,
+with and without per group (discriminative) lr multipliers
+
+from the repo root
+python benchmarks/bench_param_groups.py
+'''
+import timeit
+
+import numpy as np
+
+from bench_utils import DummyOptimizer
+from cyclic_LR_scheduler import CyclicLR_Scheduler, LearningRateFinder, OneCycle_Scheduler
+from sequence_generators import TriangularVals
+
+GROUP_COUNTS = [1, 10, 100, 1000]
+NUMB_STEPS = 2000
+
+def get_schedulers(optimizer, numb_steps, lr_multipliers=None):
+    '''
+    :return: dict of name: scheduler with at least numb_steps steps
+    '''
+    return {
+        'OneCycle_Scheduler': OneCycle_Scheduler(optimizer, num_batches=numb_steps, numb_annihlation_batches=10,
+                                                 annihilation_divisor=100, max_lr=1.0, min_lr=0.1, max_momentum=0.95,
+                                                 min_momentum=0.85, lr_multipliers=lr_multipliers),
+        'LearningRateFinder': LearningRateFinder(optimizer, min_lr=1e-5, max_lr=1.0, num_batches=numb_steps,
+                                                 divergence_threshold=None, lr_multipliers=lr_multipliers),
+        'CyclicLR_Scheduler': CyclicLR_Scheduler(optimizer, min_lr=0.1, max_lr=1.0, numb_images_in_dataset=numb_steps,
+                                                 LR=TriangularVals(), batch_size=1, step_size=[1],
+                                                 lr_multipliers=lr_multipliers),
+    }
+
+def bench_param_groups(group_counts=GROUP_COUNTS, numb_steps=NUMB_STEPS):
+    '''
+    :return: list of (scheduler name, number of param groups, multipliers used, microseconds per batch_step)
+    '''
+    results = []
+    for numb_groups in group_counts:
+        for use_multipliers in (False, True):
+            lr_multipliers = np.linspace(0.1, 1.0, numb_groups) if use_multipliers else None
+            schedulers = get_schedulers(DummyOptimizer(numb_groups), numb_steps, lr_multipliers)
+            for name, scheduler in schedulers.items():
+                secs = timeit.timeit(scheduler.batch_step, number=numb_steps)
+                results.append((name, numb_groups, use_multipliers, secs / numb_steps * 1e6))
+    return results
+
+if __name__ == '__main__':
+    print("{:>20} {:>8} {:>12} {:>10}".format("scheduler", "groups", "multipliers", "us/step"))
+    for name, numb_groups, use_multipliers, usecs in bench_param_groups():
+        print("{:>20} {:>8} {:>12} {:>10.2f}".format(name, numb_groups, str(use_multipliers), usecs))
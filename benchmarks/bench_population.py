@@ -0,0 +1,69 @@
+'''
+per step cost of stepping a whole population, OneCyclePopulation and CyclicPopulation against
+one OneCycle_Scheduler / CyclicLR_Scheduler per member, as the population grows
+
+tracks where one population scheduler starts to pay off over a scheduler per member
+
+from the repo root
+python benchmarks/bench_population.py
+'''
+import timeit
+
+import numpy as np
+
+from bench_utils import DummyOptimizer
+from cyclic_LR_scheduler import CyclicLR_Scheduler, OneCycle_Scheduler
+from population_scheduler import CyclicPopulation, OneCyclePopulation
+from sequence_generators import CosignVals, TriangularVals
+
+MEMBER_COUNTS = [1, 3, 10, 30, 100, 300]
+NUMB_STEPS = 2000
+
+def one_cycle_args(numb_members, numb_steps):
+    return {'num_batches': numb_steps, 'numb_annihlation_batches': numb_steps // 10, 'annihilation_divisor': 100,
+            'max_lr': np.linspace(0.5, 2.0, numb_members), 'min_lr': 0.1, 'max_momentum': 0.95,
+            'min_momentum': 0.85}
+
+def cyclic_args(numb_members, numb_steps):
+    return {'min_lr': 0.1, 'max_lr': np.linspace(0.5, 2.0, numb_members), 'numb_images_in_dataset': numb_steps,
+            'LR': TriangularVals(), 'LR_anneal': CosignVals(), 'batch_size': 1, 'step_size': [1, 1]}
+
+def get_schedulers(name, numb_members, numb_steps):
+    '''
+    :return: the population scheduler and the list of individual schedulers, for the same schedules
+    '''
+    if name == 'one_cycle':
+        args, population_type, scheduler_type = one_cycle_args(numb_members, numb_steps), OneCyclePopulation, \
+            OneCycle_Scheduler
+    else:
+        args, population_type, scheduler_type = cyclic_args(numb_members, numb_steps), CyclicPopulation, \
+            CyclicLR_Scheduler
+    population = population_type([DummyOptimizer() for _ in range(numb_members)], **args)
+    schedulers = [scheduler_type(DummyOptimizer(), **dict(args, max_lr=max_lr)) for max_lr in args['max_lr']]
+    return population, schedulers
+
+def bench_population(member_counts=MEMBER_COUNTS, numb_steps=NUMB_STEPS):
+    '''
+    :return: list of (schedule, number of members, microseconds per population step,
+                      microseconds stepping every individual scheduler once)
+    '''
+    results = []
+    for name in ('one_cycle', 'cyclic'):
+        for numb_members in member_counts:
+            population, schedulers = get_schedulers(name, numb_members, numb_steps)
+            population_secs = timeit.timeit(population.batch_step, number=numb_steps)
+
+            def step_all():
+                for scheduler in schedulers:
+                    scheduler.batch_step()
+            individual_secs = timeit.timeit(step_all, number=numb_steps)
+            results.append((name, numb_members, population_secs / numb_steps * 1e6,
+                            individual_secs / numb_steps * 1e6))
+    return results
+
+if __name__ == '__main__':
+    print("{:>10} {:>8} {:>14} {:>14} {:>8}".format("schedule", "members", "population us", "individual us",
+                                                   "speedup"))
+    for name, numb_members, population_usecs, individual_usecs in bench_population():
+        print("{:>10} {:>8} {:>14.2f} {:>14.2f} {:>8.2f}".format(name, numb_members, population_usecs,
+                                                               individual_usecs, individual_usecs / population_usecs))
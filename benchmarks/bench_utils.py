@@ -0,0 +1,14 @@
+'''
+shared bits for the benchmarks, importing this puts the repo root and the test directory on sys.path
+'''
+import os, sys
+
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+testDir = os.path.join(rootDir, 'test')   #by path, the stdlib has a test package
+if testDir not in sys.path:
+    sys.path.append(testDir)
+
+from dummy_optimizer import DummyOptimizer
@@ -0,0 +1,114 @@
+'''
+runs the whole benchmark suite and writes the results to a json file, so runs can be compared between versions
+
+from the repo root
+python benchmarks/run_benchmarks.py --out before.json
+... change things ...
+python benchmarks/run_benchmarks.py --out after.json --compare before.json
+'''
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import bench_utils
+from bench_cyclic_step import bench_cyclic_step
+from bench_generators import MAX_EXPONENT, MIN_EXPONENT, bench_get1Cycle, bench_getVals
+from bench_import import bench_import
+from bench_logging import bench_logging
+from bench_param_groups import bench_param_groups
+from bench_population import bench_population
+
+def _record(name, value, unit, **params):
+    return {'name': name, 'params': params, 'value': value, 'unit': unit}
+
+def run_all(min_exponent=MIN_EXPONENT, max_exponent=MAX_EXPONENT, mnist=False):
+    '''
+    :param mnist: also run the (slow, needs torch) synthetic MNIST training throughput benchmark
+    :return: list of result records, {'name', 'params', 'value', 'unit'}
+    '''
+    records = []
+    for gen, numb_iterations, secs in bench_getVals(min_exponent, max_exponent):
+        records.append(_record('getVals', secs, 's', generator=gen, numb_iterations=numb_iterations))
+    for storage, numb_batches, secs, peak in bench_get1Cycle(min_exponent, max_exponent):
+        records.append(_record('get1Cycle_build_time', secs, 's', storage=storage, numb_batches=numb_batches))
+        records.append(_record('get1Cycle_peak_memory', peak, 'bytes', storage=storage, numb_batches=numb_batches))
+    for name, numb_groups, use_multipliers, usecs in bench_param_groups():
+        records.append(_record('batch_step', usecs, 'us', scheduler=name, param_groups=numb_groups,
+                               multipliers=use_multipliers))
+    for numb_images, usecs in bench_cyclic_step():
+        records.append(_record('cyclic_batch_step_vs_dataset', usecs, 'us', numb_images_in_dataset=numb_images))
+    for name, numb_members, population_usecs, individual_usecs in bench_population():
+        records.append(_record('population_batch_step', population_usecs, 'us', schedule=name,
+                               members=numb_members))
+        records.append(_record('individual_batch_steps', individual_usecs, 'us', schedule=name,
+                               members=numb_members))
+    for writer, usecs in bench_logging():
+        records.append(_record('batch_step_logging', usecs, 'us', writer=writer))
+    for module, usecs in bench_import():
+        records.append(_record('cold_import', usecs, 'us', module=module))
+    if mnist:
+        from bench_mnist_throughput import bench_mnist_throughput
+        for name, samples_per_sec, share, usecs, _ in bench_mnist_throughput():
+            records.append(_record('mnist_train_throughput', samples_per_sec, 'samples/s', scheduler=name))
+            records.append(_record('mnist_scheduler_share', share, 'fraction', scheduler=name))
+    return records
+
+def get_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=bench_utils.rootDir, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'processor': platform.processor()}
+
+def _key(record):
+    return record['name'], json.dumps(record['params'], sort_keys=True)
+
+def compare(old_records, new_records):
+    '''
+    :return: list of (name, params, old value, new value, new/old) for records present in both runs
+    '''
+    old = {_key(r): r['value'] for r in old_records}
+    rows = []
+    for record in new_records:
+        key = _key(record)
+        if key in old:
+            ratio = record['value'] / old[key] if old[key] else float('inf')
+            rows.append((record['name'], record['params'], old[key], record['value'], ratio))
+    return rows
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='hyperparam_helper benchmarks')
+    parser.add_argument('--out', default='bench_results.json', help='where to write the results (json)')
+    parser.add_argument('--compare', default=None, metavar='JSON', help='earlier results to compare against')
+    parser.add_argument('--min-exponent', type=int, default=MIN_EXPONENT,
+                        help='smallest schedule is 10**min_exponent steps (default: {})'.format(MIN_EXPONENT))
+    parser.add_argument('--max-exponent', type=int, default=MAX_EXPONENT,
+                        help='largest schedule is 10**max_exponent steps, 8 needs several GB (default: {})'.format(
+                            MAX_EXPONENT))
+    parser.add_argument('--mnist', action='store_true', default=False,
+                        help='include the synthetic MNIST training throughput benchmark (needs torch)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    records = run_all(args.min_exponent, args.max_exponent, args.mnist)
+    with open(args.out, 'w') as f:
+        json.dump({'metadata': get_metadata(), 'results': records}, f, indent=1)
+    print('wrote {} results to {}'.format(len(records), args.out))
+
+    if args.compare:
+        with open(args.compare) as f:
+            old_records = json.load(f)['results']
+        print("{:>30} {:>60} {:>8}".format("benchmark", "params", "new/old"))
+        for name, params, old, new, ratio in compare(old_records, records):
+            print("{:>30} {:>60} {:>8.2f}".format(name, json.dumps(params, sort_keys=True), ratio))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,24 @@
 import sys
+import math
+import bisect
+import itertools
+import time
+import numpy as np
 parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
 if __name__ == '__main__' or parent_module.__name__ == '__main__':
-    from sequence_generators import CosignVals, LinearDecrease, LinearIncreaseVals, ReverseTriangularVals, TriangularVals
-    from learning_rate_generators import get1Cycle_LR_and_Momentum
+    from sequence_generators import CosignVals, ExponentialIncreaseVals, LinearDecrease, LinearIncreaseVals, \
+        ReverseTriangularVals, TriangularVals
+    from learning_rate_generators import get1Cycle_channels, get1Cycle_LR_and_Momentum, get1Cycle_schedule, \
+        momentum_channel, OneCycleChannel
+    from metrics_logger import make_logger
+    from sequence_cache import cached_vals
 else:
-    from .sequence_generators import CosignVals, LinearDecrease, LinearIncreaseVals, ReverseTriangularVals, \
-        TriangularVals
-    from .learning_rate_generators import get1Cycle_LR_and_Momentum
+    from .sequence_generators import CosignVals, ExponentialIncreaseVals, LinearDecrease, LinearIncreaseVals, \
+        ReverseTriangularVals, TriangularVals
+    from .learning_rate_generators import get1Cycle_channels, get1Cycle_LR_and_Momentum, get1Cycle_schedule, \
+        momentum_channel, OneCycleChannel
+    from .metrics_logger import make_logger
+    from .sequence_cache import cached_vals
 
 '''
 Implementation of 'Cyclical Learning Rates for Training Neural Networks' by Leslie N. Smith
@@ -25,19 +37,50 @@ def getNumbImagesInDataLoader(dataloader):
     '''
     return len(dataloader.dataset)
 class Cyclic_Scheduler(object):
-    def __init__(self, optimizer,min_lr, max_lr, batch_size = 64, writer =None):
+    def __init__(self, optimizer,min_lr, max_lr, batch_size = 64, writer =None, lr_multipliers = None,
+                 momentum_multipliers = None, batch_size_schedule = None, tensor_values = False):
         '''
         :param optimizer:  optimizer, used primarily for applying learning rate to params
         :param min_lr:
         :param max_lr:
-        :param batch_size:
-        :param writer: tensorboard writer
+        :param batch_size: the batch size the schedule's lengths are counted in.  Positions in the schedule go by
+                           samples seen, batch_step(numb_samples) moves on by numb_samples / batch_size batches
+        :param writer: where to log lr, momentum and step wall time every batch_step, logged from a background
+                       thread so it costs next to nothing.  A tensorboard SummaryWriter (anything with add_scalar),
+                       a .jsonl or .csv path, or see metrics_logger.make_logger.  Call close() when done
+        :param lr_multipliers: optional, one per optimizer param_group, each group gets lr*multiplier
+                               (discriminative learning rates, for instance smaller for early layers)
+        :param momentum_multipliers: optional, same for momentum
+        :param batch_size_schedule: optional batch_size_schedule.BatchSizeRamp, growing the batch size as training
+                                    goes, see next_batch_size()
+        :param tensor_values: keep the scheduled values in the param_groups as 0-dim torch tensors, updated in place,
+                              so a compiled (torch.compile, capturable) optimizer step sees the same tensors every step
+                              instead of a new python float it has to guard on or recompile for.
+                              Values that already are tensors are always updated in place
         '''
         self.optimizer = optimizer   # optimizer layers to which learning rates are applied
         self.min_lr = min_lr
         self.max_lr = max_lr;
         self.batch_size = batch_size
         self.currentLR = min_lr
+
+        self.lr_multipliers = None if lr_multipliers is None else np.asarray(lr_multipliers, dtype=float)
+        self.momentum_multipliers = None if momentum_multipliers is None else np.asarray(momentum_multipliers,
+                                                                                         dtype=float)
+        self._param_groups = None   #cached on first use, see refresh_param_groups
+        self._param_groups_ref = None   #the optimizer's param_groups list they were cached from
+        self._last_vals = {}        #last value written for each key
+        self.tensor_values = tensor_values
+        self._tensor_keys = {}      #key: whether its values are tensors, updated in place
+
+        #index of the next batch, in batches of batch_size, and samples trained on so far
+        self.batch_idx = 0
+        self.samples_seen = 0
+        self.batch_size_schedule = batch_size_schedule
+
+        self.logger = make_logger(writer)
+        self._last_step_time = None
+
     def _get_Vals(self):
         raise NotImplementedError
     def batch_step(self):
@@ -45,53 +88,437 @@ class Cyclic_Scheduler(object):
     def get_currentLR(self):
         return self.currentLR
 
+    @property
+    def numb_steps(self):
+        '''
+        batches in the whole schedule
+        '''
+        raise NotImplementedError
+
+    def values_between(self, start, stop):
+        '''
+        the schedule for batches start to stop (not included) in one go, without touching the optimizer or the
+        position, for exporting and plotting long schedules a chunk at a time
+        :return: dict of param_group key ('lr', 'momentum'...): numpy array, before any multipliers
+        '''
+        raise NotImplementedError
+
+    #torch.optim.lr_scheduler style interface
+    def step(self):
+        '''
+        batch_step, except that like torch's schedulers it keeps the last values once the schedule runs out
+        '''
+        try:
+            self.batch_step()
+        except StopIteration:
+            pass
+
+    def get_last_lr(self):
+        '''
+        :return: list of python floats, the lr of every param group
+        '''
+        return [float(param_group['lr']) for param_group in self._get_param_groups()]
+
+    @property
+    def last_epoch(self):
+        '''
+        index of the last step applied, -1 before the first, as torch's schedulers count them
+        '''
+        return self.batch_idx - 1
+
+    def next_batch_size(self, samples_seen = None):
+        '''
+        how big the next batch should be, batch_size unless there is a batch_size_schedule
+        :param samples_seen: defaults to the samples seen so far
+        '''
+        if self.batch_size_schedule is None:
+            return self.batch_size
+        return self.batch_size_schedule.batch_size_at(self.samples_seen if samples_seen is None else samples_seen)
+
+    def _get_config(self):
+        '''
+        whatever determines the values of the schedule, a saved state only loads into an identical configuration
+        '''
+        config = {'min_lr': self.min_lr, 'max_lr': self.max_lr}
+        if self.batch_size_schedule is not None:
+            config.update(batch_size=self.batch_size, batch_size_schedule=self.batch_size_schedule.describe())
+        return config
+
+    def _seek(self, batch_idx, samples_seen = None):
+        '''
+        moves straight to batch_idx, the next batch_step applies the values for that batch
+        :param samples_seen: defaults to batch_idx full batches
+        '''
+        self.batch_idx = batch_idx
+        self.samples_seen = batch_idx * self.batch_size if samples_seen is None else samples_seen
+
+    def _advance(self, numb_samples):
+        '''
+        moves past a batch of numb_samples (next_batch_size() if None)
+        '''
+        if numb_samples is None:
+            numb_samples = self.next_batch_size()
+        samples_seen = self.samples_seen + numb_samples
+        self._seek(samples_seen // self.batch_size, samples_seen)
+
+    def state_dict(self):
+        '''
+        for checkpointing, small and picklable so it can go in the same torch.save as the model and optimizer
+        :return: dict with the position in the schedule and the configuration it belongs to
+        '''
+        return {'scheduler': type(self).__name__, 'batch_idx': self.batch_idx, 'samples_seen': self.samples_seen,
+                'currentLR': self.currentLR, 'config': self._get_config()}
+
+    def load_state_dict(self, state_dict):
+        '''
+        resumes from state_dict(), jumps directly to the saved step without replaying the batches before it
+        construct the scheduler with the same arguments first
+        '''
+        if state_dict['scheduler'] != type(self).__name__ or state_dict['config'] != self._get_config():
+            raise ValueError("state is for {} {}, not {} {}".format(state_dict['scheduler'], state_dict['config'],
+                                                                    type(self).__name__, self._get_config()))
+        self._seek(state_dict['batch_idx'], state_dict.get('samples_seen'))
+        self.currentLR = state_dict['currentLR']
+        self._last_vals = {}   #rewrite every value on the next step
+        if self.optimizer is not None:
+            self.refresh_param_groups()   #the optimizer may have been loaded too, with new param_group dicts
+
+    def refresh_param_groups(self):
+        '''
+        the optimizer's param_groups are cached the first time values are applied, and cached again whenever
+        the optimizer's list is replaced (Optimizer.load_state_dict) or changes length.
+        call this if groups in the list are swapped for others of the same number
+        :return: the cached list of param groups
+        '''
+        self._param_groups_ref = self.optimizer.param_groups
+        self._param_groups = list(self._param_groups_ref)
+        for multipliers in (self.lr_multipliers, self.momentum_multipliers):
+            if multipliers is not None and len(multipliers) != len(self._param_groups):
+                raise ValueError("got {} multipliers for {} param_groups".format(len(multipliers),
+                                                                                len(self._param_groups)))
+        self._last_vals = {}
+        self._tensor_keys = {}
+        return self._param_groups
+
+    def _check_tensor_key(self, key):
+        '''
+        with tensor_values turns the key's values into 0-dim float64 tensors (on the device of each group's params),
+        so they hold exactly the python floats the other mode writes
+        :return: True if every group holds key as a tensor
+        '''
+        if self.tensor_values:
+            import torch   #only needed in this mode, the scheduler itself does not depend on torch
+            for param_group in self._param_groups:
+                if not isinstance(param_group.get(key), torch.Tensor):
+                    params = param_group.get('params')
+                    device = params[0].device if params else None
+                    param_group[key] = torch.tensor(float(param_group.get(key, 0.0)), dtype=torch.float64,
+                                                    device=device)
+        is_tensor = all(hasattr(param_group.get(key), 'fill_') for param_group in self._param_groups)
+        self._tensor_keys[key] = is_tensor
+        return is_tensor
+
+    def _get_param_groups(self):
+        '''
+        :return: the cached param groups, refreshed if the optimizer's list is not the one they came from
+        '''
+        param_groups = self._param_groups
+        if param_groups is None or self.optimizer.param_groups is not self._param_groups_ref or \
+                len(self._param_groups_ref) != len(param_groups):
+            param_groups = self.refresh_param_groups()
+        return param_groups
+
+    def _apply(self, lr, momentum = None, extra = ()):
+        '''
+        writes lr (and momentum if given) into every param group, scaled by the multipliers if any,
+        and any extra (key, value) pairs as they are
+        a value that has not changed since the last step is not written again
+        '''
+        # a tight loop over the groups per key, measured faster than one pass writing every key per group
+        self._apply_val('lr', lr, self.lr_multipliers)
+        if momentum is not None:
+            self._apply_val('momentum', momentum, self.momentum_multipliers)
+        for key, val in extra:
+            self._apply_val(key, val, None)
+
+    def _log_step(self, momentum = float('nan')):
+        '''
+        records the values just applied, and the wall time since the previous batch_step
+        call it before moving on to the next batch
+        '''
+        if self.logger is None:
+            return
+        now = time.perf_counter()
+        step_time = float('nan') if self._last_step_time is None else now - self._last_step_time
+        self._last_step_time = now
+        self.logger.record(self.batch_idx, self.currentLR, momentum, step_time)
+
+    def close(self):
+        '''
+        flushes and closes the writer, if there is one
+        '''
+        if self.logger is not None:
+            self.logger.close()
+
+    def _apply_val(self, key, val, multipliers):
+        param_groups = self._get_param_groups()   #first, a refresh forgets the last values
+        if self._last_vals.get(key) == val:
+            return
+        self._last_vals[key] = val
+        is_tensor = self._tensor_keys.get(key)
+        if is_tensor is None:
+            is_tensor = self._check_tensor_key(key)
+
+        if is_tensor:
+            # in place, the tensors the compiled optimizer step captured stay the same objects
+            if multipliers is None:
+                for param_group in param_groups:
+                    param_group[key].fill_(val)
+            else:
+                for param_group, group_val in zip(param_groups, (val * multipliers).tolist()):
+                    param_group[key].fill_(group_val)
+        elif multipliers is None:
+            for param_group in param_groups:
+                param_group[key] = val
+        else:
+            for param_group, group_val in zip(param_groups, (val * multipliers).tolist()):
+                param_group[key] = group_val
+
 
 class OneCycle_Scheduler(Cyclic_Scheduler):
 
     def __init__(self, optimizer,*,min_lr, max_lr, num_batches, numb_annihlation_batches, annihilation_divisor,
-                 max_momentum, min_momentum,batch_size = 64, writer =None ):
-        super().__init__(optimizer, min_lr, max_lr, batch_size, writer)
+                 max_momentum, min_momentum,batch_size = 64, writer =None, dtype = None, lr_multipliers = None,
+                 momentum_multipliers = None, schedule = None, batch_size_schedule = None, extra_channels = None,
+                 tensor_values = False ):
+        '''
+        :param dtype: None keeps the schedule as lists of python floats, np.float32 or np.float64
+                      stores it in a single structured numpy array (self.schedule) instead, much smaller for long runs
+        :param schedule: an already built structured array ('lr' and 'momentum' fields) to use instead of building one,
+                         like the table shared between ranks by shared_schedule.share_1cycle_schedule
+        :param lr_multipliers: see Cyclic_Scheduler
+        :param momentum_multipliers: "
+        :param batch_size_schedule: see Cyclic_Scheduler, num_batches and numb_annihlation_batches count batches
+                                    of batch_size
+        :param extra_channels: more param_group keys on 1cycle schedules, a list of (key, OneCycleChannel),
+                               for instance [('weight_decay', OneCycleChannel(max_val=5e-4, min_val=5e-5))].
+                               Generated into the same structured array as lr and momentum (float64 unless dtype
+                               says otherwise).  A schedule passed in brings its own extra fields instead
+        :param tensor_values: see Cyclic_Scheduler
+        '''
+        super().__init__(optimizer, min_lr, max_lr, batch_size, writer, lr_multipliers, momentum_multipliers,
+                         batch_size_schedule, tensor_values)
+        self.num_batches = num_batches
+        self.numb_annihlation_batches = numb_annihlation_batches
+        self.annihilation_divisor = annihilation_divisor
+        self.max_momentum = max_momentum
+        self.min_momentum = min_momentum
+        self.extra_channels = None if extra_channels is None else list(extra_channels)
 
         #get all that we need
-        self.lrs, self.moms= get1Cycle_LR_and_Momentum(num_batches, numb_annihlation_batches, annihilation_divisor,
-                                                       max_lr, min_lr, max_momentum, min_momentum)
-        #generator
-        self.getVals = self._get_Vals()
+        if schedule is None and self.extra_channels:
+            channels = [('lr', OneCycleChannel(max_lr, min_lr, annihilation_divisor)),
+                        ('momentum', momentum_channel(max_momentum, min_momentum))] + self.extra_channels
+            schedule = get1Cycle_channels(num_batches, numb_annihlation_batches, channels,
+                                          dtype=np.float64 if dtype is None else dtype)
+        if schedule is not None:
+            if len(schedule) != num_batches + numb_annihlation_batches:
+                raise ValueError("schedule has {} steps, expected num_batches + numb_annihlation_batches = {}".format(
+                    len(schedule), num_batches + numb_annihlation_batches))
+            self.schedule = schedule
+            self.lrs, self.moms = schedule['lr'], schedule['momentum']
+        elif dtype is None:
+            self.schedule = None
+            self.lrs, self.moms= get1Cycle_LR_and_Momentum(num_batches, numb_annihlation_batches, annihilation_divisor,
+                                                           max_lr, min_lr, max_momentum, min_momentum)
+        else:
+            self.schedule = get1Cycle_schedule(num_batches, numb_annihlation_batches, annihilation_divisor,
+                                               max_lr, min_lr, max_momentum, min_momentum, dtype=dtype)
+            self.lrs, self.moms = self.schedule['lr'], self.schedule['momentum']   #views, no copies
+
+        # anything in the schedule besides lr and momentum is written into the param_groups under its own name
+        self.extra_keys = [] if self.schedule is None else [name for name in self.schedule.dtype.names
+                                                           if name not in ('lr', 'momentum')]
 
     def _get_Vals(self):
         for lr, mom in zip(self.lrs, self.moms):
             yield lr, mom
 
-    def batch_step(self):
-        lr,mom = next(self.getVals)
-
-        for param_group in self.optimizer.param_groups:
-            param_group['lr'] = lr
-            param_group['momentum'] = mom
+    @property
+    def numb_steps(self):
+        return len(self.lrs)
+
+    def values_between(self, start, stop):
+        if self.schedule is not None:
+            return {name: self.schedule[name][start:stop] for name in self.schedule.dtype.names}
+        return {'lr': np.asarray(self.lrs[start:stop]), 'momentum': np.asarray(self.moms[start:stop])}
+
+    def _get_config(self):
+        config = super()._get_config()
+        config.update(num_batches=self.num_batches, numb_annihlation_batches=self.numb_annihlation_batches,
+                      annihilation_divisor=self.annihilation_divisor, max_momentum=self.max_momentum,
+                      min_momentum=self.min_momentum)
+        if self.extra_channels:
+            config.update(extra_channels=[(key, channel.describe()) for key, channel in self.extra_channels])
+        return config
+
+    def batch_step(self, numb_samples = None):
+        '''
+        :param numb_samples: samples in the batch, defaults to next_batch_size()
+        '''
+        if self.batch_idx >= len(self.lrs):
+            raise StopIteration
+        if self.extra_keys:
+            vals = dict(zip(self.schedule.dtype.names, self.schedule[self.batch_idx].tolist()))
+            lr, mom = vals['lr'], vals['momentum']
+            self._apply(lr, mom, [(key, vals[key]) for key in self.extra_keys])
+        else:
+            lr, mom = float(self.lrs[self.batch_idx]), float(self.moms[self.batch_idx])
+            self._apply(lr, mom)
+        self.currentLR = lr
+        self._log_step(mom)
+        self._advance(numb_samples)
 
 
 class LearningRateFinder(Cyclic_Scheduler):
     '''
-    generates a list of linearly increasing learning rates
+    generates a list of increasing learning rates, linear or exponential (log spaced)
     use it to find the max and min Learning rates
-    '''
-    def __init__(self, optimizer,*,min_lr, max_lr, num_batches,  writer =None ):
-        super().__init__(optimizer, min_lr, max_lr,  writer)
 
-        #now lets change self.lrs to be just Linear_increase
-        li = LinearIncreaseVals()
-        self.lrs = li.getVals( numb_iterations = num_batches, max_val = max_lr, min_val = min_lr)
+    feed it the training loss with record_loss(), it keeps an exponentially smoothed loss per learning rate
+    and stops the range test as soon as the smoothed loss blows past divergence_threshold * best loss so far.
+    suggest_lr_range() then picks min_lr and max_lr off the recorded curve
+    usage:
+    >>>finder = LearningRateFinder(optimizer, min_lr=1e-5, max_lr=1, num_batches=500, mode='exponential')
+    >>>for data, target in train_loader:
+    >>>    finder.batch_step()   # the learning rate for this batch
+    >>>    ...
+    >>>    optimizer.step()
+    >>>    if finder.record_loss(loss.item()):
+    >>>        break
+    >>>min_lr, max_lr = finder.suggest_lr_range()
+    '''
+    MODES = {'linear': LinearIncreaseVals, 'exponential': ExponentialIncreaseVals}
 
-        # generator
-        self.getVals = self._get_Vals()
+    def __init__(self, optimizer,*,min_lr, max_lr, num_batches,  writer =None, mode = 'linear', smoothing = 0.98,
+                 divergence_threshold = 4.0, lr_multipliers = None, tensor_values = False ):
+        '''
+        :param mode: 'linear' or 'exponential', how the learning rates increase from min_lr to max_lr
+        :param smoothing: beta of the exponential moving average of the loss, 0 means no smoothing
+        :param divergence_threshold: stop once the smoothed loss exceeds this multiple of the best smoothed loss,
+                                     None never stops early
+        :param lr_multipliers: see Cyclic_Scheduler
+        :param tensor_values: "
+        '''
+        super().__init__(optimizer, min_lr, max_lr, writer=writer, lr_multipliers=lr_multipliers,
+                         tensor_values=tensor_values)
+
+        if mode not in LearningRateFinder.MODES:
+            raise ValueError("mode must be one of {}, got {}".format(sorted(LearningRateFinder.MODES), mode))
+        self.mode = mode
+        self.LR = LearningRateFinder.MODES[mode]()
+        self.num_batches = num_batches
+
+        #loss tracking
+        self.smoothing = smoothing
+        self.divergence_threshold = divergence_threshold
+        self.avg_loss = 0.0
+        self.best_loss = float('inf')
+        self.diverged = False
+        self.lr_history = []
+        self.loss_history = []   #smoothed
 
     def _get_Vals(self):
-        for lr in self.lrs:
+        for lr in self.LR.getVals(numb_iterations=self.num_batches, max_val=self.max_lr, min_val=self.min_lr):
             yield lr
-    def batch_step(self):
-        self.currentLR = next(self.getVals)
-        for param_group in self.optimizer.param_groups:
-            param_group['lr'] = self.currentLR
+
+    @property
+    def numb_steps(self):
+        return self.num_batches
+
+    def values_between(self, start, stop):
+        return {'lr': self.LR.values_at(np.arange(start, stop), self.num_batches, self.max_lr, self.min_lr)}
+
+    def _get_config(self):
+        config = super()._get_config()
+        config.update(num_batches=self.num_batches, mode=self.mode, smoothing=self.smoothing,
+                      divergence_threshold=self.divergence_threshold)
+        return config
+
+    def state_dict(self):
+        '''
+        also saves the loss tracking, so a resumed range test carries on where it left off
+        '''
+        state = super().state_dict()
+        state.update(avg_loss=self.avg_loss, best_loss=self.best_loss, diverged=self.diverged,
+                     lr_history=list(self.lr_history), loss_history=list(self.loss_history))
+        return state
+
+    def load_state_dict(self, state_dict):
+        super().load_state_dict(state_dict)
+        self.avg_loss = state_dict['avg_loss']
+        self.best_loss = state_dict['best_loss']
+        self.diverged = state_dict['diverged']
+        self.lr_history = list(state_dict['lr_history'])
+        self.loss_history = list(state_dict['loss_history'])
+
+    def batch_step(self, numb_samples = None):
+        if self.done:
+            raise StopIteration
+        self.currentLR = self.LR.value_at(self.batch_idx, self.num_batches, max_val=self.max_lr, min_val=self.min_lr)
+        self._apply(self.currentLR)
+        self._log_step()
+        self._advance(numb_samples)
+
+    @property
+    def done(self):
+        '''
+        True once the loss diverged or every learning rate has been used
+        '''
+        return self.diverged or self.batch_idx >= self.num_batches
+
+    def record_loss(self, loss):
+        '''
+        records the training loss for the current learning rate, call it once per batch after training on it,
+        batch_step(), train, record_loss(loss)
+        :param loss: python float
+        :return: True if the range test is finished (diverged or out of learning rates), time to stop training
+        '''
+        self.avg_loss = self.smoothing * self.avg_loss + (1 - self.smoothing) * loss
+        smoothed_loss = self.avg_loss / (1 - self.smoothing ** (len(self.loss_history) + 1))   #bias correction
+
+        self.lr_history.append(self.currentLR)
+        self.loss_history.append(smoothed_loss)
+
+        if smoothed_loss < self.best_loss:
+            self.best_loss = smoothed_loss
+        if not math.isfinite(smoothed_loss) or (self.divergence_threshold is not None and
+                                                smoothed_loss > self.divergence_threshold * self.best_loss):
+            self.diverged = True
+        return self.done
+
+    def suggest_lr_range(self):
+        '''
+        max_lr is where the smoothed loss bottoms out, min_lr where it is falling fastest before that
+        (falls back to max_lr/10 if the steepest drop is not before the minimum)
+        :return: min_lr, max_lr
+        '''
+        if len(self.loss_history) < 2:
+            raise ValueError("not enough losses recorded, call record_loss() every batch")
+
+        lrs = np.asarray(self.lr_history)
+        losses = np.asarray(self.loss_history)
+        best = int(np.nanargmin(losses))
+        max_lr = float(lrs[best])
+
+        # slope against the sweep's own spacing
+        x = np.log(lrs) if self.mode == 'exponential' else lrs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = np.diff(losses[:best + 1]) / np.diff(x[:best + 1])
+        slopes[~np.isfinite(slopes)] = np.inf
+        if len(slopes) == 0 or not np.isfinite(slopes.min()) or slopes.min() >= 0:
+            return max_lr / 10, max_lr
+        return float(lrs[int(np.argmin(slopes))]), max_lr
 
 class CyclicLR_Scheduler(Cyclic_Scheduler):
     '''
@@ -103,11 +530,26 @@ class CyclicLR_Scheduler(Cyclic_Scheduler):
        for example, step_size = [5,5,5,5,10,10,10]  then number batches = 50*2=100
 
        best to use some sort of learning rate finder
+
+       adaptive mode, give it a patience and report the validation loss with report_metric() (once an epoch, say).
+       When the loss has not improved for patience reports the current cycle is cut short,
+       either moving on to the next cycle in step_size or restarting the current one (SGDR style warm restart).
+       With max_restarts_without_improvement the run stops (StopIteration) after that many plateaus in a row
+       without a new best
+       >>>clr_schedule = CyclicLR_Scheduler(optimizer, ..., LR=CosignVals(), patience=2, on_plateau='restart',
+       >>>                                  max_restarts_without_improvement=3)
+       >>>for epoch in itertools.count():
+       >>>    ... train, clr_schedule.batch_step() every batch ...
+       >>>    if clr_schedule.report_metric(validation_loss):
+       >>>        break
     '''
     NUMBER_STEPS_PER_CYCLE = 2
+    ON_PLATEAU = ('next_cycle', 'restart')
 
     def __init__(self, optimizer,*,min_lr, max_lr,numb_images_in_dataset, LR,LR_anneal=None,
-                 batch_size = 64,step_size=[2], writer =None):
+                 batch_size = 64,step_size=[2], writer =None, lr_multipliers = None, batch_size_schedule = None,
+                 patience = None, on_plateau = 'next_cycle', metric_mode = 'min', threshold = 1e-4,
+                 max_restarts_without_improvement = None, tensor_values = False):
         '''
         :param optimizer:  optimizer, used primarily for applying learning rate to params
         :param min_lr:
@@ -124,6 +566,15 @@ class CyclicLR_Scheduler(Cyclic_Scheduler):
                         this should sum to total number of epochs or your last epoch has lr somewhere
                         between max_lr and base_lr
         :param writer: tensorboard writer
+        :param lr_multipliers: see Cyclic_Scheduler
+        :param batch_size_schedule: see Cyclic_Scheduler, cycle lengths are counted in batches of batch_size
+        :param patience: reports without improvement before a plateau is called, None (default) never adapts
+        :param on_plateau: 'next_cycle' ends the current cycle, 'restart' also starts the same cycle over
+        :param metric_mode: 'min' for losses, 'max' for accuracies
+        :param threshold: relative change that counts as an improvement
+        :param max_restarts_without_improvement: stop after this many plateaus in a row with no new best,
+                                                 None never stops early
+        :param tensor_values: see Cyclic_Scheduler
         usage:
         >>>lr = LinearDecrease()
         >>>anneal = LinearDecrease() # linear annealing
@@ -133,7 +584,8 @@ class CyclicLR_Scheduler(Cyclic_Scheduler):
         >>>vals = list(clr_schedule._get_Vals()) #gets all LRs
         >>>val = clr_schedule.batch_step()     #applies single learning rate to optimizer param_groups
         '''
-        super().__init__(optimizer,min_lr, max_lr,batch_size, writer)
+        super().__init__(optimizer,min_lr, max_lr,batch_size, writer, lr_multipliers,
+                         batch_size_schedule=batch_size_schedule, tensor_values=tensor_values)
 
         #learning rate sequence generator
         self.LR = LR
@@ -145,33 +597,245 @@ class CyclicLR_Scheduler(Cyclic_Scheduler):
         self.step_size = step_size
         self.numb_images = numb_images_in_dataset
 
-    def _get_Vals(self):
-        numb_batches_per_epoch = self.numb_images//self.batch_size
+        #plateau detection
+        if on_plateau not in CyclicLR_Scheduler.ON_PLATEAU:
+            raise ValueError("on_plateau must be one of {}, got {}".format(CyclicLR_Scheduler.ON_PLATEAU, on_plateau))
+        if metric_mode not in ('min', 'max'):
+            raise ValueError("metric_mode must be 'min' or 'max', got {}".format(metric_mode))
+        self.patience = patience
+        self.on_plateau = on_plateau
+        self.metric_mode = metric_mode
+        self.threshold = threshold
+        self.max_restarts_without_improvement = max_restarts_without_improvement
+        self.best_metric = None
+        self.numb_bad_reports = 0
+        self.improved_since_restart = False
+        self.restarts_without_improvement = 0
+        self.restarts = []   #batch_idx of every plateau
+        self.stopped = False
+
+        #streaming position, batch_step looks up values rather than generating cycles
+        self.max_lrs, self.cycle_lengths = self._get_cycles()
+        self._cycle_ends = list(itertools.accumulate(self.cycle_lengths))
+        self._seek(0)
+
+    def _get_cycles(self):
+        '''
+        :return: max_lr and number of batches for each cycle in step_size
+        '''
+        numb_batches_per_epoch = self.numb_images // self.batch_size
 
         # how many annealing values between max_lr and min_lr
-        max_lrs = [self.max_lr]*len(self.step_size)
+        max_lrs = [self.max_lr] * len(self.step_size)
         if self.LR_anneal is not None:
-            max_lrs = self.LR_anneal.getVals(len(self.step_size), max_val=self.max_lr, min_val=self.min_lr)
+            max_lrs = list(self.LR_anneal.getVals(len(self.step_size), max_val=self.max_lr, min_val=self.min_lr))
 
-        for max_lr, step in zip(max_lrs, self.step_size):
-            # how many batches per epoch
-            numb_epochs = CyclicLR_Scheduler.NUMBER_STEPS_PER_CYCLE *step
-            numb_batches = numb_epochs*numb_batches_per_epoch
+        cycle_lengths = [CyclicLR_Scheduler.NUMBER_STEPS_PER_CYCLE * step * numb_batches_per_epoch
+                         for step in self.step_size]
+        return max_lrs, cycle_lengths
 
-            #get some learning rates
-            lrs = self.LR.getVals(numb_batches,max_val=max_lr, min_val = self.min_lr )
+    def _seek(self, batch_idx, samples_seen = None):
+        '''
+        binary search over the cycle boundaries, O(log cycles) no matter how far in batch_idx is
+        '''
+        super()._seek(batch_idx, samples_seen)
+        self.cycle = bisect.bisect_right(self._cycle_ends, batch_idx)   # which entry of step_size we are in
+        self.cycle_pos = batch_idx - (self._cycle_ends[self.cycle - 1] if self.cycle > 0 else 0)  # batches into it
+
+    def _get_config(self):
+        config = super()._get_config()
+        config.update(numb_images_in_dataset=self.numb_images, batch_size=self.batch_size,
+                      step_size=list(self.step_size), LR=type(self.LR).__name__,
+                      LR_anneal=None if self.LR_anneal is None else type(self.LR_anneal).__name__)
+        if self.patience is not None:
+            config.update(patience=self.patience, on_plateau=self.on_plateau, metric_mode=self.metric_mode,
+                          threshold=self.threshold,
+                          max_restarts_without_improvement=self.max_restarts_without_improvement)
+        return config
+
+    def state_dict(self):
+        '''
+        also saves the cycles as cut by plateaus and the plateau tracking
+        '''
+        state = super().state_dict()
+        state.update(max_lrs=list(self.max_lrs), cycle_lengths=list(self.cycle_lengths), best_metric=self.best_metric,
+                     numb_bad_reports=self.numb_bad_reports, improved_since_restart=self.improved_since_restart,
+                     restarts_without_improvement=self.restarts_without_improvement, restarts=list(self.restarts),
+                     stopped=self.stopped)
+        return state
+
+    def load_state_dict(self, state_dict):
+        super().load_state_dict(state_dict)
+        if 'cycle_lengths' in state_dict:
+            self.max_lrs = list(state_dict['max_lrs'])
+            self.cycle_lengths = list(state_dict['cycle_lengths'])
+            self._cycle_ends = list(itertools.accumulate(self.cycle_lengths))
+            self._seek(self.batch_idx, self.samples_seen)
+            for key in ('best_metric', 'numb_bad_reports', 'improved_since_restart', 'restarts_without_improvement',
+                        'stopped'):
+                setattr(self, key, state_dict[key])
+            self.restarts = list(state_dict['restarts'])
+
+    def _improved(self, metric):
+        if self.best_metric is None:
+            return True
+        if self.metric_mode == 'min':
+            return metric < self.best_metric - abs(self.best_metric) * self.threshold
+        return metric > self.best_metric + abs(self.best_metric) * self.threshold
+
+    def report_metric(self, metric):
+        '''
+        feeds back the validation loss (or whatever metric_mode says), only does anything with a patience
+        :param metric: python float
+        :return: True once the run should stop, max_restarts_without_improvement plateaus in a row without a new best
+                 or out of cycles
+        '''
+        if self.patience is not None:
+            if self._improved(metric):
+                self.best_metric = metric
+                self.numb_bad_reports = 0
+                self.improved_since_restart = True
+            else:
+                self.numb_bad_reports += 1
+
+            if self.numb_bad_reports > self.patience:
+                self.restarts_without_improvement = 0 if self.improved_since_restart else \
+                    self.restarts_without_improvement + 1
+                self.improved_since_restart = False
+                self.numb_bad_reports = 0
+                if self.max_restarts_without_improvement is not None and \
+                        self.restarts_without_improvement >= self.max_restarts_without_improvement:
+                    self.stopped = True
+                else:
+                    self._end_cycle()
+        return self.done
+
+    @property
+    def done(self):
+        return self.stopped or self.cycle >= len(self.cycle_lengths)
+
+    def _end_cycle(self):
+        '''
+        cuts the current cycle off where it is, and for a restart puts a fresh copy of it next
+        only the cycle boundaries from here on are recomputed, lrs are looked up per step anyway
+        '''
+        if self.cycle >= len(self.cycle_lengths):
+            return
+        self.restarts.append(self.batch_idx)
+        if self.on_plateau == 'restart':
+            self.cycle_lengths.insert(self.cycle + 1, self.cycle_lengths[self.cycle])
+            self.max_lrs.insert(self.cycle + 1, self.max_lrs[self.cycle])
+            self._cycle_ends.append(None)
+        self.cycle_lengths[self.cycle] = self.cycle_pos
+
+        end = self._cycle_ends[self.cycle - 1] if self.cycle > 0 else 0
+        for cycle in range(self.cycle, len(self.cycle_lengths)):
+            end += self.cycle_lengths[cycle]
+            self._cycle_ends[cycle] = end
+        self._seek(self.batch_idx, self.samples_seen)
+
+    @property
+    def numb_steps(self):
+        '''
+        as the cycles stand now, plateaus cut them short
+        '''
+        return self._cycle_ends[-1] if self._cycle_ends else 0
+
+    def values_between(self, start, stop):
+        steps = np.arange(start, stop)
+        cycle_ends = np.asarray(self._cycle_ends, dtype=np.int64)
+        cycles = np.searchsorted(cycle_ends, steps, side='right')
+        cycle_starts = np.concatenate(([0], cycle_ends[:-1]))
+        return {'lr': self.LR.values_at(steps - cycle_starts[cycles], np.asarray(self.cycle_lengths)[cycles],
+                                        np.asarray(self.max_lrs, dtype=float)[cycles], self.min_lr)}
+
+    def _get_Vals(self):
+        for max_lr, numb_batches in zip(*self._get_cycles()):
+            #get some learning rates, cycles with the same length and max_lr come out of the cache
+            lrs = cached_vals(self.LR, numb_batches,max_val=max_lr, min_val = self.min_lr ).tolist()
             for lr in lrs:
                 yield lr
 
-    def batch_step(self):
-         for param_group, lr in zip(self.optimizer.param_groups, self._get_Vals()):
-            param_group['lr'] = lr
-         self.cur_lr = lr   #used in learning rate finder
+    def batch_step(self, numb_samples = None):
+        '''
+        :param numb_samples: samples in the batch, defaults to next_batch_size()
+        '''
+        if self.cycle >= len(self.cycle_lengths) or self.stopped:
+            raise StopIteration
 
-import matplotlib.pyplot as plt
+        lr = self.LR.value_at(self.cycle_pos, self.cycle_lengths[self.cycle],
+                              max_val=self.max_lrs[self.cycle], min_val=self.min_lr)
 
+        self._apply(lr)
+        self.currentLR = lr
+        self.cur_lr = lr   #used in learning rate finder
+        self._log_step()
+        self._advance(numb_samples)
+
+class Piecewise_Scheduler(Cyclic_Scheduler):
+    '''
+    follows schedules compiled with schedule_compiler.ScheduleBuilder, each step is a binary search
+    over the segment table so arbitrary multi phase schedules need O(segments) memory
+    usage:
+    >>>lrs = ScheduleBuilder().warmup(500, 0.01, 1.0).cosine(10000, 1.0, 0.01).compile()
+    >>>moms = ScheduleBuilder().linear(500, 0.95, 0.85).constant(10000, 0.85).compile()
+    >>>scheduler = Piecewise_Scheduler(optimizer, lr_schedule=lrs, momentum_schedule=moms)
+    '''
+    def __init__(self, optimizer,*, lr_schedule, momentum_schedule = None, batch_size = 64, writer =None,
+                 lr_multipliers = None, momentum_multipliers = None, batch_size_schedule = None, tensor_values = False):
+        '''
+        :param lr_schedule: CompiledSchedule, in batches of batch_size
+        :param momentum_schedule: optional CompiledSchedule, at least as long as lr_schedule
+        '''
+        if momentum_schedule is not None and len(momentum_schedule) < len(lr_schedule):
+            raise ValueError("momentum_schedule is shorter than lr_schedule")
+        bounds = [val for segment in lr_schedule.segments for val in (segment.min_val, segment.max_val)]
+        super().__init__(optimizer, min(bounds, default=0.0), max(bounds, default=0.0), batch_size, writer,
+                         lr_multipliers, momentum_multipliers, batch_size_schedule, tensor_values)
+        self.lr_schedule = lr_schedule
+        self.momentum_schedule = momentum_schedule
+
+    def _get_Vals(self):
+        lrs = self.lr_schedule.getVals()
+        if self.momentum_schedule is None:
+            for lr in lrs:
+                yield lr
+        else:
+            for lr, mom in zip(lrs, self.momentum_schedule.getVals()):
+                yield lr, mom
+
+    @property
+    def numb_steps(self):
+        return len(self.lr_schedule)
+
+    def values_between(self, start, stop):
+        steps = np.arange(start, stop)
+        vals = {'lr': self.lr_schedule.values_at(steps)}
+        if self.momentum_schedule is not None:
+            vals['momentum'] = self.momentum_schedule.values_at(steps)
+        return vals
+
+    def _get_config(self):
+        config = super()._get_config()
+        config.update(lr_schedule=self.lr_schedule.describe(),
+                      momentum_schedule=None if self.momentum_schedule is None else self.momentum_schedule.describe())
+        return config
+
+    def batch_step(self, numb_samples = None):
+        '''
+        :param numb_samples: samples in the batch, defaults to next_batch_size()
+        '''
+        if self.batch_idx >= len(self.lr_schedule):
+            raise StopIteration
+        self.currentLR = self.lr_schedule.value_at(self.batch_idx)
+        mom = None if self.momentum_schedule is None else self.momentum_schedule.value_at(self.batch_idx)
+        self._apply(self.currentLR, mom)
+        self._log_step(float('nan') if mom is None else mom)
+        self._advance(numb_samples)
 
 if __name__ == '__main__':
+    from visualization import plot_vals
+
     dummyoptimizer = 3  #bogus for class
 
     # lr = LinearDecrease()
@@ -185,10 +849,8 @@ if __name__ == '__main__':
     # anneal = LinearDecrease() # linear annealing
     # clr_schedule = CyclicLR_Scheduler(dummyoptimizer, min_lr=.1, max_lr=1, numb_images_in_dataset=1000, LR=lr,
     #                                   LR_anneal=anneal, batch_size=10, step_size=[1]*20)
-    # plt.xlabel("sample")
-    # plt.ylabel("learning rate")
-    # plt.scatter(range(len(vals)), vals)
-    # plt.show()
+    # vals = list(clr_schedule._get_Vals())
+    # plot_vals(vals)
 
     #--- test with onecycle
     clr_schedule = OneCycle_Scheduler(dummyoptimizer, num_batches=200, numb_annihlation_batches=20, annihilation_divisor=100, max_lr=1,
@@ -196,10 +858,4 @@ if __name__ == '__main__':
     vals = list(clr_schedule._get_Vals())
     lrs, moms = zip(*vals)
 
-    plt.xlabel("sample")
-    plt.ylabel("learning rate")
-    plt.scatter(range(len(lrs)), lrs)
-    plt.scatter(range(len(moms)), moms)
-
-    plt.show()
-
+    plot_vals(lrs, moms)
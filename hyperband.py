@@ -0,0 +1,140 @@
+import contextlib
+import math
+import os
+import sys
+import tempfile
+import numpy as np
+parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
+if __name__ == '__main__' or parent_module.__name__ == '__main__':
+    from cyclic_LR_scheduler import CyclicLR_Scheduler, OneCycle_Scheduler
+    from lr_finder_sweep import get_pool
+else:
+    from .cyclic_LR_scheduler import CyclicLR_Scheduler, OneCycle_Scheduler
+    from .lr_finder_sweep import get_pool
+
+'''
+Successive halving and Hyperband (Li et al, 'Hyperband: A Novel Bandit-Based Approach to Hyperparameter Optimization')
+over scheduler parameters, max_lr, step_size, annihilation_divisor, momentum bounds...
+
+Every configuration is trained for a small budget, only the best 1/eta of them go on to eta times the budget,
+and so on up to max_budget.  Trials resume from their own checkpoint at each rung rather than starting over,
+so a configuration promoted to the top rung costs the same as one full training.
+Trials run in a local process pool (see lr_finder_sweep.get_pool)
+
+the training function is module level (so it pickles) and looks like
+>>>def train_trial(config, budget, checkpoint):
+>>>    ... build model, optimizer and scheduler = build_scheduler(optimizer, config, num_batches=..., ...)
+>>>    ... if checkpoint exists load model, optimizer and scheduler (scheduler.load_state_dict) from it
+>>>    ... train on until budget (epochs, batches, whatever unit max_budget is in) has been reached
+>>>    ... save model, optimizer and scheduler.state_dict() to checkpoint
+>>>    return validation_loss
+>>>result = hyperband(train_trial, sample_config, max_budget=27)
+>>>result['best_config'], result['best_loss']
+
+the schedule should be sized for max_budget, trials stopped early have only run part of it
+'''
+
+SCHEDULERS = {'OneCycle_Scheduler': OneCycle_Scheduler, 'CyclicLR_Scheduler': CyclicLR_Scheduler}
+
+def build_scheduler(optimizer, config, **kwargs):
+    '''
+    :param config: dict with 'scheduler', a SCHEDULERS name, and 'scheduler_args', the searched constructor arguments
+    :param kwargs: the other constructor arguments, ones that depend on the data like num_batches or batch_size
+    '''
+    return SCHEDULERS[config['scheduler']](optimizer, **config['scheduler_args'], **kwargs)
+
+def rung_budgets(min_budget, max_budget, eta=3):
+    '''
+    :return: list of increasing budgets, max_budget / eta**k down to no less than min_budget
+             ints if min_budget and max_budget are
+    '''
+    numb_rungs = int(math.floor(math.log(max_budget / min_budget) / math.log(eta) + 1e-9)) + 1
+    budgets = [max_budget / eta ** k for k in reversed(range(numb_rungs))]
+    if isinstance(min_budget, int) and isinstance(max_budget, int):
+        budgets = [max(1, int(round(budget))) for budget in budgets]
+    return budgets
+
+def _loss_key(trial):
+    loss = trial['losses'][trial['budget']]
+    return loss if math.isfinite(loss) else math.inf   # nan (diverged) ranks last
+
+def _successive_halving(pool, train_fn, configs, budgets, eta, checkpoint_dir, first_id=0):
+    trials = [{'id': first_id + idx, 'config': config, 'losses': {}, 'budget': None,
+               'checkpoint': os.path.join(checkpoint_dir, 'trial_{}'.format(first_id + idx))}
+              for idx, config in enumerate(configs)]
+
+    alive = trials
+    for rung, budget in enumerate(budgets):
+        futures = [pool.submit(train_fn, trial['config'], budget, trial['checkpoint']) for trial in alive]
+        for trial, future in zip(alive, futures):
+            trial['losses'][budget] = float(future.result())
+            trial['budget'] = budget
+        if rung < len(budgets) - 1:
+            alive = sorted(alive, key=_loss_key)[:max(1, len(alive) // eta)]
+    return trials
+
+def _result(trials, max_budget):
+    finished = [trial for trial in trials if trial['budget'] == max_budget]
+    best = min(finished, key=_loss_key)
+    return {'best_config': best['config'], 'best_loss': best['losses'][max_budget], 'trials': trials}
+
+def successive_halving(train_fn, configs, min_budget, max_budget, eta=3, max_workers=None, threads_per_worker=None,
+                       checkpoint_dir=None):
+    '''
+    :param train_fn: train_fn(config, budget, checkpoint) -> validation loss, see the module docstring
+    :param configs: list of whatever train_fn takes
+    :param min_budget: budget of the first rung
+    :param max_budget: budget of the last rung
+    :param eta: 1/eta of the trials are promoted at each rung
+    :param max_workers: see lr_finder_sweep.get_pool
+    :param threads_per_worker: "
+    :param checkpoint_dir: trial checkpoints go in a new run_ subdirectory of it, kept afterwards, so another run
+                           in the same directory never resumes from this one's checkpoints.
+                           By default a temporary directory removed afterwards
+    :return: dict with 'best_config', 'best_loss' (at max_budget) and 'trials',
+             a list of {'id', 'config', 'losses': {budget: loss}, 'budget': highest reached, 'checkpoint'}
+    '''
+    budgets = rung_budgets(min_budget, max_budget, eta)
+    with get_pool(len(configs), max_workers, threads_per_worker) as pool, \
+            _checkpoint_dir(checkpoint_dir) as checkpoint_dir:
+        trials = _successive_halving(pool, train_fn, configs, budgets, eta, checkpoint_dir)
+    return _result(trials, budgets[-1])
+
+def hyperband(train_fn, sample_config, max_budget, min_budget=1, eta=3, seed=0, max_workers=None,
+              threads_per_worker=None, checkpoint_dir=None):
+    '''
+    runs successive halving brackets from many configurations on small budgets to a few on max_budget,
+    hedging against the small budgets being misleading
+    :param sample_config: sample_config(rng) -> a random config, rng is a numpy RandomState
+    :param seed: for rng
+    the rest as successive_halving
+    :return: as successive_halving, trials also have 'bracket'
+    '''
+    rng = np.random.RandomState(seed)
+    budgets = rung_budgets(min_budget, max_budget, eta)
+    s_max = len(budgets) - 1
+
+    trials = []
+    with get_pool(int(math.ceil(eta ** s_max)), max_workers, threads_per_worker) as pool, \
+            _checkpoint_dir(checkpoint_dir) as checkpoint_dir:
+        for bracket, s in enumerate(reversed(range(s_max + 1))):
+            numb_configs = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            configs = [sample_config(rng) for _ in range(numb_configs)]
+            bracket_trials = _successive_halving(pool, train_fn, configs, budgets[s_max - s:], eta, checkpoint_dir,
+                                                 first_id=len(trials))
+            for trial in bracket_trials:
+                trial['bracket'] = bracket
+            trials += bracket_trials
+    return _result(trials, budgets[-1])
+
+@contextlib.contextmanager
+def _checkpoint_dir(path):
+    '''
+    a new, empty subdirectory of the given directory, or a temporary directory for the duration
+    '''
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+        yield tempfile.mkdtemp(prefix='run_', dir=path)
+    else:
+        with tempfile.TemporaryDirectory(prefix='hyperband_') as tmp:
+            yield tmp
@@ -1,9 +1,14 @@
 import sys
+import numpy as np
 parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
 if __name__ == '__main__' or parent_module.__name__ == '__main__':
-    from sequence_generators import CosignVals,LinearDecrease,LinearIncreaseVals,ReverseTriangularVals,TriangularVals
+    from sequence_generators import _out_array, CosignVals, LinearDecrease, LinearIncreaseVals, \
+        ReverseTriangularVals, TriangularVals
+    from sequence_cache import cached_vals
 else:
-    from .sequence_generators import CosignVals,LinearDecrease,LinearIncreaseVals,ReverseTriangularVals,TriangularVals
+    from .sequence_generators import _out_array, CosignVals, LinearDecrease, LinearIncreaseVals, \
+        ReverseTriangularVals, TriangularVals
+    from .sequence_cache import cached_vals
 
 
 
@@ -34,25 +39,156 @@ def get1Cycle_LR_and_Momentum(num_batches, numb_annihlation_batches, annihilatio
     return lrs,momentums
 
 def get1CycleVals(numb_batches, numb_annihlation_batches, annihilation_divisor, max_val, min_val, annihlation_val = None,
-                  seq_generator = None):
+                  seq_generator = None, out = None, dtype = None):
     '''
     :param seq_generator: the type of sequence to generate, defaults to TriangularVals for triangular learning rates
                         can also be ReverseTriangularVals for modulating the momentum
     :param annihlation_val where annihilation process begins,
-    :return: list of vals
+    :param out: optional 1D array or view numb_batches + numb_annihlation_batches long, each phase is written
+                straight into its slice, see fill1CycleVals
+    :param dtype: of the returned array when there is no out
+    :return: list of vals, or a numpy array (out itself if given) when out or dtype is given
     '''
     if annihlation_val is None:
         annihlation_val = min_val   #default assumes LRs generated
 
     if seq_generator is None:
         seq_generator = TriangularVals() #default assumes LRs generated
+
+    if out is not None or dtype is not None:
+        out = _out_array(out, numb_batches + numb_annihlation_batches, dtype)
+        return fill1CycleVals(out, numb_batches, annihilation_divisor, max_val, min_val, annihlation_val,
+                              seq_generator)
+
     vals = []
-    vals += seq_generator.getVals(numb_batches, max_val=max_val, min_val=min_val)
+    vals += cached_vals(seq_generator, numb_batches, max_val=max_val, min_val=min_val).tolist()
     l1 = LinearDecrease()
-    vals += l1.getVals(numb_annihlation_batches, max_val=annihlation_val, min_val=annihlation_val / annihilation_divisor)
+    vals += cached_vals(l1, numb_annihlation_batches, max_val=annihlation_val,
+                        min_val=annihlation_val / annihilation_divisor).tolist()
     return vals
 
 
+def fill1CycleVals(out, numb_batches, annihilation_divisor, max_val, min_val, annihlation_val = None,
+                   seq_generator = None):
+    '''
+    array version of get1CycleVals, writes the triangular and annihilation phases straight into out
+    with the generators' in place fills (Vals.fill), nothing else is allocated
+    :param out: 1D array (or view, like a field of a structured array) numb_batches + annihilation batches long,
+                or 2D, a row per configuration, then the other parameters are scalars or one per row
+    the rest as get1CycleVals
+    :return: out
+    '''
+    if annihlation_val is None:
+        annihlation_val = min_val   #default assumes LRs generated
+
+    if seq_generator is None:
+        seq_generator = TriangularVals() #default assumes LRs generated
+
+    if out.ndim > 1:
+        params = [np.broadcast_to(np.asarray(param, dtype=float).reshape(-1), len(out)).tolist()
+                  for param in (annihilation_divisor, max_val, min_val, annihlation_val)]
+        for row, (divisor, row_max, row_min, row_annihlation) in zip(out, zip(*params)):
+            fill1CycleVals(row, numb_batches, divisor, row_max, row_min, row_annihlation, seq_generator)
+        return out
+
+    seq_generator.fill(out[:numb_batches], max_val, min_val)
+    LinearDecrease().fill(out[numb_batches:], annihlation_val, annihlation_val / annihilation_divisor)
+    return out
+
+def get1Cycle_schedule(num_batches, numb_annihlation_batches, annihilation_divisor, max_lr, min_lr, max_momentum,
+                       min_momentum, dtype=np.float32):
+    '''
+    same values as get1Cycle_LR_and_Momentum, but stored in one contiguous structured array
+    with 'lr' and 'momentum' fields instead of two lists of python floats
+    :param dtype: np.float32 (half the memory) or np.float64 (identical to the lists)
+    :return: structured array, num_batches + numb_annihlation_batches long
+    '''
+    return get1Cycle_channels(num_batches, numb_annihlation_batches,
+                              [('lr', OneCycleChannel(max_lr, min_lr, annihilation_divisor)),
+                               ('momentum', momentum_channel(max_momentum, min_momentum))], dtype=dtype)
+
+class OneCycleChannel(object):
+    '''
+    one hyperparameter of a multi channel 1cycle schedule, same parameters as get1CycleVals
+    '''
+    def __init__(self, max_val, min_val, annihilation_divisor = 1, annihlation_val = None, seq_generator = None):
+        '''
+        :param annihilation_divisor: 1 (the default) keeps the value constant during annihilation
+        :param annihlation_val: where annihilation begins, defaults to min_val
+        :param seq_generator: defaults to TriangularVals, min_val up to max_val and back
+        '''
+        self.max_val = max_val
+        self.min_val = min_val
+        self.annihilation_divisor = annihilation_divisor
+        self.annihlation_val = min_val if annihlation_val is None else annihlation_val
+        self.seq_generator = TriangularVals() if seq_generator is None else seq_generator
+
+    def describe(self):
+        return (type(self.seq_generator).__name__, self.max_val, self.min_val, self.annihilation_divisor,
+                self.annihlation_val)
+
+def momentum_channel(max_momentum, min_momentum):
+    '''
+    momentum as in get1Cycle_LR_and_Momentum, max_momentum down to min_momentum and back, constant during annihilation
+    '''
+    NO_ANNIHLATION = 1
+    return OneCycleChannel(max_momentum, min_momentum, NO_ANNIHLATION, annihlation_val=max_momentum,
+                           seq_generator=ReverseTriangularVals())
+
+def get1Cycle_channels(num_batches, numb_annihlation_batches, channels, dtype=np.float32):
+    '''
+    any number of hyperparameters on 1cycle schedules (lr, momentum, weight_decay...) in one structured array
+    every channel is filled in place straight into its field (fill1CycleVals), no temporaries however long
+    :param channels: list of (name, OneCycleChannel), names are the optimizer param_group keys
+    :param dtype: of every field
+    :return: structured array num_batches + numb_annihlation_batches long, one field per channel
+    usage:
+    >>>schedule = get1Cycle_channels(1000, 100, [('lr', OneCycleChannel(1.0, 0.1, annihilation_divisor=100)),
+    >>>                                          ('momentum', momentum_channel(0.95, 0.85)),
+    >>>                                          ('weight_decay', OneCycleChannel(1e-4, 1e-5))])
+    '''
+    schedule = np.empty(num_batches + numb_annihlation_batches, dtype=[(name, dtype) for name, _ in channels])
+    for name, channel in channels:
+        fill1CycleVals(schedule[name], num_batches, channel.annihilation_divisor, channel.max_val, channel.min_val,
+                       channel.annihlation_val, channel.seq_generator)
+    return schedule
+
+def get1CycleVals_batch(numb_batches, numb_annihlation_batches, annihilation_divisors, max_vals, min_vals,
+                       annihlation_vals = None, seq_generator = None):
+    '''
+    get1CycleVals for many configurations at once, for hyperparameter sweeps
+    annihilation_divisors, max_vals, min_vals and annihlation_vals are sequences (or scalars) that broadcast together,
+    row k is get1CycleVals(numb_batches, numb_annihlation_batches, annihilation_divisors[k], max_vals[k], ...)
+    :return: 2D numpy array, (number of configs, numb_batches + numb_annihlation_batches)
+    '''
+    if annihlation_vals is None:
+        annihlation_vals = min_vals   #default assumes LRs generated
+
+    params = np.broadcast_arrays(*[np.asarray(p, dtype=float).reshape(-1, 1)
+                                   for p in (annihilation_divisors, max_vals, min_vals, annihlation_vals)])
+    annihilation_divisors, max_vals, min_vals, annihlation_vals = params
+
+    out = np.empty((len(max_vals), numb_batches + numb_annihlation_batches))
+    return fill1CycleVals(out, numb_batches, annihilation_divisors, max_vals, min_vals, annihlation_vals, seq_generator)
+
+def get1Cycle_LR_and_Momentum_batch(num_batches, numb_annihlation_batches, annihilation_divisors, max_lrs, min_lrs,
+                                    max_momentums, min_momentums):
+    '''
+    get1Cycle_LR_and_Momentum for many configurations at once, all parameters but the batch counts are
+    sequences (or scalars) that broadcast together
+    :return: lrs, momentums, each a 2D numpy array (number of configs, num_batches + numb_annihlation_batches)
+    '''
+    annihilation_divisors, max_lrs, min_lrs, max_momentums, min_momentums = np.broadcast_arrays(
+        *[np.asarray(p, dtype=float).reshape(-1, 1)
+          for p in (annihilation_divisors, max_lrs, min_lrs, max_momentums, min_momentums)])
+
+    lrs = get1CycleVals_batch(num_batches, numb_annihlation_batches, annihilation_divisors, max_lrs, min_lrs)
+
+    NO_ANNIHLATION = 1
+    momentums = get1CycleVals_batch(num_batches, numb_annihlation_batches, annihilation_divisors=NO_ANNIHLATION,
+                                    max_vals=max_momentums, min_vals=min_momentums,
+                                    annihlation_vals=max_momentums, seq_generator=ReverseTriangularVals())
+    return lrs, momentums
 
 def getCosignAnnealedLinearDecreasingLRs(numb_iterations, numb_steps_per_iteration, max_val, min_val ):
     '''
@@ -67,29 +203,23 @@ def getCosignAnnealedLinearDecreasingLRs(numb_iterations, numb_steps_per_iterati
     lrs = []
     annealer = CosignVals()
     max_vals = annealer.getVals(numb_iterations=numb_iterations, max_val=max_val, min_val=min_val)
+    # not cached_vals, every cycle has its own max_val so caching would only push reused cycles out of the cache
     for max_val in max_vals:
         lr = LinearDecrease()
         lrs += lr.getVals(numb_iterations=numb_steps_per_iteration, max_val=max_val, min_val=min_val)
     return lrs
 
-import matplotlib.pyplot as plt
 if __name__ == '__main__':
+    from visualization import plot_vals
+
     vals = getCosignAnnealedLinearDecreasingLRs(numb_iterations=200, numb_steps_per_iteration=20, max_val=1, min_val=0.1)
     vals1 = get1CycleVals(numb_batches=200, numb_annihlation_batches=20, annihilation_divisor=100, max_val=1, min_val=0.1)
 
     rt = ReverseTriangularVals()
     vals2 = rt.getVals(numb_iterations = 9, max_val=1, min_val=.1)
 
-    plt.xlabel("sample")
-    plt.ylabel("learning rate")
-    # plt.scatter(range(len(vals)), vals)
-    # plt.scatter(range(len(vals1)), vals1)
-    #
-    # plt.scatter(range(len(vals2)), vals2)
-    # plt.show()
+    # plot_vals(vals, vals1, vals2)
 
     lrs,moms = get1Cycle_LR_and_Momentum(num_batches=200, numb_annihlation_batches=20, annihilation_divisor=100, max_lr=1,
                                          min_lr=0.1, max_momentum=.99, min_momentum=.7)
-    plt.scatter(range(len(lrs)), lrs)
-    plt.scatter(range(len(moms)), moms)
-    plt.show()
+    plot_vals(lrs, moms)
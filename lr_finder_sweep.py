@@ -0,0 +1,93 @@
+'''
+runs several learning rate range tests (LearningRateFinder) at once, one per process in a local process pool,
+then merges the loss vs learning rate curves
+
+each worker gets threads_per_worker torch threads so the pool does not oversubscribe the cpu
+usage:
+>>>def range_test(config):          #module level so it pickles
+>>>    ... train with a LearningRateFinder built from config until record_loss() says stop
+>>>    return {'lrs': finder.lr_history, 'losses': finder.loss_history}
+>>>sweep = run_range_tests(range_test, [{'min_lr': 1e-5, 'max_lr': 1, 'seed': s} for s in range(4)])
+>>>sweep['lr'], sweep['mean_loss']   # merged curve
+
+see range_test() in test/test_mnist.py for a complete worker
+'''
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+#points on the merged learning rate grid
+NUMB_MERGED_POINTS = 200
+
+def _init_worker(threads_per_worker):
+    '''
+    runs once in each worker process
+    '''
+    try:
+        import torch
+    except ImportError:
+        return   # no torch, nothing to limit
+    torch.set_num_threads(threads_per_worker)
+
+def run_range_tests(range_test, configs, max_workers=None, threads_per_worker=None):
+    '''
+    :param range_test: module level function range_test(config), returns a dict with at least 'lrs' and 'losses'
+                       (smoothed losses, LearningRateFinder.loss_history), anything else is passed through
+    :param configs: list of whatever range_test takes, for example dicts of lr range, seed and batch size
+    :param max_workers: processes in the pool, defaults to cpu count // threads_per_worker
+    :param threads_per_worker: torch threads per process, defaults to cpu count // max_workers
+    :return: merged results, see merge_curves
+    '''
+    with get_pool(len(configs), max_workers, threads_per_worker) as pool:
+        results = list(pool.map(range_test, configs))
+    return merge_curves(configs, results)
+
+def get_pool(numb_tasks, max_workers=None, threads_per_worker=None):
+    '''
+    process pool sized so workers * threads per worker fits the cpu
+    :param numb_tasks: no more workers than this
+    :param max_workers: processes in the pool, defaults to cpu count // threads_per_worker
+    :param threads_per_worker: torch threads per process, defaults to cpu count // max_workers
+    :return: ProcessPoolExecutor
+    '''
+    numb_cpus = os.cpu_count() or 1
+    if max_workers is None:
+        max_workers = max(1, min(numb_tasks, numb_cpus // (threads_per_worker or 1)))
+    if threads_per_worker is None:
+        threads_per_worker = max(1, numb_cpus // max_workers)
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(threads_per_worker,))
+
+def merge_curves(configs, results, numb_points=NUMB_MERGED_POINTS):
+    '''
+    puts every curve on one log spaced learning rate grid spanning all of them
+    :return: dict with
+             'configs', 'results': as passed in
+             'lr': the common grid
+             'losses': (len(results), numb_points) array, each curve interpolated on the grid (in log lr),
+                       nan outside its range
+             'mean_loss': nanmean over the curves
+             'best_lr': grid lr with the lowest mean loss
+    '''
+    curves = [(np.asarray(r['lrs'], dtype=float), np.asarray(r['losses'], dtype=float)) for r in results]
+    if not any(len(lrs) for lrs, _ in curves):
+        raise ValueError("no range test recorded any losses")
+
+    lo = min(lrs.min() for lrs, _ in curves if len(lrs))
+    hi = max(lrs.max() for lrs, _ in curves if len(lrs))
+    grid = np.geomspace(lo, hi, numb_points)
+
+    losses = np.full((len(curves), numb_points), np.nan)
+    for row, (lrs, curve) in zip(losses, curves):
+        if len(lrs) == 0:
+            continue
+        order = np.argsort(lrs)
+        row[:] = np.interp(np.log(grid), np.log(lrs[order]), curve[order], left=np.nan, right=np.nan)
+
+    # columns only some of the curves reach are fine, columns none of them reach stay nan
+    with np.errstate(all='ignore'):
+        counts = np.sum(~np.isnan(losses), axis=0)
+        mean_loss = np.where(counts > 0, np.nansum(losses, axis=0) / np.maximum(counts, 1), np.nan)
+
+    return {'configs': configs, 'results': results, 'lr': grid, 'losses': losses, 'mean_loss': mean_loss,
+            'best_lr': float(grid[np.nanargmin(mean_loss)])}
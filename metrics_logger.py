@@ -0,0 +1,180 @@
+'''
+non blocking metrics logging for the schedulers
+
+the training thread only writes a row (step, lr, momentum, step wall time) into a preallocated numpy ring buffer,
+a background thread hands the rows to a sink in batches, so logging every step costs next to nothing in batch_step
+
+sinks are anything with write(records) and close(), records being a structured numpy array with the
+MetricsLogger.FIELDS fields.  Provided: JSONLSink, CSVSink and ScalarWriterSink (tensorboard style add_scalar)
+usage:
+>>>scheduler = OneCycle_Scheduler(optimizer, ..., writer=SummaryWriter())   # or writer='metrics.jsonl'
+>>>... train ...
+>>>scheduler.close()   # flushes whatever is left
+'''
+import csv
+import json
+import math
+import threading
+
+import numpy as np
+
+class JSONLSink(object):
+    '''
+    one json object per line
+    '''
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def write(self, records):
+        names = records.dtype.names
+        for row in records.tolist():
+            # json has no nan, missing values (momentum for lr only schedulers, first step_time) become null
+            row = [None if isinstance(v, float) and math.isnan(v) else v for v in row]
+            self.file.write(json.dumps(dict(zip(names, row))) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class CSVSink(object):
+    '''
+    csv with a header row
+    '''
+    def __init__(self, path):
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0:
+            self.writer.writerow([name for name, _ in MetricsLogger.FIELDS])
+
+    def write(self, records):
+        self.writer.writerows(records.tolist())
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ScalarWriterSink(object):
+    '''
+    adapts anything with add_scalar(tag, value, global_step), like a tensorboard SummaryWriter
+    '''
+    def __init__(self, writer, prefix=''):
+        self.writer = writer
+        self.prefix = prefix
+
+    def write(self, records):
+        for step, lr, momentum, step_time in records.tolist():
+            for tag, val in (('lr', lr), ('momentum', momentum), ('step_time', step_time)):
+                if not math.isnan(val):
+                    self.writer.add_scalar(self.prefix + tag, val, step)
+
+    def close(self):
+        if hasattr(self.writer, 'flush'):
+            self.writer.flush()
+
+class MetricsLogger(object):
+    '''
+    ring buffer plus background flush thread, one producer (the scheduler) only
+    if the sink falls capacity records behind, new records are dropped (and counted) rather than block training
+    an exception from the sink in the background thread is kept and raised from the next record, flush or close,
+    the records it failed to write stay in the buffer and are written again on the next flush
+    '''
+    FIELDS = [('step', np.int64), ('lr', np.float64), ('momentum', np.float64), ('step_time', np.float64)]
+
+    def __init__(self, sink, capacity=8192, flush_interval=1.0):
+        '''
+        :param sink: where records go, see module docstring
+        :param capacity: rows in the ring buffer
+        :param flush_interval: seconds, the background thread flushes at least this often
+                               (and sooner once the buffer is half full)
+        '''
+        self.sink = sink
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.buffer = np.zeros(capacity, dtype=MetricsLogger.FIELDS)
+        self.head = 0      # records written, only the producer changes it
+        self.tail = 0      # records handed to the sink, only _drain changes it
+        self.dropped = 0
+        self._error = None   # raised by the sink in the background thread, not yet reported
+
+        self._flush_at = max(1, capacity // 2)
+        self._drain_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='MetricsLogger', daemon=True)
+        self._thread.start()
+
+    def record(self, step, lr, momentum=float('nan'), step_time=float('nan')):
+        '''
+        called on the training thread, never blocks
+        '''
+        if self._error is not None:
+            self._raise_error()
+        if self.head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+        self.buffer[self.head % self.capacity] = (step, lr, momentum, step_time)
+        self.head += 1
+        if self.head - self.tail >= self._flush_at:
+            self._wake.set()
+
+    def _drain(self):
+        with self._drain_lock:
+            head = self.head
+            if head == self.tail:
+                return
+            records = self.buffer[np.arange(self.tail, head) % self.capacity]   # copy
+            self.sink.write(records)
+            self.tail = head   # only once written, the slots are reused from now on
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._drain()
+            except Exception as e:
+                self._error = e   # for the training thread, the next drain tries these records again
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        '''
+        hands everything recorded so far to the sink, on the calling thread
+        '''
+        self._raise_error()
+        self._drain()
+
+    def close(self):
+        '''
+        stops the background thread, flushes and closes the sink
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        try:
+            self._drain()
+        finally:
+            self.sink.close()
+        self._raise_error()
+
+def make_logger(writer):
+    '''
+    turns the schedulers' writer argument into a MetricsLogger
+    :param writer: None, a MetricsLogger, a path (.csv for csv, anything else jsonl),
+                   an object with add_scalar (tensorboard SummaryWriter) or a sink (write and close)
+    :return: MetricsLogger or None
+    '''
+    if writer is None or isinstance(writer, MetricsLogger):
+        return writer
+    if isinstance(writer, str):
+        return MetricsLogger(CSVSink(writer) if writer.endswith('.csv') else JSONLSink(writer))
+    if hasattr(writer, 'add_scalar'):
+        return MetricsLogger(ScalarWriterSink(writer))
+    if hasattr(writer, 'write') and hasattr(writer, 'close'):
+        return MetricsLogger(writer)
+    raise TypeError("writer must be a path, a MetricsLogger, a sink or have add_scalar, got {}".format(type(writer)))
@@ -0,0 +1,447 @@
+import bisect
+import sys
+import numpy as np
+parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
+if __name__ == '__main__' or parent_module.__name__ == '__main__':
+    from sequence_generators import ReverseTriangularVals, TriangularVals
+else:
+    from .sequence_generators import ReverseTriangularVals, TriangularVals
+
+'''
+Schedulers for a whole population of models trained in one process, ensembles or population based training (PBT)
+
+Instead of one scheduler per member, every member's schedule parameters (max_lr, cycle lengths...) and position
+are numpy arrays, one entry per member, and batch_step evaluates the closed form schedules (Vals.values_at)
+for all members in one vectorized pass (small populations loop over plain python floats instead, there numpy's
+per call overhead costs more than the math).  Only values that changed are written into the members' param_groups.
+Because nothing is pregenerated PBT moves are O(1): exploit() copies one member's schedule parameters and
+position to another, perturb() scales a parameter, the next batch_step just looks the new values up.
+usage:
+>>>population = OneCyclePopulation(optimizers, num_batches=1000, numb_annihlation_batches=100,
+>>>                                annihilation_divisor=100, max_lr=[0.5, 1.0, 2.0, 4.0], min_lr=0.1,
+>>>                                max_momentum=0.95, min_momentum=0.85)
+>>>for batch in loader:
+>>>    ... every member trains on batch ...
+>>>    population.batch_step()
+>>>    if time_to_exploit:
+>>>        population.exploit(dst=worst, src=best)     # copy the weights yourself, see training_snapshot
+>>>        population.perturb(worst, 'max_lr', np.random.choice([0.8, 1.2]))
+
+every param_group of a member gets the member's values, members that finish keep their last values
+'''
+
+class _LinearPieces(object):
+    '''
+    schedules made of linspace pieces, one row per member and channel ('lr', 'momentum'), piece p of a member's
+    channel runs np.linspace(starts[p], stops[p], lengths[p]), reversed where descending, computed the way numpy
+    does so the values match the list schedules bit for bit.
+    Every member's current piece is cached, so a step within the pieces is a handful of numpy ops for the whole
+    population, and they are looked up again only when a member crosses into another piece
+    '''
+    def __init__(self, lengths, starts, stops, descending):
+        '''
+        :param lengths: (members, pieces) ints, shared by every channel
+        :param starts: (channels, members, pieces)
+        :param stops: "
+        :param descending: broadcasts against starts
+        '''
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.ends = np.cumsum(self.lengths, axis=1)
+        self.begins = self.ends - self.lengths
+        self.starts, self.stops = np.broadcast_arrays(np.asarray(starts, dtype=float), np.asarray(stops, dtype=float))
+        self.slopes = (self.stops - self.starts) / np.maximum(self.lengths - 1, 1)
+        self.descending = np.broadcast_to(descending, self.starts.shape)
+        self._members = np.arange(len(self.lengths))
+        self._piece_begins = self._piece_ends = None
+        self._member_pieces = None
+
+    def _find_pieces(self, batch_idx):
+        pieces = np.minimum(np.sum(self.ends <= batch_idx[:, None], axis=1), self.lengths.shape[1] - 1)
+        idx = (self._members, pieces)
+        begins, lengths = self.begins[idx], self.lengths[idx]
+        self._piece_begins, self._piece_ends = begins, self.ends[idx]
+        idx = (slice(None),) + idx
+        descending = self.descending[idx]
+        # position within the piece is sign * batch_idx + offset
+        self._signs = np.where(descending, -1, 1)
+        self._offsets = np.where(descending, begins + lengths - 1, -begins)
+        self._lasts = np.where(lengths > 1, lengths - 1, -1)   # the last of a piece is stop exactly, as linspace
+        self._piece_starts, self._piece_stops, self._piece_slopes = self.starts[idx], self.stops[idx], self.slopes[idx]
+
+    def values_at(self, batch_idx):
+        '''
+        :return: (channels, members) array
+        '''
+        if self._piece_begins is None or ((batch_idx < self._piece_begins) | (batch_idx >= self._piece_ends)).any():
+            self._find_pieces(batch_idx)
+        i = self._signs * batch_idx + self._offsets
+        return np.where(i == self._lasts, self._piece_stops, i * self._piece_slopes + self._piece_starts)
+
+    def _get_member_pieces(self):
+        '''
+        per member, its piece ends and for each piece (last, ((sign, offset, start, slope, stop) per channel)),
+        python ints and floats, the same arithmetic as _find_pieces
+        '''
+        ends, lengths = self.ends.tolist(), self.lengths.tolist()
+        # (channels, members, pieces) lists
+        descending, starts, slopes, stops = (self.descending.tolist(), self.starts.tolist(), self.slopes.tolist(),
+                                             self.stops.tolist())
+        member_pieces = []
+        for member, member_ends in enumerate(ends):
+            pieces = []
+            for piece, (end, length) in enumerate(zip(member_ends, lengths[member])):
+                begin = end - length
+                channels = []
+                for channel in range(len(starts)):
+                    sign, offset = (-1, begin + length - 1) if descending[channel][member][piece] else (1, -begin)
+                    channels.append((sign, offset, starts[channel][member][piece], slopes[channel][member][piece],
+                                     stops[channel][member][piece]))
+                pieces.append((length - 1 if length > 1 else -1, channels))
+            member_pieces.append((member_ends, pieces))
+        return member_pieces
+
+    def member_values(self, batch_idx):
+        '''
+        values_at for a python list of batch indices, one member at a time in plain python
+        :return: list, for each member a tuple of one value per channel, equal to values_at
+        '''
+        if self._member_pieces is None:
+            self._member_pieces = self._get_member_pieces()
+        vals = []
+        for idx, (ends, pieces) in zip(batch_idx, self._member_pieces):
+            last, channels = pieces[min(bisect.bisect_right(ends, idx), len(pieces) - 1)]
+            member_vals = []
+            for sign, offset, start, slope, stop in channels:
+                i = sign * idx + offset
+                member_vals.append(stop if i == last else i * slope + start)
+            vals.append(tuple(member_vals))
+        return vals
+
+class PopulationScheduler(object):
+    '''
+    base class, subclasses list their per member arrays in MEMBER_ARRAYS and their param_group keys in KEYS,
+    and implement _values and numb_steps
+    '''
+    #names of the attributes holding one entry (or row) per member, what exploit copies
+    MEMBER_ARRAYS = ('batch_idx',)
+    #param_group keys scheduled
+    KEYS = ('lr',)
+    #smaller populations are stepped in a python loop over plain floats (_member_values), larger ones vectorized,
+    #see benchmarks/bench_population.py for the crossover
+    VECTORIZE_MIN_MEMBERS = 16
+
+    def __init__(self, optimizers):
+        '''
+        :param optimizers: one per member
+        '''
+        self.optimizers = list(optimizers)
+        self.numb_members = len(self.optimizers)
+        self.batch_idx = np.zeros(self.numb_members, dtype=np.int64)   #index of each member's next batch
+        self.currentLR = None
+        self._last_vals = np.full((len(self.KEYS), self.numb_members), np.nan)   #last written, nan if not yet
+        self._last_member_vals = [None] * self.numb_members   #the same as tuples for the python loop, None if not yet
+        self._numb_steps = None   #numb_steps as an array and a list, until parameters change
+
+    def _member_param(self, val, dtype=float):
+        '''
+        :param val: scalar (same for every member) or one per member
+        :return: numpy array, one entry per member, owning its memory
+        '''
+        return np.array(np.broadcast_to(np.asarray(val, dtype=dtype), (self.numb_members,)))
+
+    @property
+    def numb_steps(self):
+        '''
+        :return: array, batches in each member's schedule
+        '''
+        raise NotImplementedError
+
+    def _values(self, batch_idx):
+        '''
+        :param batch_idx: array, one batch index per member, each in range for its member
+        :return: (len(KEYS), members) array
+        '''
+        raise NotImplementedError
+
+    def _member_values(self, batch_idx):
+        '''
+        _values for a python list of batch indices, for the python loop in batch_step
+        :return: list, for each member a tuple of len(KEYS) floats
+        '''
+        return list(zip(*self._values(np.array(batch_idx, dtype=np.int64)).tolist()))
+
+    def _get_numb_steps(self):
+        '''
+        :return: numb_steps as an array and as a list, cached until the parameters change
+        '''
+        if self._numb_steps is None:
+            numb_steps = self.numb_steps
+            self._numb_steps = numb_steps, numb_steps.tolist()
+        return self._numb_steps
+
+    def values_at(self, batch_idx):
+        '''
+        every member's values at its batch_idx, without touching the optimizers or the positions
+        :return: dict of param_group key: array of one value per member
+        '''
+        return dict(zip(self.KEYS, self._values(np.asarray(batch_idx, dtype=np.int64))))
+
+    @property
+    def done(self):
+        '''
+        :return: bool array, which members have used up their schedule
+        '''
+        return self.batch_idx >= self.numb_steps
+
+    def batch_step(self):
+        '''
+        applies every unfinished member's values for its current batch and moves it on
+        (finished members only get their last values again after exploit, perturb or a state load)
+        raises StopIteration once every member is done
+        '''
+        if self.numb_members < self.VECTORIZE_MIN_MEMBERS:
+            self._loop_step()
+            return
+        numb_steps, _ = self._get_numb_steps()
+        active = self.batch_idx < numb_steps
+        if not active.any():
+            raise StopIteration
+        vals = self._values(np.minimum(self.batch_idx, numb_steps - 1))
+        self._apply(vals, active | (numb_steps > 0) & np.isnan(self._last_vals[0]))
+        self.currentLR = vals[0]
+        self.batch_idx += active
+
+    def _loop_step(self):
+        '''
+        batch_step one member at a time, on python lists and floats
+        '''
+        _, numb_steps = self._get_numb_steps()
+        batch_idx, active = [], []
+        for idx, steps in zip(self.batch_idx.tolist(), numb_steps):
+            batch_idx.append(min(idx, steps - 1))
+            active.append(idx < steps)
+        if not any(active):
+            raise StopIteration
+        last_vals = self._last_member_vals
+        currentLR = []
+        for member, member_vals in enumerate(self._member_values(batch_idx)):
+            currentLR.append(member_vals[0])
+            if member_vals != last_vals[member] and \
+                    (active[member] or last_vals[member] is None and numb_steps[member] > 0):
+                for param_group in self.optimizers[member].param_groups:
+                    for key, val in zip(self.KEYS, member_vals):
+                        param_group[key] = val
+                last_vals[member] = member_vals
+        self.currentLR = np.array(currentLR)
+        self.batch_idx += 1 if all(active) else active
+
+    def get_currentLR(self):
+        return self.currentLR
+
+    def _apply(self, vals, members):
+        '''
+        writes the values of each of members (a bool array) with any changed value into all its param_groups,
+        one pass over those members whatever the number of keys
+        '''
+        changed = members & (vals != self._last_vals).any(axis=0)
+        members = changed.nonzero()[0].tolist()
+        if not members:
+            return
+        vals_list = vals.T.tolist()
+        for member in members:
+            member_vals = tuple(zip(self.KEYS, vals_list[member]))
+            for param_group in self.optimizers[member].param_groups:
+                param_group.update(member_vals)
+        np.copyto(self._last_vals, vals, where=changed)
+
+    def _forget(self, member):
+        '''
+        the next batch_step rewrites every value of member, after its parameters changed
+        '''
+        self._last_vals[:, member] = np.nan
+        self._last_member_vals[member] = None
+        self._numb_steps = None
+
+    #population based training
+    def exploit(self, dst, src):
+        '''
+        member dst takes over member src's schedule parameters and position, O(1)
+        '''
+        for name in self.MEMBER_ARRAYS:
+            array = getattr(self, name)
+            array[dst] = array[src]
+        self._forget(dst)
+
+    def perturb(self, member, name, factor):
+        '''
+        explore, multiplies one of member's float schedule parameters (a MEMBER_ARRAYS name, 'max_lr' say) by factor
+        integer ones (positions, lengths) would be truncated, they raise ValueError like unknown names
+        '''
+        perturbable = [key for key in self.MEMBER_ARRAYS if np.issubdtype(getattr(self, key).dtype, np.floating)]
+        if name not in perturbable:
+            raise ValueError("can perturb {}, not {}".format(perturbable, name))
+        getattr(self, name)[member] *= factor
+        self._forget(member)
+
+    def member_state(self, member):
+        '''
+        :return: dict of member's schedule parameters and position, python types
+        '''
+        return {name: getattr(self, name)[member].tolist() for name in self.MEMBER_ARRAYS}
+
+    def load_member_state(self, member, state):
+        for name in self.MEMBER_ARRAYS:
+            getattr(self, name)[member] = state[name]
+        self._forget(member)
+
+    def state_dict(self):
+        '''
+        for checkpointing, every member's parameters and position
+        '''
+        return {'scheduler': type(self).__name__,
+                'members': {name: getattr(self, name).tolist() for name in self.MEMBER_ARRAYS}}
+
+    def load_state_dict(self, state_dict):
+        if state_dict['scheduler'] != type(self).__name__:
+            raise ValueError("state is for {}, not {}".format(state_dict['scheduler'], type(self).__name__))
+        for name in self.MEMBER_ARRAYS:
+            array = getattr(self, name)
+            array[...] = np.asarray(state_dict['members'][name], dtype=array.dtype)
+        for member in range(self.numb_members):
+            self._forget(member)
+
+class OneCyclePopulation(PopulationScheduler):
+    '''
+    a OneCycle_Scheduler per member, every parameter a scalar or one per member
+    '''
+    MEMBER_ARRAYS = ('batch_idx', 'num_batches', 'numb_annihlation_batches', 'annihilation_divisor', 'max_lr',
+                     'min_lr', 'max_momentum', 'min_momentum')
+    KEYS = ('lr', 'momentum')
+
+    def __init__(self, optimizers, *, min_lr, max_lr, num_batches, numb_annihlation_batches, annihilation_divisor,
+                 max_momentum, min_momentum):
+        '''
+        same parameters as OneCycle_Scheduler
+        '''
+        super().__init__(optimizers)
+        self.num_batches = self._member_param(num_batches, np.int64)
+        self.numb_annihlation_batches = self._member_param(numb_annihlation_batches, np.int64)
+        self.annihilation_divisor = self._member_param(annihilation_divisor)
+        self.max_lr = self._member_param(max_lr)
+        self.min_lr = self._member_param(min_lr)
+        self.max_momentum = self._member_param(max_momentum)
+        self.min_momentum = self._member_param(min_momentum)
+
+        self._pieces = None
+
+    def _forget(self, member):
+        super()._forget(member)
+        self._pieces = None
+
+    @property
+    def numb_steps(self):
+        return self.num_batches + self.numb_annihlation_batches
+
+    def _get_pieces(self):
+        '''
+        the schedules as linspace pieces (as TriangularVals, ReverseTriangularVals and LinearDecrease build them),
+        rebuilt only when parameters change
+        '''
+        first_len = (self.num_batches + 1) // 2
+        lengths = np.stack([first_len, self.num_batches // 2, self.numb_annihlation_batches], axis=1)
+        last_rising = np.maximum(first_len - 2, 0)   # the second half turns one step short of the peak
+        peaks = TriangularVals().values_at(last_rising, self.num_batches, self.max_lr, self.min_lr)
+        troughs = ReverseTriangularVals().values_at(last_rising, self.num_batches, self.max_momentum,
+                                                    self.min_momentum)
+        # lr rises, falls and is annihilated, momentum falls, rises and stays at max_momentum
+        starts = [np.stack([self.min_lr, self.min_lr, self.min_lr / self.annihilation_divisor], axis=1),
+                  np.stack([self.min_momentum, troughs, self.max_momentum], axis=1)]
+        stops = [np.stack([self.max_lr, peaks, self.min_lr], axis=1),
+                 np.stack([self.max_momentum, self.max_momentum, self.max_momentum], axis=1)]
+        descending = np.array([[False, True, True], [True, False, True]])[:, None, :]
+        return _LinearPieces(lengths, starts, stops, descending)
+
+    def _values(self, batch_idx):
+        if self._pieces is None:
+            self._pieces = self._get_pieces()
+        return self._pieces.values_at(batch_idx)
+
+    def _member_values(self, batch_idx):
+        if self._pieces is None:
+            self._pieces = self._get_pieces()
+        return self._pieces.member_values(batch_idx)
+
+class CyclicPopulation(PopulationScheduler):
+    '''
+    a CyclicLR_Scheduler per member (without plateau detection), each member can have its own step_size list,
+    cycles are kept as rows padded to the longest list
+    '''
+    MEMBER_ARRAYS = ('batch_idx', 'max_lr', 'min_lr', 'cycle_lengths', 'cycle_ends', 'numb_cycles')
+
+    def __init__(self, optimizers, *, min_lr, max_lr, numb_images_in_dataset, LR, LR_anneal=None, batch_size=64,
+                 step_size=[2]):
+        '''
+        :param LR: generator for a cycle, shared by every member
+        :param LR_anneal: optional generator annealing max_lr cycle to cycle, shared
+        :param step_size: list as in CyclicLR_Scheduler, or a list of them, one per member
+        the rest as CyclicLR_Scheduler, scalars or one per member
+        '''
+        super().__init__(optimizers)
+        self.LR = LR
+        self.LR_anneal = LR_anneal
+        self.max_lr = self._member_param(max_lr)
+        self.min_lr = self._member_param(min_lr)
+
+        step_sizes = step_size if len(step_size) and np.ndim(step_size[0]) else [step_size] * self.numb_members
+        if len(step_sizes) != self.numb_members:
+            raise ValueError("got {} step_size lists for {} members".format(len(step_sizes), self.numb_members))
+        numb_batches_per_epoch = self._member_param(numb_images_in_dataset, np.int64) // \
+            self._member_param(batch_size, np.int64)
+
+        self.numb_cycles = np.array([len(steps) for steps in step_sizes], dtype=np.int64)
+        # padding never ends, so searching past a member's last cycle lands on numb_cycles
+        self.cycle_lengths = np.zeros((self.numb_members, max(self.numb_cycles, default=0) + 1), dtype=np.int64)
+        self.cycle_ends = np.full(self.cycle_lengths.shape, np.iinfo(np.int64).max)
+        for member, steps in enumerate(step_sizes):
+            lengths = [2 * step * numb_batches_per_epoch[member] for step in steps]   # as CyclicLR_Scheduler
+            self.cycle_lengths[member, :len(lengths)] = lengths
+            self.cycle_ends[member, :len(lengths)] = np.cumsum(lengths)
+        self._member_cycles = None   #the cycle arrays as lists for _member_values, until parameters change
+
+    def _forget(self, member):
+        super()._forget(member)
+        self._member_cycles = None
+
+    @property
+    def numb_steps(self):
+        return np.where(self.numb_cycles > 0,
+                        self.cycle_ends[np.arange(self.numb_members), np.maximum(self.numb_cycles - 1, 0)], 0)
+
+    def _values(self, batch_idx):
+        cycles = np.sum(self.cycle_ends <= batch_idx[:, None], axis=1)
+        members = np.arange(self.numb_members)
+        cycle_starts = np.where(cycles > 0, self.cycle_ends[members, np.maximum(cycles - 1, 0)], 0)
+        max_lrs = self.max_lr
+        if self.LR_anneal is not None:
+            max_lrs = self.LR_anneal.values_at(cycles, self.numb_cycles, self.max_lr, self.min_lr)
+        return self.LR.values_at(batch_idx - cycle_starts, self.cycle_lengths[members, cycles], max_lrs,
+                                 self.min_lr)[None]
+
+    def _member_values(self, batch_idx):
+        '''
+        the scalar version of _values, with Vals.value_at like CyclicLR_Scheduler
+        '''
+        if self._member_cycles is None:
+            self._member_cycles = list(zip(self.cycle_ends.tolist(), self.cycle_lengths.tolist(),
+                                           self.numb_cycles.tolist(), self.max_lr.tolist(), self.min_lr.tolist()))
+        vals = []
+        for idx, (cycle_ends, cycle_lengths, numb_cycles, max_lr, min_lr) in zip(batch_idx, self._member_cycles):
+            if not numb_cycles:
+                vals.append((np.nan,))
+                continue
+            cycle = bisect.bisect_right(cycle_ends, idx)
+            cycle_start = cycle_ends[cycle - 1] if cycle > 0 else 0
+            if self.LR_anneal is not None:
+                max_lr = self.LR_anneal.value_at(cycle, numb_cycles, max_lr, min_lr)
+            vals.append((self.LR.value_at(idx - cycle_start, cycle_lengths[cycle], max_lr, min_lr),))
+        return vals
@@ -0,0 +1,175 @@
+import sys
+import bisect
+import numpy as np
+parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
+if __name__ == '__main__' or parent_module.__name__ == '__main__':
+    from sequence_generators import CosignVals, LinearDecrease, LinearIncreaseVals, ReverseTriangularVals, \
+        TriangularVals
+else:
+    from .sequence_generators import CosignVals, LinearDecrease, LinearIncreaseVals, ReverseTriangularVals, \
+        TriangularVals
+
+'''
+Declarative multi phase schedules
+
+A schedule is a list of segments, each one a Vals generator run for a number of steps between max_val and min_val.
+compile() keeps only the segment table (where each segment starts plus its parameters), a value is looked up by
+binary search over the segment starts and Vals.value_at within the segment.
+So any schedule costs O(segments) memory and O(log segments) per lookup, however many steps it runs for.
+usage:
+>>>schedule = ScheduleBuilder().warmup(500, 0.01, 1.0).cosine(10000, 1.0, 0.01).constant(1000, 0.01).compile()
+>>>lr = schedule.value_at(step)
+>>>lrs = schedule.values_at(np.arange(len(schedule)))
+'''
+
+class Segment(object):
+    def __init__(self, seq_generator, numb_iterations, max_val, min_val):
+        '''
+        :param seq_generator: a Vals instance
+        :param numb_iterations: length of the segment
+        :param max_val: passed to seq_generator
+        :param min_val: "
+        '''
+        self.seq_generator = seq_generator
+        self.numb_iterations = numb_iterations
+        self.max_val = max_val
+        self.min_val = min_val
+
+    def describe(self):
+        '''
+        :return: plain tuple, for comparing and saving schedules
+        '''
+        return type(self.seq_generator).__name__, self.numb_iterations, self.max_val, self.min_val
+
+class ScheduleBuilder(object):
+    '''
+    collects segments in order, every method returns the builder so calls chain
+    '''
+    def __init__(self):
+        self.segments = []
+
+    def add(self, seq_generator, numb_iterations, max_val, min_val):
+        '''
+        any Vals generator
+        '''
+        self.segments.append(Segment(seq_generator, numb_iterations, max_val, min_val))
+        return self
+
+    def linear(self, numb_iterations, start_val, end_val):
+        '''
+        straight line from start_val to end_val, either direction
+        '''
+        if end_val >= start_val:
+            return self.add(LinearIncreaseVals(), numb_iterations, max_val=end_val, min_val=start_val)
+        return self.add(LinearDecrease(), numb_iterations, max_val=start_val, min_val=end_val)
+
+    def warmup(self, numb_iterations, start_val, end_val):
+        return self.linear(numb_iterations, start_val, end_val)
+
+    def constant(self, numb_iterations, val):
+        return self.add(LinearIncreaseVals(), numb_iterations, max_val=val, min_val=val)
+
+    def triangle(self, numb_iterations, max_val, min_val):
+        '''
+        min_val up to max_val and back, like TriangularVals
+        '''
+        return self.add(TriangularVals(), numb_iterations, max_val, min_val)
+
+    def reverse_triangle(self, numb_iterations, max_val, min_val):
+        '''
+        max_val down to min_val and back, like ReverseTriangularVals (momentum)
+        '''
+        return self.add(ReverseTriangularVals(), numb_iterations, max_val, min_val)
+
+    def cosine(self, numb_iterations, max_val, min_val):
+        '''
+        cosign from max_val down to min_val
+        '''
+        return self.add(CosignVals(), numb_iterations, max_val, min_val)
+
+    def compile(self):
+        return CompiledSchedule(self.segments)
+
+class CompiledSchedule(object):
+    '''
+    segment table with binary search lookup, see the module docstring
+    '''
+    def __init__(self, segments):
+        self.segments = list(segments)
+        lengths = [segment.numb_iterations for segment in self.segments]
+        self.starts = np.zeros(len(lengths), dtype=np.int64)   #step each segment starts at
+        self.starts[1:] = np.cumsum(lengths[:-1])
+        self._starts = self.starts.tolist()   #python ints for bisect, faster than searching the array per step
+        self.numb_iterations = int(sum(lengths))
+
+    def __len__(self):
+        return self.numb_iterations
+
+    def describe(self):
+        '''
+        :return: list of (generator name, numb_iterations, max_val, min_val), one per segment
+        '''
+        return [segment.describe() for segment in self.segments]
+
+    def _segment_of(self, step):
+        if not 0 <= step < self.numb_iterations:
+            raise IndexError("step {} out of range for a schedule {} long".format(step, self.numb_iterations))
+        # the last segment starting at or before step, skips any empty segments starting at the same place
+        return bisect.bisect_right(self._starts, step) - 1
+
+    def value_at(self, step):
+        '''
+        :return: float, value of the schedule at step
+        '''
+        idx = self._segment_of(step)
+        segment = self.segments[idx]
+        return segment.seq_generator.value_at(step - self._starts[idx], segment.numb_iterations,
+                                              segment.max_val, segment.min_val)
+
+    def values_at(self, steps):
+        '''
+        vectorized value_at, one numpy pass per segment that steps falls into
+        :param steps: anything np.asarray accepts, every step in range
+        :return: numpy array, same shape as steps
+        '''
+        steps = np.asarray(steps)
+        if steps.size and (steps.min() < 0 or steps.max() >= self.numb_iterations):
+            raise IndexError("steps out of range for a schedule {} long".format(self.numb_iterations))
+
+        idxs = np.searchsorted(self.starts, steps, side='right') - 1
+        vals = np.empty(steps.shape)
+        for idx in np.unique(idxs):
+            segment = self.segments[idx]
+            mask = idxs == idx
+            vals[mask] = segment.seq_generator.values_at(steps[mask] - self.starts[idx], segment.numb_iterations,
+                                                         segment.max_val, segment.min_val)
+        return vals
+
+    def getVals(self):
+        '''
+        :return: the whole schedule as a list, like the other generators
+        '''
+        return self.values_at(np.arange(self.numb_iterations)).tolist()
+
+def compile1Cycle(numb_batches, numb_annihlation_batches, annihilation_divisor, max_val, min_val,
+                  annihlation_val = None, seq_generator = None):
+    '''
+    same schedule as learning_rate_generators.get1CycleVals, as 2 segments
+    '''
+    if annihlation_val is None:
+        annihlation_val = min_val   #default assumes LRs generated
+
+    if seq_generator is None:
+        seq_generator = TriangularVals() #default assumes LRs generated
+    builder = ScheduleBuilder().add(seq_generator, numb_batches, max_val, min_val)
+    builder.add(LinearDecrease(), numb_annihlation_batches, annihlation_val, annihlation_val / annihilation_divisor)
+    return builder.compile()
+
+def compileCosignAnnealedLinearDecreasing(numb_iterations, numb_steps_per_iteration, max_val, min_val):
+    '''
+    same schedule as learning_rate_generators.getCosignAnnealedLinearDecreasingLRs, one segment per cycle
+    '''
+    builder = ScheduleBuilder()
+    for cycle_max in CosignVals().getVals(numb_iterations=numb_iterations, max_val=max_val, min_val=min_val):
+        builder.add(LinearDecrease(), numb_steps_per_iteration, float(cycle_max), min_val)
+    return builder.compile()
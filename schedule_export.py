@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
+if __name__ == '__main__' or parent_module.__name__ == '__main__':
+    import sequence_generators
+    from cyclic_LR_scheduler import CyclicLR_Scheduler, LearningRateFinder, OneCycle_Scheduler, Piecewise_Scheduler
+    from schedule_compiler import ScheduleBuilder
+    from visualization import plot_minmax
+else:
+    from . import sequence_generators
+    from .cyclic_LR_scheduler import CyclicLR_Scheduler, LearningRateFinder, OneCycle_Scheduler, Piecewise_Scheduler
+    from .schedule_compiler import ScheduleBuilder
+    from .visualization import plot_minmax
+
+'''
+Headless export and preview of schedules of any length
+
+Builds a scheduler from a json config, then walks its schedule a chunk at a time (Cyclic_Scheduler.values_between),
+streaming it to a .npy file (structured array, one field per param_group key) and/or csv,
+and reducing it to the min and max of every pixel column for a plot rendered with the Agg backend.
+So only a chunk is ever in memory on top of what the scheduler itself holds, a 50M step schedule previews in seconds.
+usage, from the repo root:
+python schedule_export.py '{"scheduler": "OneCycle_Scheduler", "scheduler_args": {"num_batches": 45000000,
+    "numb_annihlation_batches": 5000000, "annihilation_divisor": 100, "max_lr": 1.0, "min_lr": 0.1,
+    "max_momentum": 0.95, "min_momentum": 0.85, "dtype": "float32"}}' --png 1cycle.png --npy 1cycle.npy
+
+the config is json or a path to a .json file, scheduler_args are the constructor arguments with
+generators by class name ("LR": "TriangularVals") and Piecewise_Scheduler schedules as lists of segments
+(CompiledSchedule.describe(), [["LinearIncreaseVals", 500, 1.0, 0.01], ["CosignVals", 10000, 1.0, 0.01]])
+csv is there for other tools, at millions of steps it is far slower and bigger than .npy
+'''
+
+SCHEDULERS = {cls.__name__: cls for cls in (OneCycle_Scheduler, LearningRateFinder, CyclicLR_Scheduler,
+                                            Piecewise_Scheduler)}
+
+#steps per chunk
+CHUNK_SIZE = 1 << 20
+
+def _generator(name):
+    seq_generator = getattr(sequence_generators, name, None)
+    if not (isinstance(seq_generator, type) and issubclass(seq_generator, sequence_generators.Vals)):
+        raise ValueError("unknown sequence generator {}".format(name))
+    return seq_generator()
+
+def _compiled_schedule(segments):
+    builder = ScheduleBuilder()
+    for name, numb_iterations, max_val, min_val in segments:
+        builder.add(_generator(name), numb_iterations, max_val, min_val)
+    return builder.compile()
+
+def scheduler_from_config(config):
+    '''
+    :param config: dict with 'scheduler', a SCHEDULERS name, and 'scheduler_args', json friendly constructor
+                   arguments (see the module docstring), or a json string or path to a .json file of one
+    :return: scheduler without an optimizer, for values_between and numb_steps only
+    '''
+    if isinstance(config, str):
+        if os.path.exists(config):
+            with open(config) as f:
+                config = json.load(f)
+        else:
+            config = json.loads(config)
+    if config['scheduler'] not in SCHEDULERS:
+        raise ValueError("scheduler must be one of {}, got {}".format(sorted(SCHEDULERS), config['scheduler']))
+
+    kwargs = dict(config.get('scheduler_args', {}))
+    for key in ('LR', 'LR_anneal'):
+        if isinstance(kwargs.get(key), str):
+            kwargs[key] = _generator(kwargs[key])
+    for key in ('lr_schedule', 'momentum_schedule'):
+        if kwargs.get(key) is not None:
+            kwargs[key] = _compiled_schedule(kwargs[key])
+    if config['scheduler'] == 'OneCycle_Scheduler':
+        # lists of python floats are no good at millions of steps
+        kwargs['dtype'] = np.dtype(kwargs.get('dtype') or np.float64)
+    return SCHEDULERS[config['scheduler']](None, **kwargs)
+
+def iter_chunks(scheduler, chunk_size=CHUNK_SIZE):
+    '''
+    :return: generator of (first step, dict of key: numpy array) covering the whole schedule in order
+    '''
+    numb_steps = scheduler.numb_steps
+    for start in range(0, numb_steps, chunk_size):
+        yield start, scheduler.values_between(start, min(start + chunk_size, numb_steps))
+
+class MinMaxDecimator(object):
+    '''
+    streaming min/max decimation, steps are split into numb_bins equal bins (pixel columns) and only the
+    smallest and largest value of every bin is kept, so nothing a plot at that resolution could show is lost
+    '''
+    def __init__(self, numb_steps, numb_bins):
+        '''
+        :param numb_bins: at most numb_steps are used, every bin gets at least one step
+        '''
+        self.numb_steps = numb_steps
+        self.numb_bins = max(1, min(numb_bins, numb_steps))
+        self.mins = {}
+        self.maxs = {}
+
+    def _bin_start(self, idx):
+        '''
+        first step of bin idx (or of bins idx, an array)
+        '''
+        return -(-idx * self.numb_steps // self.numb_bins)
+
+    @property
+    def steps(self):
+        '''
+        :return: middle step of every bin, the x values to plot against
+        '''
+        starts = self._bin_start(np.arange(self.numb_bins + 1, dtype=np.int64))
+        return (starts[:-1] + starts[1:] - 1) / 2
+
+    def add(self, start, vals):
+        '''
+        :param start: step of the first value
+        :param vals: dict of key: 1D array, consecutive steps from start
+        '''
+        for key, val in vals.items():
+            if len(val) == 0:
+                continue
+            if key not in self.mins:
+                self.mins[key] = np.full(self.numb_bins, np.inf)
+                self.maxs[key] = np.full(self.numb_bins, -np.inf)
+            first = start * self.numb_bins // self.numb_steps
+            last = (start + len(val) - 1) * self.numb_bins // self.numb_steps
+            offsets = self._bin_start(np.arange(first + 1, last + 1, dtype=np.int64)) - start
+            offsets = np.concatenate(([0], offsets))
+            mins, maxs = self.mins[key][first:last + 1], self.maxs[key][first:last + 1]   # views
+            np.fmin(mins, np.minimum.reduceat(val, offsets), out=mins)
+            np.fmax(maxs, np.maximum.reduceat(val, offsets), out=maxs)
+
+class _NpyWriter(object):
+    def __init__(self, path, numb_steps, keys, dtype):
+        self.array = np.lib.format.open_memmap(path, mode='w+', dtype=[(key, dtype) for key in keys],
+                                               shape=(numb_steps,))
+
+    def add(self, start, vals):
+        for key, val in vals.items():
+            self.array[key][start:start + len(val)] = val
+
+    def close(self):
+        self.array.flush()
+        self.array = None   # unmaps
+
+class _CsvWriter(object):
+    def __init__(self, path, keys):
+        self.file = open(path, 'w')
+        self.file.write(','.join(['step'] + list(keys)) + '\n')
+        self.keys = list(keys)
+
+    def add(self, start, vals):
+        numb_vals = len(vals[self.keys[0]])
+        rows = np.column_stack([np.arange(start, start + numb_vals)] + [vals[key] for key in self.keys])
+        np.savetxt(self.file, rows, fmt=['%d'] + ['%.17g'] * len(self.keys), delimiter=',')
+
+    def close(self):
+        self.file.close()
+
+def export_schedule(scheduler, npy_path=None, csv_path=None, png_path=None, dtype=np.float64, chunk_size=CHUNK_SIZE,
+                    width=1200, height=600, dpi=100):
+    '''
+    one pass over the schedule feeding every output asked for
+    :param dtype: of the .npy fields
+    :param width: of the png in pixels, also the number of min/max bins
+    :return: the MinMaxDecimator, its steps, mins and maxs are the plotted values
+    '''
+    numb_steps = scheduler.numb_steps
+    if numb_steps == 0:
+        raise ValueError("the schedule is empty")
+    keys = list(scheduler.values_between(0, 1))
+
+    decimator = MinMaxDecimator(numb_steps, width)
+    writers = [decimator]
+    try:
+        if npy_path is not None:
+            writers.append(_NpyWriter(npy_path, numb_steps, keys, dtype))
+        if csv_path is not None:
+            writers.append(_CsvWriter(csv_path, keys))
+        for start, vals in iter_chunks(scheduler, chunk_size):
+            for writer in writers:
+                writer.add(start, vals)
+    finally:
+        for writer in writers[1:]:
+            writer.close()
+
+    if png_path is not None:
+        plot_minmax(decimator.steps, decimator.mins, decimator.maxs, png_path, title=type(scheduler).__name__,
+                    width=width, height=height, dpi=dpi)
+    return decimator
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='export and plot a schedule, headless')
+    parser.add_argument('config', help='json scheduler config, or a path to a .json file of one')
+    parser.add_argument('--npy', help='write the schedule to this .npy file')
+    parser.add_argument('--csv', help='write the schedule to this csv file')
+    parser.add_argument('--png', help='render the schedule to this image (any format matplotlib saves)')
+    parser.add_argument('--dtype', default='float64', choices=['float32', 'float64'], help='of the .npy fields')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='steps per chunk')
+    parser.add_argument('--width', type=int, default=1200, help='image width in pixels (default: 1200)')
+    parser.add_argument('--height', type=int, default=600, help='image height in pixels (default: 600)')
+    parser.add_argument('--dpi', type=int, default=100)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    scheduler = scheduler_from_config(args.config)
+    decimator = export_schedule(scheduler, args.npy, args.csv, args.png, np.dtype(args.dtype), args.chunk_size,
+                                args.width, args.height, args.dpi)
+    for key in decimator.mins:
+        print('{}: {} steps, min {:.6g}, max {:.6g}'.format(key, decimator.numb_steps, decimator.mins[key].min(),
+                                                            decimator.maxs[key].max()))
+
+if __name__ == '__main__':
+    main()
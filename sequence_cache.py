@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+'''
+Bounded LRU cache for generated sequences
+
+The same cycles get generated over and over, every cycle of a CyclicLR_Scheduler with the same (length, max_lr),
+sweep drivers rebuilding the same 1cycle schedule for each trial, and so on.
+cached_vals() remembers whole cycles keyed on (Vals subclass, numb_iterations, max_val, min_val, dtype),
+least recently used first out once the cache goes over its memory limit.
+Cached arrays are read only so no caller can change what the next one gets, copy them if you need to write.
+
+Generators with attributes (a custom Vals taking parameters in __init__) are keyed on those too,
+if any of them is unhashable the values are generated every time.
+usage:
+>>>lrs = cached_vals(TriangularVals(), 1000, max_val=1.0, min_val=0.1)
+>>>DEFAULT_CACHE.info()     # hits, misses, entries, nbytes, max_bytes
+>>>DEFAULT_CACHE.resize(256 * 2**20)
+'''
+
+#default memory limit, bytes
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+class SequenceCache(object):
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        '''
+        :param max_bytes: memory limit for all cached arrays together
+        '''
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, seq_generator, numb_iterations, max_val, min_val, dtype=np.float64):
+        '''
+        :return: read only numpy array, seq_generator's cycle in dtype
+        '''
+        dtype = np.dtype(dtype)
+        key = (type(seq_generator), tuple(sorted(vars(seq_generator).items())), int(numb_iterations),
+               float(max_val), float(min_val), dtype.str)
+        try:
+            hash(key)
+        except TypeError:
+            return self._generate(seq_generator, numb_iterations, max_val, min_val, dtype)
+
+        with self._lock:
+            vals = self._entries.get(key)
+            if vals is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return vals
+            self.misses += 1
+
+        vals = self._generate(seq_generator, numb_iterations, max_val, min_val, dtype)
+        if vals.nbytes > self.max_bytes:
+            return vals   # would push everything else out, don't keep it
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = vals
+                self.nbytes += vals.nbytes
+                self._evict()
+        return vals
+
+    def _generate(self, seq_generator, numb_iterations, max_val, min_val, dtype):
+        vals = seq_generator.fill(np.empty(numb_iterations, dtype=dtype), max_val, min_val)
+        vals.flags.writeable = False
+        return vals
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes:
+            _, vals = self._entries.popitem(last=False)
+            self.nbytes -= vals.nbytes
+
+    def resize(self, max_bytes):
+        '''
+        changes the memory limit, evicting least recently used entries if needed
+        '''
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        '''
+        drops every entry and resets the counters
+        '''
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        '''
+        :return: dict of hits, misses, entries, nbytes and max_bytes
+        '''
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'nbytes': self.nbytes,
+                    'max_bytes': self.max_bytes}
+
+DEFAULT_CACHE = SequenceCache()
+
+def cached_vals(seq_generator, numb_iterations, max_val, min_val, dtype=np.float64, cache=None):
+    '''
+    same values as seq_generator.getVals(numb_iterations, max_val, min_val) but as a read only numpy array,
+    generated once and then served from cache (DEFAULT_CACHE unless another SequenceCache is given)
+    '''
+    if cache is None:
+        cache = DEFAULT_CACHE
+    return cache.get(seq_generator, numb_iterations, max_val, min_val, dtype)
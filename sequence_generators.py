@@ -1,61 +1,250 @@
 import math
 import numpy as np
 
+def _linspace_at(start, stop, num, i):
+    '''
+    element i of np.linspace(start, stop, num), computed the same way numpy does
+    so the result matches bit for bit.  Works on python scalars or (broadcastable) numpy arrays
+    '''
+    if isinstance(i, np.ndarray) or isinstance(num, np.ndarray):
+        div = np.maximum(num - 1, 1)
+        vals = i * ((stop - start) / div) + start
+        return np.where((i == num - 1) & (num > 1), stop, vals)
+
+    if num <= 1:
+        return start
+    if i == num - 1:
+        return stop
+    return i * ((stop - start) / (num - 1)) + start
+
+#indices 0, 1, 2 ... shared by every in place fill, long sequences are filled this many at a time
+_RAMP_LENGTH = 1 << 16
+_RAMP = np.arange(_RAMP_LENGTH, dtype=np.float64)
+_RAMP.flags.writeable = False
+
+def _linspace_into(out, start, stop, func=None):
+    '''
+    np.linspace(start, stop, len(out)) written into out, a 1D array or view (a reversed view gives the flipped
+    sequence), without allocating anything as long as out.  float64 out matches np.linspace bit for bit,
+    other dtypes get the float64 values rounded once
+    :param func: optional func(vals), applied in place to the linspace values (float64, a chunk at a time)
+                 before they are stored, for elementwise sequences like CosignVals
+    :return: out
+    '''
+    num = len(out)
+    step = (stop - start) / (num - 1) if num > 1 else 0.0
+    scratch = None if out.dtype == np.float64 else np.empty(min(num, _RAMP_LENGTH))
+    for offset in range(0, num, _RAMP_LENGTH):
+        chunk = out[offset:offset + _RAMP_LENGTH]
+        vals = chunk if scratch is None else scratch[:len(chunk)]
+        np.add(_RAMP[:len(chunk)], offset, out=vals)
+        np.multiply(vals, step, out=vals)
+        np.add(vals, start, out=vals)
+        if num > 1 and offset + len(chunk) == num:
+            vals[-1] = stop
+        if func is not None:
+            func(vals)
+        if scratch is not None:
+            chunk[...] = vals
+    return out
+
+def _out_array(out, numb_iterations, dtype):
+    '''
+    out checked against numb_iterations, or a new array of dtype (float64 by default) if there is none
+    '''
+    if out is None:
+        return np.empty(numb_iterations, dtype=np.float64 if dtype is None else dtype)
+    if out.shape != (numb_iterations,):
+        raise ValueError("out has shape {}, expected ({},)".format(out.shape, numb_iterations))
+    return out
+
+def _select(cond, a, b):
+    '''
+    a where cond is true, otherwise b, for python scalars or numpy arrays
+    '''
+    if isinstance(cond, np.ndarray):
+        return np.where(cond, a, b)
+    return a if cond else b
+
 class Vals(object):
     '''
     Base class, returns a single cycle of values
+    subclasses implement _fill, computing the cycle in place with ufunc out= operations
     '''
+    #getVals returns a list unless out or dtype is given
+    returns_list = True
+
     def __call__(self, *args, **kwargs):
         return self.getVals()
 
-    def getVals(self, numb_iterations, max_val, min_val):
+    def getVals(self, numb_iterations, max_val, min_val, out=None, dtype=None):
         '''
         :param numb_iterations: number total samples
         :param max_val: upper
         :param min_val: lower
-        :return: list of learning rates, numb_iterations long
+        :param out: optional preallocated 1D array or view numb_iterations long (a slice of a bigger schedule,
+                    a field of a structured array...), the values are written into it, nothing else is allocated
+        :param dtype: of the returned array when there is no out, float64 otherwise
+        :return: list of learning rates, numb_iterations long,
+                 or a numpy array (out itself if given) when out or dtype is given
+        '''
+        vals = self._fill(_out_array(out, numb_iterations, dtype), numb_iterations, max_val, min_val)
+        if out is None and dtype is None and self.returns_list:
+            return vals.tolist()
+        return vals
+
+    def fill(self, out, max_val, min_val):
+        '''
+        writes a whole cycle, len(out) long, into out, a preallocated 1D array or view
+        a subclass that only overrides getVals (the older interface) has its values copied in
+        :return: out
+        '''
+        if np.ndim(out) != 1:
+            raise ValueError("out must be 1D, got shape {}".format(np.shape(out)))
+        if type(self)._fill is Vals._fill:
+            out[...] = self.getVals(len(out), max_val, min_val)
+            return out
+        return self._fill(out, len(out), max_val, min_val)
+
+    def _fill(self, out, numb_iterations, max_val, min_val):
+        '''
+        writes the cycle into out, a 1D array numb_iterations long, and returns it
         '''
         raise NotImplementedError
 
-class CosignVals(Vals):
-    def getVals(self, numb_iterations, max_val, min_val):
+    def value_at(self, i, numb_iterations, max_val, min_val):
+        '''
+        single value from the cycle without generating the whole thing
+        same as getVals(numb_iterations, max_val, min_val)[i]
+        :param i: index into the cycle, 0 <= i < numb_iterations
+        :return: float
+        '''
+        if not 0 <= i < numb_iterations:
+            raise IndexError("index {} out of range for {} iterations".format(i, numb_iterations))
+        return float(self._values_at(i, numb_iterations, max_val, min_val))
+
+    def values_at(self, indices, numb_iterations, max_val, min_val):
+        '''
+        vectorized value_at, indices is anything np.asarray accepts
+        numb_iterations, max_val and min_val can be arrays as well, as long as they broadcast against indices
+        :return: numpy array of values, same shape as the broadcast inputs
+        '''
+        return np.asarray(self._values_at(np.asarray(indices), numb_iterations, max_val, min_val), dtype=float)
+
+    def getVals_batch(self, numb_iterations, max_vals, min_vals):
+        '''
+        one cycle for each (max_val, min_val) pair, all computed in a single vectorized pass
+        handy for hyperparameter sweeps, row k equals getVals(numb_iterations, max_vals[k], min_vals[k])
+        :param max_vals: sequence (or scalar), broadcast against min_vals
+        :param min_vals: "
+        :return: 2D numpy array, (number of configs, numb_iterations)
+        '''
+        max_vals, min_vals = np.broadcast_arrays(np.asarray(max_vals, dtype=float).reshape(-1, 1),
+                                                 np.asarray(min_vals, dtype=float).reshape(-1, 1))
+        vals = self.values_at(np.arange(numb_iterations), numb_iterations, max_vals, min_vals)
+        return np.broadcast_to(vals, (len(max_vals), numb_iterations))
+
+    def _values_at(self, i, numb_iterations, max_val, min_val):
         '''
-        Cosign that starts at max_val and decreases to min_val
+        closed form for a subclass, i is a python int or a numpy array
+        default falls back to generating the whole cycle, override it
         '''
-        # then translate so ranges between low_lr and high_lr
-        data = ( (np.cos(np.linspace(0, np.pi, numb_iterations)))+1) *(max_val - min_val)/2 + min_val
-        return data
+        return np.asarray(self.getVals(numb_iterations, max_val, min_val))[i]
+
+class CosignVals(Vals):
+    '''
+    Cosign that starts at max_val and decreases to min_val
+    '''
+    returns_list = False
+
+    def _fill(self, out, numb_iterations, max_val, min_val):
+        def cosign(vals):
+            np.cos(vals, out=vals)
+            # then translate so ranges between low_lr and high_lr
+            np.add(vals, 1, out=vals)
+            np.multiply(vals, max_val - min_val, out=vals)
+            np.divide(vals, 2, out=vals)
+            np.add(vals, min_val, out=vals)
+        return _linspace_into(out, 0, np.pi, cosign)
+
+    def _values_at(self, i, numb_iterations, max_val, min_val):
+        return (np.cos(_linspace_at(0, np.pi, numb_iterations, i)) + 1) * (max_val - min_val) / 2 + min_val
 
 class TriangularVals(Vals):
-    def getVals(self, numb_iterations, max_val, min_val):
+    def _fill(self, out, numb_iterations, max_val, min_val):
         #if odd numb_iterations add extra to first half
         extra = numb_iterations%2
 
         # determines the halfway point
         step_size = numb_iterations // 2
 
-        first_half = np.linspace(min_val, max_val, (step_size+extra))
-        second_half = np.linspace(min_val, first_half[step_size + extra - 2], step_size)  # note range to second from end
+        first_half = _linspace_into(out[:step_size + extra], min_val, max_val)
+        if step_size:
+            # note range to second from end, read as float64 so a float32 out gives the same peak
+            peak = _linspace_at(min_val, max_val, step_size + extra, max(step_size + extra - 2, 0))
+            _linspace_into(out[step_size + extra:][::-1], min_val, peak)
+        return out
+
+    def _values_at(self, i, numb_iterations, max_val, min_val):
+        step_size = numb_iterations // 2
+        first_len = step_size + numb_iterations % 2
+
+        # second half tops out one step below max_val (first_half[-2], or first_half[-1] if only 1 long)
+        peak = _linspace_at(min_val, max_val, first_len, first_len - 2 + (first_len < 2))
 
-        return np.concatenate((first_half, np.flip(second_half))).tolist()
+        rising = _linspace_at(min_val, max_val, first_len, i)
+        falling = _linspace_at(min_val, peak, step_size, step_size - 1 - (i - first_len))
+        return _select(i < first_len, rising, falling)
 
 class ReverseTriangularVals(Vals):
-    def getVals(self, numb_iterations, max_val, min_val):
+    def _fill(self, out, numb_iterations, max_val, min_val):
         # if odd numb_iterations add extra to first half
         extra = numb_iterations % 2
 
         # determines the halfway point
         step_size = numb_iterations // 2
 
-        first_half = np.flip(np.linspace(min_val, max_val, (step_size+extra)))
-        second_half = np.linspace(first_half[step_size + extra - 2], max_val, step_size)  # note range to second from end
-        return np.concatenate((first_half, second_half)).tolist()
+        first_half = _linspace_into(out[:step_size + extra][::-1], min_val, max_val)
+        if step_size:
+            # note range from second from end (of the flipped first half), read as float64 as in TriangularVals
+            trough = _linspace_at(min_val, max_val, step_size + extra, min(step_size + extra - 1, 1))
+            _linspace_into(out[step_size + extra:], trough, max_val)
+        return out
+
+    def _values_at(self, i, numb_iterations, max_val, min_val):
+        step_size = numb_iterations // 2
+        first_len = step_size + numb_iterations % 2
+
+        # second half starts one step above min_val (first_half[-2], or first_half[-1] if only 1 long)
+        trough = _linspace_at(min_val, max_val, first_len, 1 - (first_len < 2))
+
+        falling = _linspace_at(min_val, max_val, first_len, first_len - 1 - i)
+        rising = _linspace_at(trough, max_val, step_size, i - first_len)
+        return _select(i < first_len, falling, rising)
 
 #useful for learning rate finder
 class LinearIncreaseVals(Vals):
-    def getVals(self, numb_iterations, max_val, min_val):
-        return np.linspace(min_val, max_val, numb_iterations).tolist()
+    def _fill(self, out, numb_iterations, max_val, min_val):
+        return _linspace_into(out, min_val, max_val)
+
+    def _values_at(self, i, numb_iterations, max_val, min_val):
+        return _linspace_at(min_val, max_val, numb_iterations, i)
 
 class LinearDecrease(LinearIncreaseVals):
-    def getVals(self, numb_iterations, max_val, min_val):
-        return np.flip(super().getVals(numb_iterations, max_val, min_val)).tolist()
+    def _fill(self, out, numb_iterations, max_val, min_val):
+        _linspace_into(out[::-1], min_val, max_val)
+        return out
+
+    def _values_at(self, i, numb_iterations, max_val, min_val):
+        return _linspace_at(min_val, max_val, numb_iterations, numb_iterations - 1 - i)
+
+#log spaced, for a learning rate finder sweeping several orders of magnitude
+class ExponentialIncreaseVals(Vals):
+    def _fill(self, out, numb_iterations, max_val, min_val):
+        def exponential(vals):
+            np.power(max_val / min_val, vals, out=vals)
+            np.multiply(vals, min_val, out=vals)
+        return _linspace_into(out, 0.0, 1.0, exponential)
+
+    def _values_at(self, i, numb_iterations, max_val, min_val):
+        return min_val * np.power(max_val / min_val, _linspace_at(0.0, 1.0, numb_iterations, i))
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
+if __name__ == '__main__' or parent_module.__name__ == '__main__':
+    from learning_rate_generators import get1Cycle_schedule
+else:
+    from .learning_rate_generators import get1Cycle_schedule
+
+'''
+One schedule table per node for multi process (one process per rank) training
+
+Instead of every rank building its own copy of the 1cycle schedule, rank 0 builds it once into
+either a multiprocessing shared memory block or a .npy file, the other ranks attach to it without copying.
+Schedulers look values up by global step, so every rank applies the same lr and momentum at the same step.
+usage, in every rank:
+>>>table = share_1cycle_schedule('1cycle_run7', rank=dist.get_rank(), barrier=dist.barrier, num_batches=..., ...)
+>>>scheduler = OneCycle_Scheduler(optimizer, ..., schedule=table.schedule)
+>>>... train ...
+>>>table.close()     # rank 0 also removes the shared memory block / file, after every rank is done with it
+
+location ending in .npy is a memory mapped file (page cache shared by all processes, survives crashes,
+must be on a local disk), anything else names a shared memory block.
+Without a barrier the attaching ranks poll until the table is published, for up to timeout seconds.
+'''
+
+#seconds between polls while waiting for rank 0 to publish the table
+POLL_INTERVAL = 0.01
+
+#shared memory blocks start with this header, the ready flag is set once the table is completely written
+_HEADER_BYTES = 64
+
+class SharedSchedule(object):
+    '''
+    a structured schedule array (get1Cycle_schedule) living in shared memory or a memory mapped .npy file
+    build it with publish() on one process and attach() to it everywhere else
+    '''
+    def __init__(self, location, schedule, shm=None, owner=False):
+        self.location = location
+        self.schedule = schedule
+        self._shm = shm
+        self.owner = owner
+
+    @classmethod
+    def publish(cls, location, schedule):
+        '''
+        copies schedule to location, the caller becomes the owner responsible for removing it
+        :param location: path ending in .npy or a shared memory name
+        :param schedule: structured numpy array
+        '''
+        if _is_file(location):
+            tmp_path = '{}.{}.tmp'.format(location, os.getpid())
+            with open(tmp_path, 'wb') as f:   #np.save would add .npy to the tmp name
+                np.save(f, schedule)
+            os.replace(tmp_path, location)   #atomic, attaching ranks never see a half written file
+            return cls(location, np.load(location, mmap_mode='r'), owner=True)
+
+        shm = shared_memory.SharedMemory(name=location, create=True, size=_HEADER_BYTES + max(schedule.nbytes, 1))
+        table = _view(shm, len(schedule), schedule.dtype)
+        table[...] = schedule
+        np.frombuffer(shm.buf, dtype=np.int64, count=1)[0] = 1   #ready flag, last
+        table.flags.writeable = False
+        return cls(location, table, shm, owner=True)
+
+    @classmethod
+    def attach(cls, location, length, dtype, timeout=60.0):
+        '''
+        read only view of a published table, waits up to timeout seconds for it to appear
+        :param length: number of steps in the schedule
+        :param dtype: structured dtype of the schedule, both needed to map shared memory
+        '''
+        deadline = time.monotonic() + timeout
+        while True:
+            table = _try_attach(location, length, np.dtype(dtype))
+            if table is not None:
+                return table
+            if time.monotonic() > deadline:
+                raise TimeoutError("schedule {} not published within {}s".format(location, timeout))
+            time.sleep(POLL_INTERVAL)
+
+    def close(self):
+        '''
+        detaches, the owner also removes the shared memory block or file
+        arrays still referencing the table (a scheduler's lrs) stay valid, the memory is unmapped once they are gone
+        '''
+        self.schedule = None   #releases this table's view, the block is closed once no other array uses it
+        if self._shm is not None:
+            if self.owner:
+                self._shm.unlink()
+            self._shm = None
+        elif self.owner and os.path.exists(self.location):
+            os.remove(self.location)
+        self.owner = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _view(shm, length, dtype):
+    '''
+    the table in shm, on shm.buf.  Every array taken from it keeps the memoryview numpy holds (table.base) alive,
+    shm is closed once that is released, after the last of those arrays is gone (see SharedSchedule.close)
+    '''
+    table = np.frombuffer(shm.buf, dtype=dtype, count=length, offset=_HEADER_BYTES)
+    weakref.finalize(table.base, shm.close).atexit = False   #at exit the process unmaps everything anyway
+    return table
+
+def _is_file(location):
+    return location.endswith('.npy')
+
+def _try_attach(location, length, dtype):
+    '''
+    :return: SharedSchedule or None if not published yet
+    '''
+    if _is_file(location):
+        if not os.path.exists(location):
+            return None
+        schedule = np.load(location, mmap_mode='r')
+        _check_layout(location, schedule, length, dtype)
+        return SharedSchedule(location, schedule)
+
+    try:
+        shm = _open_shared_memory(location)
+    except FileNotFoundError:
+        return None
+    if not np.frombuffer(shm.buf, dtype=np.int64, count=1)[0]:
+        shm.close()
+        return None
+    if shm.size < _HEADER_BYTES + length * dtype.itemsize:
+        shm.close()
+        raise ValueError("shared schedule {} is smaller than {} steps of {}".format(location, length, dtype))
+    schedule = _view(shm, length, dtype)
+    schedule.flags.writeable = False
+    return SharedSchedule(location, schedule, shm)
+
+def _open_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   #python 3.13+
+    except TypeError:
+        pass
+    # before 3.13 attaching registers the block with the resource tracker too, which would unlink it when this
+    # process exits, from under the owner and the other ranks, so take the registration back.  A rank started
+    # by multiprocessing from the owner shares the owner's tracker, its unlink then has the tracker log a KeyError
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+def _check_layout(location, schedule, length, dtype):
+    if schedule.dtype != dtype or schedule.shape != (length,):
+        raise ValueError("shared schedule {} is {} {}, expected {} {}".format(location, schedule.shape,
+                                                                              schedule.dtype, (length,), dtype))
+
+def share_1cycle_schedule(location, *, rank, num_batches, numb_annihlation_batches, annihilation_divisor, max_lr,
+                          min_lr, max_momentum, min_momentum, dtype=np.float32, barrier=None, timeout=60.0):
+    '''
+    rank 0 builds the get1Cycle_schedule table and publishes it at location, the other ranks attach to it
+    :param rank: this process's rank, only rank 0 builds
+    :param barrier: optional callable run by every rank after rank 0 published, like torch.distributed.barrier,
+                    otherwise the other ranks poll
+    :param timeout: seconds the other ranks wait for rank 0
+    :return: SharedSchedule, use its schedule array in OneCycle_Scheduler(schedule=...)
+    '''
+    length = num_batches + numb_annihlation_batches
+    dtype = np.dtype([('lr', dtype), ('momentum', dtype)])
+    if rank == 0:
+        table = SharedSchedule.publish(location, get1Cycle_schedule(num_batches, numb_annihlation_batches,
+                                                                    annihilation_divisor, max_lr, min_lr,
+                                                                    max_momentum, min_momentum, dtype=dtype['lr']))
+        if barrier is not None:
+            barrier()
+        return table
+
+    if barrier is not None:
+        barrier()
+    return SharedSchedule.attach(location, length, dtype, timeout)
@@ -0,0 +1,10 @@
+'''
+stand in for a pytorch optimizer, shared by the tests and the benchmarks
+'''
+
+class DummyOptimizer(object):
+    '''
+    just enough of a pytorch optimizer for the schedulers
+    '''
+    def __init__(self, numb_param_groups=1):
+        self.param_groups = [{'lr': 0.0, 'momentum': 0.0} for _ in range(numb_param_groups)]
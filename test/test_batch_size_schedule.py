@@ -0,0 +1,107 @@
+import unittest
+from torch.utils.data import DataLoader
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+from batch_size_schedule import BatchSizeRamp, RampBatchSampler
+from cyclic_LR_scheduler import CyclicLR_Scheduler, OneCycle_Scheduler
+from sequence_generators import TriangularVals
+from .dummy_optimizer import DummyOptimizer
+
+def get_scheduler(batch_size_schedule=None):
+    return OneCycle_Scheduler(DummyOptimizer(), num_batches=40, numb_annihlation_batches=8, annihilation_divisor=10,
+                              max_lr=1.0, min_lr=0.1, max_momentum=.95, min_momentum=.85, batch_size=8,
+                              batch_size_schedule=batch_size_schedule)
+
+def run_all(scheduler, numb_samples=None):
+    '''
+    :return: list of (samples seen before the step, lr applied)
+    '''
+    vals = []
+    while True:
+        samples_seen = scheduler.samples_seen
+        try:
+            scheduler.batch_step(numb_samples)
+        except StopIteration:
+            return vals
+        vals.append((samples_seen, scheduler.optimizer.param_groups[0]['lr']))
+
+class TestBatchSizeRamp(unittest.TestCase):
+    def test_batch_size_at(self):
+        ramp = BatchSizeRamp([8, 16, 32], sample_milestones=[100, 200])
+        self.assertEqual([8, 8, 16, 16, 32], [ramp.batch_size_at(s) for s in (0, 99, 100, 199, 10 ** 9)])
+        with self.assertRaises(ValueError):
+            BatchSizeRamp([8, 16], sample_milestones=[100, 200])
+        with self.assertRaises(ValueError):
+            BatchSizeRamp([8, 16, 32], sample_milestones=[200, 100])
+
+    def test_linear(self):
+        ramp = BatchSizeRamp.linear(64, 512, numb_samples=1000, numb_phases=4, multiple_of=32)
+        self.assertEqual(([64, 224, 352, 512], [250, 500, 750]), ramp.describe())
+
+class TestSampleBasedScheduling(unittest.TestCase):
+    def test_fixed_batch_size(self):
+        fixed = run_all(get_scheduler())
+        self.assertEqual(48, len(fixed))
+        self.assertEqual(list(range(0, 48 * 8, 8)), [samples for samples, _ in fixed])
+
+    def test_ramp_follows_samples(self):
+        lrs = dict(run_all(get_scheduler()))
+        ramped = run_all(get_scheduler(BatchSizeRamp([8, 16, 32], sample_milestones=[64, 192])))
+
+        # same lr curve over samples, fewer steps
+        self.assertEqual([0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256, 288,
+                          320, 352], [samples for samples, _ in ramped])
+        for samples, lr in ramped:
+            self.assertEqual(lrs[samples], lr)
+
+    def test_partial_batches(self):
+        scheduler = CyclicLR_Scheduler(DummyOptimizer(), min_lr=0.1, max_lr=1.0, numb_images_in_dataset=40,
+                                       LR=TriangularVals(), batch_size=8, step_size=[1, 1])
+        full = [lr for _, lr in run_all(scheduler)]
+        scheduler._seek(0)
+        half = [lr for _, lr in run_all(scheduler, numb_samples=4)]
+        self.assertEqual([lr for lr in full for _ in range(2)], half)
+
+    def test_state_dict(self):
+        ramp = BatchSizeRamp([8, 16], sample_milestones=[60])
+        scheduler = get_scheduler(ramp)
+        for numb_samples in (8, 8, 5, 16, 16):
+            scheduler.batch_step(numb_samples)
+        resumed = get_scheduler(ramp)
+        resumed.load_state_dict(scheduler.state_dict())
+        self.assertEqual((53, 6), (resumed.samples_seen, resumed.batch_idx))
+        self.assertEqual(run_all(scheduler), run_all(resumed))
+
+        with self.assertRaises(ValueError):   #different ramp
+            get_scheduler(BatchSizeRamp([8, 32], sample_milestones=[60])).load_state_dict(scheduler.state_dict())
+
+class TestRampBatchSampler(unittest.TestCase):
+    def test_batch_sizes(self):
+        scheduler = get_scheduler(BatchSizeRamp([8, 16, 32], sample_milestones=[16, 48]))
+        sampler = RampBatchSampler(range(100), scheduler)
+        batches = list(sampler)
+        self.assertEqual([8, 8, 16, 16, 32, 20], [len(batch) for batch in batches])
+        self.assertEqual(list(range(100)), [idx for batch in batches for idx in batch])
+
+        for batch in batches[:3]:
+            scheduler.batch_step(len(batch))
+        self.assertEqual([16, 32, 32, 20], [len(batch) for batch in sampler])   #next epoch carries on from there
+        self.assertEqual([16, 32, 32], [len(batch) for batch in RampBatchSampler(range(100), scheduler,
+                                                                                 drop_last=True)])
+
+    def test_len(self):
+        scheduler = get_scheduler(BatchSizeRamp([8, 16, 32], sample_milestones=[16, 48]))
+        for numb_samples in (100, 96, 8, 0):
+            for drop_last in (False, True):
+                sampler = RampBatchSampler(range(numb_samples), scheduler, drop_last=drop_last)
+                self.assertEqual(len(list(sampler)), len(sampler))
+        scheduler.batch_step(8)
+        sampler = RampBatchSampler(range(100), scheduler)
+        self.assertEqual([8, 16, 16, 32, 28], [len(batch) for batch in sampler])
+        self.assertEqual(5, len(DataLoader(range(100), batch_sampler=sampler)))
@@ -0,0 +1,458 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import numpy as np
+try:
+    import torch
+except ImportError:
+    torch = None
+from cyclic_LR_scheduler import CyclicLR_Scheduler, LearningRateFinder, OneCycle_Scheduler, Piecewise_Scheduler
+from schedule_compiler import ScheduleBuilder
+from learning_rate_generators import get1CycleVals, OneCycleChannel
+from sequence_generators import CosignVals, LinearDecrease, TriangularVals
+from .dummy_optimizer import DummyOptimizer
+
+MIN_LR = 0.1
+MAX_LR = 1.0
+
+class TestCyclicLR_Scheduler(unittest.TestCase):
+    def get_scheduler(self, optimizer, LR, LR_anneal=None, numb_images=100, batch_size=10, step_size=[1, 1, 1, 1]):
+        return CyclicLR_Scheduler(optimizer, min_lr=MIN_LR, max_lr=MAX_LR, numb_images_in_dataset=numb_images, LR=LR,
+                                  LR_anneal=LR_anneal, batch_size=batch_size, step_size=step_size)
+
+    def run_all(self, scheduler, optimizer):
+        lrs = []
+        while True:
+            try:
+                scheduler.batch_step()
+            except StopIteration:
+                return lrs
+            lrs.append(scheduler.get_currentLR())
+            self.assertTrue(all(pg['lr'] == lrs[-1] for pg in optimizer.param_groups))
+
+    def test_batch_step_walks_schedule(self):
+        for LR, LR_anneal in [(LinearDecrease(), None), (TriangularVals(), CosignVals()),
+                              (CosignVals(), LinearDecrease())]:
+            optimizer = DummyOptimizer(numb_param_groups=3)
+            scheduler = self.get_scheduler(optimizer, LR, LR_anneal, numb_images=95, step_size=[1, 2, 1])
+            self.assertEqual(list(scheduler._get_Vals()), self.run_all(scheduler, optimizer))
+
+    def test_cycle_lengths(self):
+        # 100 images/10 per batch = 10 batches per epoch, 2 epochs per cycle
+        optimizer = DummyOptimizer()
+        scheduler = self.get_scheduler(optimizer, LinearDecrease(), step_size=[1, 3])
+        self.assertEqual([20, 60], scheduler.cycle_lengths)
+        self.assertEqual(80, len(self.run_all(scheduler, optimizer)))
+
+    def test_stop(self):
+        scheduler = self.get_scheduler(DummyOptimizer(), LinearDecrease(), numb_images=5)  # no full batches
+        with self.assertRaises(StopIteration):
+            scheduler.batch_step()
+
+class TestPlateauRestarts(unittest.TestCase):
+    '''
+    10 batches per epoch, 20 per cycle
+    '''
+    def get_scheduler(self, **kwargs):
+        return CyclicLR_Scheduler(DummyOptimizer(), min_lr=MIN_LR, max_lr=MAX_LR, numb_images_in_dataset=100,
+                                  LR=CosignVals(), LR_anneal=LinearDecrease(), batch_size=10, step_size=[1, 1, 1],
+                                  patience=1, **kwargs)
+
+    def step(self, scheduler, numb_steps):
+        lrs = []
+        for _ in range(numb_steps):
+            scheduler.batch_step()
+            lrs.append(scheduler.get_currentLR())
+        return lrs
+
+    def test_no_patience(self):
+        scheduler = CyclicLR_Scheduler(DummyOptimizer(), min_lr=MIN_LR, max_lr=MAX_LR, numb_images_in_dataset=100,
+                                       LR=CosignVals(), batch_size=10, step_size=[1])
+        for _ in range(5):
+            self.assertFalse(scheduler.report_metric(1.0))
+        self.assertEqual([20], scheduler.cycle_lengths)
+
+    def test_next_cycle(self):
+        scheduler = self.get_scheduler()
+        planned = list(scheduler._get_Vals())
+        self.step(scheduler, 5)
+        for metric in (1.0, 1.0):
+            self.assertFalse(scheduler.report_metric(metric))
+        self.assertEqual([20, 20, 20], scheduler.cycle_lengths)
+        self.assertFalse(scheduler.report_metric(1.0))   # second report without improvement > patience
+        self.assertEqual([5, 20, 20], scheduler.cycle_lengths)
+        self.assertEqual([5], scheduler.restarts)
+
+        self.assertEqual(planned[20:], self.step(scheduler, 40))   # straight on to the next cycle
+        with self.assertRaises(StopIteration):
+            scheduler.batch_step()
+        self.assertTrue(scheduler.report_metric(0.5))
+
+    def test_restart(self):
+        scheduler = self.get_scheduler(on_plateau='restart', metric_mode='max')
+        planned = list(scheduler._get_Vals())
+        self.step(scheduler, 25)
+        for metric in (0.9, 0.8, 0.9):
+            scheduler.report_metric(metric)
+        self.assertEqual([20, 5, 20, 20], scheduler.cycle_lengths)
+        self.assertEqual(planned[20:40], self.step(scheduler, 20))   # the second cycle over again
+        self.assertEqual(planned[40:], self.step(scheduler, 20))
+        self.assertTrue(scheduler.done)
+
+    def test_stop_without_improvement(self):
+        scheduler = self.get_scheduler(on_plateau='restart', max_restarts_without_improvement=2)
+        stops = [scheduler.report_metric(metric) for metric in (1.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0)]
+        self.assertEqual([False] * 6 + [True], stops)   # first plateau had the first report as an improvement
+        self.assertEqual(3, len(scheduler.cycle_lengths) - 2)   # two restarts, the third plateau stopped it
+        with self.assertRaises(StopIteration):
+            scheduler.batch_step()
+
+    def test_resume(self):
+        scheduler = self.get_scheduler(on_plateau='restart')
+        self.step(scheduler, 7)
+        for metric in (1.0, 1.0, 1.0):
+            scheduler.report_metric(metric)
+        self.step(scheduler, 3)
+        resumed = self.get_scheduler(on_plateau='restart')
+        resumed.load_state_dict(scheduler.state_dict())
+        self.assertEqual(scheduler.cycle_lengths, resumed.cycle_lengths)
+        self.assertEqual(self.step(scheduler, 50), self.step(resumed, 50))
+        self.assertEqual(scheduler.report_metric(1.0), resumed.report_metric(1.0))
+
+class TestOneCycle_Scheduler(unittest.TestCase):
+    def get_scheduler(self, optimizer, dtype=None):
+        return OneCycle_Scheduler(optimizer, num_batches=21, numb_annihlation_batches=5, annihilation_divisor=100,
+                                  max_lr=MAX_LR, min_lr=MIN_LR, max_momentum=.99, min_momentum=.7, dtype=dtype)
+
+    def run_all(self, scheduler, optimizer):
+        vals = []
+        while True:
+            try:
+                scheduler.batch_step()
+            except StopIteration:
+                return vals
+            vals.append((optimizer.param_groups[0]['lr'], optimizer.param_groups[0]['momentum']))
+
+    def test_array_schedule(self):
+        optimizer = DummyOptimizer()
+        expected = self.run_all(self.get_scheduler(optimizer), optimizer)
+        self.assertEqual(26, len(expected))
+        self.assertEqual(expected, self.run_all(self.get_scheduler(optimizer, dtype=np.float64), optimizer))
+
+        vals = self.run_all(self.get_scheduler(optimizer, dtype=np.float32), optimizer)
+        np.testing.assert_allclose(expected, vals, rtol=1e-6)
+        self.assertIsInstance(vals[0][0], float)
+
+    def test_extra_channels(self):
+        optimizer = DummyOptimizer(numb_param_groups=2)
+        scheduler = OneCycle_Scheduler(optimizer, num_batches=21, numb_annihlation_batches=5, annihilation_divisor=100,
+                                       max_lr=MAX_LR, min_lr=MIN_LR, max_momentum=.99, min_momentum=.7,
+                                       lr_multipliers=[0.1, 1],
+                                       extra_channels=[('weight_decay', OneCycleChannel(1e-3, 1e-4))])
+        plain = self.get_scheduler(DummyOptimizer())
+        expected_wd = get1CycleVals(21, 5, 1, 1e-3, 1e-4)
+        for step in range(26):
+            scheduler.batch_step()
+            plain.batch_step()
+            self.assertEqual(plain.optimizer.param_groups[0]['lr'], optimizer.param_groups[1]['lr'])
+            self.assertEqual(plain.optimizer.param_groups[0]['momentum'], optimizer.param_groups[0]['momentum'])
+            self.assertEqual([expected_wd[step]] * 2, [pg['weight_decay'] for pg in optimizer.param_groups])
+
+class TestLearningRateFinder(unittest.TestCase):
+    NUMB_BATCHES = 200
+
+    def loss(self, lr):
+        # bottoms out around lr=0.1 then blows up
+        return 1.0 + (np.log10(lr) + 1) ** 2 if lr < 0.1 else 1.0 + 100 * (lr - 0.1)
+
+    def run_finder(self, finder):
+        while True:
+            finder.batch_step()
+            if finder.record_loss(self.loss(finder.get_currentLR())):
+                return
+
+    def test_lrs(self):
+        for mode in LearningRateFinder.MODES:
+            finder = LearningRateFinder(DummyOptimizer(), min_lr=1e-4, max_lr=1.0, num_batches=self.NUMB_BATCHES,
+                                        mode=mode)
+            lrs = list(finder._get_Vals())
+            self.assertEqual(self.NUMB_BATCHES, len(lrs))
+            self.assertAlmostEqual(1e-4, lrs[0])
+            self.assertAlmostEqual(1.0, lrs[-1])
+            self.assertEqual(lrs[:10], [(finder.batch_step(), finder.get_currentLR())[1] for _ in range(10)])
+        self.assertAlmostEqual(1e-2, lrs[self.NUMB_BATCHES // 2], delta=1e-3)  # log spaced
+
+    def test_divergence_stop(self):
+        optimizer = DummyOptimizer()
+        finder = LearningRateFinder(optimizer, min_lr=1e-4, max_lr=1.0, num_batches=self.NUMB_BATCHES,
+                                    mode='exponential', smoothing=0.5)
+        self.run_finder(finder)
+        self.assertTrue(finder.diverged)
+        self.assertLess(finder.batch_idx, self.NUMB_BATCHES)
+        with self.assertRaises(StopIteration):
+            finder.batch_step()
+
+        min_lr, max_lr = finder.suggest_lr_range()
+        self.assertLess(min_lr, max_lr)
+        self.assertAlmostEqual(0.1, max_lr, delta=0.05)
+
+    def test_no_divergence(self):
+        finder = LearningRateFinder(DummyOptimizer(), min_lr=1e-4, max_lr=1.0, num_batches=self.NUMB_BATCHES,
+                                    divergence_threshold=None)
+        self.run_finder(finder)
+        self.assertFalse(finder.diverged)
+        self.assertEqual(self.NUMB_BATCHES, len(finder.loss_history))
+
+    def test_lr_history_is_trained_lr(self):
+        # the documented order, batch_step(), train, record_loss(), labels every loss with the lr it was trained at
+        optimizer = DummyOptimizer()
+        optimizer.param_groups[0]['lr'] = 0.5
+        finder = LearningRateFinder(optimizer, min_lr=1e-5, max_lr=1.0, num_batches=20, mode='exponential',
+                                    divergence_threshold=None)
+        trained_lrs = []
+        while True:
+            finder.batch_step()
+            trained_lrs.append(optimizer.param_groups[0]['lr'])
+            if finder.record_loss(1.0):
+                break
+        self.assertEqual(trained_lrs, finder.lr_history)
+        self.assertEqual(1e-5, finder.lr_history[0])
+        self.assertAlmostEqual(1.0, finder.lr_history[-1])
+        self.assertEqual(20, len(set(finder.lr_history)))
+
+    def test_bad_mode(self):
+        with self.assertRaises(ValueError):
+            LearningRateFinder(DummyOptimizer(), min_lr=1e-4, max_lr=1.0, num_batches=10, mode='quadratic')
+
+class CountingDict(dict):
+    '''
+    param group that counts writes
+    '''
+    writes = 0
+    def __setitem__(self, key, value):
+        CountingDict.writes += 1
+        super().__setitem__(key, value)
+
+class TestParamGroupUpdates(unittest.TestCase):
+    def test_multipliers(self):
+        optimizer = DummyOptimizer(numb_param_groups=3)
+        scheduler = OneCycle_Scheduler(optimizer, num_batches=10, numb_annihlation_batches=2, annihilation_divisor=10,
+                                       max_lr=MAX_LR, min_lr=MIN_LR, max_momentum=.9, min_momentum=.8,
+                                       lr_multipliers=[0.01, 0.1, 1], momentum_multipliers=[1, 1, 0.5])
+        for _ in range(4):
+            scheduler.batch_step()
+            lr, mom = optimizer.param_groups[2]['lr'], optimizer.param_groups[2]['momentum'] * 2
+            self.assertEqual(scheduler.get_currentLR(), lr)
+            self.assertEqual([lr * 0.01, lr * 0.1, lr], [pg['lr'] for pg in optimizer.param_groups])
+            self.assertEqual([mom, mom, mom / 2], [pg['momentum'] for pg in optimizer.param_groups])
+
+    def test_skip_unchanged(self):
+        optimizer = DummyOptimizer()
+        optimizer.param_groups = [CountingDict(lr=0.0) for _ in range(5)]
+        scheduler = CyclicLR_Scheduler(optimizer, min_lr=MIN_LR, max_lr=MIN_LR, numb_images_in_dataset=100,
+                                       LR=LinearDecrease(), batch_size=10, step_size=[1])
+        CountingDict.writes = 0
+        for _ in range(10):
+            scheduler.batch_step()   # constant lr, written once
+        self.assertEqual(5, CountingDict.writes)
+
+    def test_wrong_number_of_multipliers(self):
+        scheduler = LearningRateFinder(DummyOptimizer(numb_param_groups=2), min_lr=MIN_LR, max_lr=MAX_LR,
+                                       num_batches=10, lr_multipliers=[1, 2, 3])
+        with self.assertRaises(ValueError):
+            scheduler.batch_step()
+
+    def test_refresh_param_groups(self):
+        optimizer = DummyOptimizer()
+        scheduler = LearningRateFinder(optimizer, min_lr=MIN_LR, max_lr=MAX_LR, num_batches=10)
+        scheduler.batch_step()
+        optimizer.param_groups.append({'lr': 0.0})
+        scheduler.refresh_param_groups()
+        scheduler.batch_step()
+        self.assertEqual(optimizer.param_groups[0]['lr'], optimizer.param_groups[1]['lr'])
+
+class TestStateDict(unittest.TestCase):
+    '''
+    a scheduler restored at step N carries on exactly where the original left off
+    '''
+    def get_schedulers(self, optimizer):
+        return [
+            OneCycle_Scheduler(optimizer, num_batches=21, numb_annihlation_batches=5, annihilation_divisor=100,
+                               max_lr=MAX_LR, min_lr=MIN_LR, max_momentum=.99, min_momentum=.7),
+            LearningRateFinder(optimizer, min_lr=MIN_LR, max_lr=MAX_LR, num_batches=26),
+            CyclicLR_Scheduler(optimizer, min_lr=MIN_LR, max_lr=MAX_LR, numb_images_in_dataset=30, LR=TriangularVals(),
+                               LR_anneal=CosignVals(), batch_size=10, step_size=[1, 0, 2]),
+        ]
+
+    def step(self, scheduler, optimizer, numb_steps):
+        vals = []
+        for _ in range(numb_steps):
+            scheduler.batch_step()
+            if hasattr(scheduler, 'record_loss'):
+                scheduler.record_loss(1.0)
+            vals.append(dict(optimizer.param_groups[0]))
+        return vals
+
+    def test_resume(self):
+        for numb_steps in [0, 1, 5, 6, 7, 17]:
+            for idx in range(3):
+                optimizer = DummyOptimizer()
+                expected = self.step(self.get_schedulers(optimizer)[idx], optimizer, 18)
+
+                optimizer = DummyOptimizer()
+                scheduler = self.get_schedulers(optimizer)[idx]
+                vals = self.step(scheduler, optimizer, numb_steps)
+                state = scheduler.state_dict()
+
+                optimizer = DummyOptimizer()
+                resumed = self.get_schedulers(optimizer)[idx]
+                resumed.load_state_dict(state)
+                self.assertEqual(numb_steps, resumed.batch_idx)
+                vals += self.step(resumed, optimizer, 18 - numb_steps)
+                self.assertEqual(expected, vals, type(resumed).__name__)
+
+    def test_resume_at_end(self):
+        optimizer = DummyOptimizer()
+        scheduler = self.get_schedulers(optimizer)[2]
+        self.step(scheduler, optimizer, 18)
+        resumed = self.get_schedulers(optimizer)[2]
+        resumed.load_state_dict(scheduler.state_dict())
+        with self.assertRaises(StopIteration):
+            resumed.batch_step()
+
+    def test_wrong_config(self):
+        optimizer = DummyOptimizer()
+        state = self.get_schedulers(optimizer)[0].state_dict()
+        other = OneCycle_Scheduler(optimizer, num_batches=21, numb_annihlation_batches=5, annihilation_divisor=10,
+                                   max_lr=MAX_LR, min_lr=MIN_LR, max_momentum=.99, min_momentum=.7)
+        with self.assertRaises(ValueError):
+            other.load_state_dict(state)
+        with self.assertRaises(ValueError):
+            self.get_schedulers(optimizer)[1].load_state_dict(state)
+
+    @unittest.skipIf(torch is None, 'needs torch')
+    def test_optimizer_load_state_dict(self):
+        # Optimizer.load_state_dict puts new param_group dicts in a new list, the scheduler has to write to those
+        for load_scheduler in (True, False):
+            optimizer = torch.optim.SGD([torch.nn.Parameter(torch.zeros(2))], lr=0.01, momentum=0.5)
+            scheduler = self.get_schedulers(optimizer)[0]
+            for _ in range(3):
+                scheduler.batch_step()
+            optimizer_state, scheduler_state = optimizer.state_dict(), scheduler.state_dict()
+            scheduler.batch_step()
+
+            optimizer.load_state_dict(optimizer_state)
+            if load_scheduler:
+                scheduler.load_state_dict(scheduler_state)
+            scheduler.batch_step()
+            self.assertEqual(scheduler.get_currentLR(), optimizer.param_groups[0]['lr'])
+            self.assertEqual([scheduler.get_currentLR()], scheduler.get_last_lr())
+
+class TestValuesBetween(unittest.TestCase):
+    '''
+    values_between in chunks gives exactly what batch_step writes, step by step
+    '''
+    def check(self, get_scheduler, chunk_size=7):
+        optimizer = DummyOptimizer()
+        scheduler = get_scheduler(optimizer)
+        vals = {}
+        for start in range(0, scheduler.numb_steps, chunk_size):
+            for key, val in scheduler.values_between(start, min(start + chunk_size, scheduler.numb_steps)).items():
+                vals.setdefault(key, []).extend(val.tolist())
+
+        stepped = {key: [] for key in vals}
+        for _ in range(scheduler.numb_steps):
+            scheduler.batch_step()
+            for key in vals:
+                stepped[key].append(optimizer.param_groups[0][key])
+        with self.assertRaises(StopIteration):
+            scheduler.batch_step()
+        self.assertEqual(stepped, vals)
+
+    def test_one_cycle(self):
+        for dtype in (None, np.float32):
+            self.check(lambda optimizer: OneCycle_Scheduler(optimizer, num_batches=50, numb_annihlation_batches=7,
+                                                            annihilation_divisor=10, max_lr=MAX_LR, min_lr=MIN_LR,
+                                                            max_momentum=0.95, min_momentum=0.85, dtype=dtype))
+
+    def test_finder(self):
+        self.check(lambda optimizer: LearningRateFinder(optimizer, min_lr=1e-3, max_lr=MAX_LR, num_batches=50,
+                                                        mode='exponential'))
+
+    def test_cyclic(self):
+        self.check(lambda optimizer: CyclicLR_Scheduler(optimizer, min_lr=MIN_LR, max_lr=MAX_LR,
+                                                        numb_images_in_dataset=100, LR=TriangularVals(),
+                                                        LR_anneal=CosignVals(), batch_size=10, step_size=[1, 2, 1, 3]))
+
+    def test_piecewise(self):
+        lrs = ScheduleBuilder().warmup(9, MIN_LR, MAX_LR).cosine(30, MAX_LR, MIN_LR).compile()
+        moms = ScheduleBuilder().linear(9, 0.95, 0.85).constant(30, 0.85).compile()
+        self.check(lambda optimizer: Piecewise_Scheduler(optimizer, lr_schedule=lrs, momentum_schedule=moms))
+
+@unittest.skipIf(torch is None, 'needs torch')
+class TestTensorValues(unittest.TestCase):
+    def get_scheduler(self, optimizer, tensor_values=True, lr_multipliers=None):
+        return OneCycle_Scheduler(optimizer, num_batches=8, numb_annihlation_batches=2, annihilation_divisor=10,
+                                  max_lr=MAX_LR, min_lr=MIN_LR, max_momentum=.9, min_momentum=.8,
+                                  tensor_values=tensor_values, lr_multipliers=lr_multipliers)
+
+    def get_optimizer(self, lr=0.01):
+        params = [torch.nn.Parameter(torch.zeros(3)), torch.nn.Parameter(torch.zeros(2))]
+        return torch.optim.SGD([{'params': params[:1]}, {'params': params[1:]}], lr=lr, momentum=0.5)
+
+    def test_in_place(self):
+        optimizer = self.get_optimizer()
+        scheduler = self.get_scheduler(optimizer, lr_multipliers=[0.5, 1])
+        expected = DummyOptimizer(numb_param_groups=2)
+        plain = self.get_scheduler(expected, tensor_values=False, lr_multipliers=[0.5, 1])
+
+        scheduler.batch_step()
+        plain.batch_step()
+        tensors = [(pg['lr'], pg['momentum']) for pg in optimizer.param_groups]
+        for _ in range(7):
+            scheduler.batch_step()
+            plain.batch_step()
+            for pg, (lr, momentum), expected_pg in zip(optimizer.param_groups, tensors, expected.param_groups):
+                self.assertIs(lr, pg['lr'])
+                self.assertIs(momentum, pg['momentum'])
+                self.assertEqual(0, lr.dim())
+                self.assertEqual(torch.float64, lr.dtype)
+                self.assertEqual(expected_pg['lr'], lr.item())
+                self.assertEqual(expected_pg['momentum'], momentum.item())
+        optimizer.step()
+
+    def test_existing_tensors(self):
+        optimizer = self.get_optimizer(lr=torch.tensor(0.01))
+        lr = optimizer.param_groups[0]['lr']
+        scheduler = self.get_scheduler(optimizer, tensor_values=False)
+        scheduler.batch_step()
+        self.assertIs(lr, optimizer.param_groups[0]['lr'])
+        self.assertAlmostEqual(MIN_LR, lr.item(), places=6)
+        self.assertIsInstance(optimizer.param_groups[0]['momentum'], float)
+
+    def test_lr_scheduler_protocol(self):
+        optimizer = self.get_optimizer()
+        scheduler = self.get_scheduler(optimizer)
+        self.assertEqual(-1, scheduler.last_epoch)
+        for _ in range(12):   # two past the end, keeps the last values
+            scheduler.step()
+        self.assertEqual(9, scheduler.last_epoch)
+        last_lr = scheduler.get_last_lr()
+        self.assertEqual(2, len(last_lr))
+        self.assertIsInstance(last_lr[0], float)
+        self.assertEqual([scheduler.get_currentLR()] * 2, last_lr)
+
+    def test_finder_sweep_exact(self):
+        optimizer = self.get_optimizer()
+        finder = LearningRateFinder(optimizer, min_lr=1e-5, max_lr=1.0, num_batches=50, mode='exponential',
+                                    tensor_values=True)
+        for idx in range(50):
+            finder.batch_step()
+            expected = finder.LR.value_at(idx, 50, max_val=1.0, min_val=1e-5)
+            self.assertEqual([expected] * 2, finder.get_last_lr())
@@ -0,0 +1,92 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import json
+import math
+import tempfile
+
+from hyperband import build_scheduler, hyperband, rung_budgets, successive_halving
+from .dummy_optimizer import DummyOptimizer
+
+def toy_trial(config, budget, checkpoint):
+    '''
+    "trains" a OneCycle_Scheduler for budget batches, resuming from checkpoint, runs in the pool
+    the loss is lowest for max_lr near 0.1 and goes down with the budget
+    '''
+    scheduler = build_scheduler(DummyOptimizer(), config, num_batches=20, numb_annihlation_batches=7,
+                                annihilation_divisor=10, min_lr=config['scheduler_args']['max_lr'] / 10,
+                                max_momentum=0.95, min_momentum=0.85)
+    work = 0
+    if os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            saved = json.load(f)
+        scheduler.load_state_dict(saved['scheduler'])
+        work = saved['work']
+
+    while scheduler.batch_idx < budget:
+        scheduler.batch_step()
+        work += 1
+
+    with open(checkpoint, 'w') as f:
+        json.dump({'scheduler': scheduler.state_dict(), 'work': work}, f)
+    return abs(math.log10(config['scheduler_args']['max_lr']) + 1) + 1.0 / budget
+
+def toy_config(max_lr):
+    return {'scheduler': 'OneCycle_Scheduler', 'scheduler_args': {'max_lr': max_lr}}
+
+def sample_config(rng):
+    return toy_config(10 ** rng.uniform(-3, 1))
+
+class TestRungBudgets(unittest.TestCase):
+    def test_budgets(self):
+        self.assertEqual([1, 3, 9, 27], rung_budgets(1, 27))
+        self.assertEqual([3, 9, 27], rung_budgets(2, 27))
+        self.assertEqual([2, 4, 8], rung_budgets(2, 8, eta=2))
+        self.assertEqual([27], rung_budgets(27, 27))
+
+class TestSuccessiveHalving(unittest.TestCase):
+    def test_promotes_and_resumes(self):
+        configs = [toy_config(max_lr) for max_lr in (1e-3, 1e-2, 0.1, 1.0, 3.0, 10.0, 0.05, 0.2, 30.0)]
+        with tempfile.TemporaryDirectory() as tmp:
+            result = successive_halving(toy_trial, configs, min_budget=1, max_budget=27, eta=3, max_workers=2,
+                                        checkpoint_dir=tmp)
+            self.assertEqual(0.1, result['best_config']['scheduler_args']['max_lr'])
+            self.assertAlmostEqual(1 / 27, result['best_loss'])
+
+            reached = sorted(trial['budget'] for trial in result['trials'])
+            self.assertEqual([1] * 6 + [3] * 2 + [27], reached)   # 9 -> 3 -> 1, the 9 rung keeps one
+            for trial in result['trials']:
+                with open(trial['checkpoint']) as f:
+                    saved = json.load(f)
+                self.assertEqual(trial['budget'], saved['work'])   # resumed, never retrained
+
+    def test_same_checkpoint_dir_twice(self):
+        # the second run starts its trials from scratch rather than from the first run's checkpoints
+        with tempfile.TemporaryDirectory() as tmp:
+            first = successive_halving(toy_trial, [toy_config(1.0), toy_config(0.1)], min_budget=1, max_budget=3,
+                                       max_workers=1, checkpoint_dir=tmp)
+            second = successive_halving(toy_trial, [toy_config(0.01), toy_config(10.0)], min_budget=1, max_budget=3,
+                                        max_workers=1, checkpoint_dir=tmp)
+            self.assertEqual(2, len(os.listdir(tmp)))
+            for trial in second['trials']:
+                self.assertNotIn(trial['checkpoint'], [other['checkpoint'] for other in first['trials']])
+                with open(trial['checkpoint']) as f:
+                    self.assertEqual(trial['budget'], json.load(f)['work'])
+            self.assertAlmostEqual(1 + 1 / 3, second['best_loss'])
+
+class TestHyperband(unittest.TestCase):
+    def test_brackets(self):
+        result = hyperband(toy_trial, sample_config, max_budget=9, min_budget=1, eta=3, seed=1, max_workers=2)
+        brackets = [trial['bracket'] for trial in result['trials']]
+        self.assertEqual([9, 5, 3], [brackets.count(b) for b in range(3)])
+        self.assertEqual(len(result['trials']), len({trial['id'] for trial in result['trials']}))
+        self.assertEqual(9, max(trial['budget'] for trial in result['trials']))
+        best = min(abs(math.log10(trial['config']['scheduler_args']['max_lr']) + 1)
+                   for trial in result['trials'] if trial['budget'] == 9)
+        self.assertAlmostEqual(best + 1 / 9, result['best_loss'])
@@ -0,0 +1,38 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+import subprocess
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+
+#the scheduler needs numpy and nothing heavier
+FORBIDDEN_MODULES = ['matplotlib', 'torch', 'torchvision']
+
+#microseconds, cumulative import time of the scheduler not counting numpy
+IMPORT_BUDGET_US = 50000
+
+def get_import_times(module):
+    '''
+    runs a fresh interpreter with -X importtime
+    :return: dict of module name: cumulative import time in microseconds
+    '''
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], cwd=rootDir,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+class TestImportTime(unittest.TestCase):
+    def test_scheduler_import(self):
+        times = get_import_times('cyclic_LR_scheduler')
+        for name in times:
+            self.assertNotIn(name.split('.')[0], FORBIDDEN_MODULES)
+
+        own_time = times['cyclic_LR_scheduler'] - times.get('numpy', 0)
+        self.assertLess(own_time, IMPORT_BUDGET_US)
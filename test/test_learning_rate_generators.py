@@ -0,0 +1,82 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import numpy as np
+from learning_rate_generators import get1Cycle_channels, get1Cycle_LR_and_Momentum, get1Cycle_LR_and_Momentum_batch, \
+    get1Cycle_schedule, get1CycleVals, OneCycleChannel
+from sequence_generators import CosignVals
+
+NUMB_BATCHES = 201
+NUMB_ANNIHILATION_BATCHES = 20
+ANNIHILATION_DIVISOR = 100
+MAX_LR = 1.0
+MIN_LR = 0.1
+MAX_MOMENTUM = 0.99
+MIN_MOMENTUM = 0.7
+
+ONE_CYCLE_ARGS = (NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, ANNIHILATION_DIVISOR, MAX_LR, MIN_LR, MAX_MOMENTUM,
+                  MIN_MOMENTUM)
+
+class TestGet1Cycle_schedule(unittest.TestCase):
+    def test_float64_matches_lists(self):
+        lrs, moms = get1Cycle_LR_and_Momentum(*ONE_CYCLE_ARGS)
+        schedule = get1Cycle_schedule(*ONE_CYCLE_ARGS, dtype=np.float64)
+        self.assertEqual(lrs, schedule['lr'].tolist())
+        self.assertEqual(moms, schedule['momentum'].tolist())
+
+    def test_get1CycleVals_out(self):
+        lrs = get1CycleVals(NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, ANNIHILATION_DIVISOR, MAX_LR, MIN_LR)
+        schedule = np.zeros(NUMB_BATCHES + NUMB_ANNIHILATION_BATCHES, dtype=[('lr', np.float64), ('step', np.int64)])
+        out = get1CycleVals(NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, ANNIHILATION_DIVISOR, MAX_LR, MIN_LR,
+                            out=schedule['lr'])
+        self.assertTrue(np.shares_memory(out, schedule))
+        self.assertEqual(lrs, schedule['lr'].tolist())
+        vals = get1CycleVals(NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, ANNIHILATION_DIVISOR, MAX_LR, MIN_LR,
+                             dtype=np.float32)
+        np.testing.assert_array_equal(np.float32(lrs), vals)
+
+    def test_float32(self):
+        lrs, moms = get1Cycle_LR_and_Momentum(*ONE_CYCLE_ARGS)
+        schedule = get1Cycle_schedule(*ONE_CYCLE_ARGS)
+        self.assertEqual(np.float32, schedule['lr'].dtype)
+        self.assertEqual(8, schedule.itemsize)
+        np.testing.assert_allclose(lrs, schedule['lr'], rtol=1e-6)
+        np.testing.assert_allclose(moms, schedule['momentum'], rtol=1e-6)
+
+class TestGet1Cycle_channels(unittest.TestCase):
+    def test_matches_single_channels(self):
+        channels = [('lr', OneCycleChannel(MAX_LR, MIN_LR, ANNIHILATION_DIVISOR)),
+                    ('weight_decay', OneCycleChannel(1e-3, 1e-4, annihlation_val=5e-4)),
+                    ('dampening', OneCycleChannel(0.5, 0.1, 10, seq_generator=CosignVals())),
+                    ('beta', OneCycleChannel(0.9, 0.3))]
+        schedule = get1Cycle_channels(NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, channels, dtype=np.float64)
+        self.assertEqual(('lr', 'weight_decay', 'dampening', 'beta'), schedule.dtype.names)
+        for name, channel in channels:
+            self.assertEqual(get1CycleVals(NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, channel.annihilation_divisor,
+                                           channel.max_val, channel.min_val, channel.annihlation_val,
+                                           channel.seq_generator), schedule[name].tolist())
+
+    def test_no_annihilation(self):
+        schedule = get1Cycle_channels(NUMB_BATCHES, 0, [('lr', OneCycleChannel(MAX_LR, MIN_LR))])
+        self.assertEqual(NUMB_BATCHES, len(schedule))
+
+class TestGet1Cycle_LR_and_Momentum_batch(unittest.TestCase):
+    def test_matches_single(self):
+        max_lrs = np.array([MAX_LR, MAX_LR / 2, MAX_LR * 3])
+        divisors = [ANNIHILATION_DIVISOR, 10, 1000]
+        lrs, moms = get1Cycle_LR_and_Momentum_batch(NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, divisors, max_lrs,
+                                                    max_lrs / 10, MAX_MOMENTUM, MIN_MOMENTUM)
+        self.assertEqual((3, NUMB_BATCHES + NUMB_ANNIHILATION_BATCHES), lrs.shape)
+        self.assertEqual(lrs.shape, moms.shape)
+        for k in range(3):
+            expected_lrs, expected_moms = get1Cycle_LR_and_Momentum(NUMB_BATCHES, NUMB_ANNIHILATION_BATCHES, divisors[k],
+                                                                    max_lrs[k], max_lrs[k] / 10, MAX_MOMENTUM,
+                                                                    MIN_MOMENTUM)
+            self.assertEqual(expected_lrs, lrs[k].tolist())
+            self.assertEqual(expected_moms, moms[k].tolist())
@@ -0,0 +1,52 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import numpy as np
+from cyclic_LR_scheduler import LearningRateFinder
+from lr_finder_sweep import merge_curves, run_range_tests
+from .dummy_optimizer import DummyOptimizer
+
+def toy_range_test(config):
+    '''
+    range test against a made up loss that bottoms out at lr=0.1, runs in the pool
+    '''
+    finder = LearningRateFinder(DummyOptimizer(), min_lr=config['min_lr'], max_lr=config['max_lr'], num_batches=100,
+                                mode='exponential', smoothing=0.0)
+    while True:
+        finder.batch_step()
+        lr = finder.get_currentLR()
+        if finder.record_loss(1.0 + abs(np.log10(lr) + 1)):
+            break
+
+    try:
+        import torch
+        threads = torch.get_num_threads()
+    except ImportError:
+        threads = None
+    return {'lrs': finder.lr_history, 'losses': finder.loss_history, 'threads': threads}
+
+class TestRunRangeTests(unittest.TestCase):
+    def test_sweep(self):
+        configs = [{'min_lr': 1e-4, 'max_lr': 1.0}, {'min_lr': 1e-3, 'max_lr': 10.0}]
+        sweep = run_range_tests(toy_range_test, configs, max_workers=2, threads_per_worker=1)
+
+        self.assertEqual(configs, sweep['configs'])
+        self.assertEqual((2, len(sweep['lr'])), sweep['losses'].shape)
+        self.assertAlmostEqual(1e-4, sweep['lr'][0])
+        self.assertAlmostEqual(0.1, sweep['best_lr'], delta=0.02)
+        for result in sweep['results']:
+            self.assertIn(result['threads'], (None, 1))
+
+    def test_merge_curves(self):
+        results = [{'lrs': [1e-3, 1e-2], 'losses': [2.0, 1.0]}, {'lrs': [1e-2, 1e-1], 'losses': [3.0, 4.0]}]
+        sweep = merge_curves(['a', 'b'], results, numb_points=3)
+        np.testing.assert_allclose([1e-3, 1e-2, 1e-1], sweep['lr'])
+        self.assertTrue(np.isnan(sweep['losses'][0, 2]))
+        np.testing.assert_allclose([2.0, 2.0, 4.0], sweep['mean_loss'])
+        self.assertAlmostEqual(1e-3, sweep['best_lr'])
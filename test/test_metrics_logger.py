@@ -0,0 +1,156 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+import csv
+import json
+import tempfile
+import threading
+import time
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import numpy as np
+from cyclic_LR_scheduler import OneCycle_Scheduler, LearningRateFinder
+from metrics_logger import MetricsLogger, make_logger
+from .dummy_optimizer import DummyOptimizer
+
+class ListSink(object):
+    def __init__(self, release=None):
+        self.records = []
+        self.closed = False
+        self.release = release   # optional event, write() waits on it
+
+    def write(self, records):
+        if self.release is not None:
+            self.release.wait()
+        self.records.extend(records.tolist())
+
+    def close(self):
+        self.closed = True
+
+class FailingSink(ListSink):
+    '''
+    write() raises OSError the first numb_failures times
+    '''
+    def __init__(self, numb_failures):
+        super().__init__()
+        self.numb_failures = numb_failures
+
+    def write(self, records):
+        if self.numb_failures:
+            self.numb_failures -= 1
+            raise OSError('disk full')
+        super().write(records)
+
+class FakeSummaryWriter(object):
+    def __init__(self):
+        self.scalars = []
+
+    def add_scalar(self, tag, value, global_step):
+        self.scalars.append((tag, value, global_step))
+
+class TestMetricsLogger(unittest.TestCase):
+    def test_ring_buffer_wraps(self):
+        sink = ListSink()
+        logger = MetricsLogger(sink, capacity=8, flush_interval=0.01)
+        for step in range(100):
+            logger.record(step, step / 100)
+            if step % 4 == 0:
+                logger.flush()
+        logger.close()
+        self.assertTrue(sink.closed)
+        self.assertEqual(0, logger.dropped)
+        self.assertEqual(list(range(100)), [r[0] for r in sink.records])
+
+    def test_drops_instead_of_blocking(self):
+        release = threading.Event()
+        sink = ListSink(release)
+        logger = MetricsLogger(sink, capacity=4, flush_interval=0.01)
+        for step in range(50):
+            logger.record(step, 0.1)
+        self.assertGreater(logger.dropped, 0)
+        release.set()
+        logger.close()
+        self.assertEqual(50, len(sink.records) + logger.dropped)
+
+    def test_sink_error(self):
+        sink = FailingSink(numb_failures=1)
+        logger = MetricsLogger(sink, capacity=64, flush_interval=0.005)
+        for step in range(5):
+            logger.record(step, 0.1)
+        logger._wake.set()
+        with self.assertRaises(OSError):
+            for step in range(5, 1000):   # raised from record once the background write failed
+                logger.record(step, 0.1)
+                time.sleep(0.001)
+        numb_recorded = step
+        logger.close()   # the failed batch is written again, nothing lost
+        self.assertTrue(sink.closed)
+        self.assertEqual(0, logger.dropped)
+        self.assertEqual(list(range(numb_recorded)), [r[0] for r in sink.records])
+
+        sink = FailingSink(numb_failures=1)
+        logger = MetricsLogger(sink, flush_interval=60)
+        logger.record(0, 0.1)
+        with self.assertRaises(OSError):
+            logger.flush()
+        logger.flush()
+        self.assertEqual([0], [r[0] for r in sink.records])
+
+        sink = FailingSink(numb_failures=1)
+        logger = MetricsLogger(sink, flush_interval=60)
+        logger.record(0, 0.1)
+        with self.assertRaises(OSError):
+            logger.close()
+        self.assertTrue(sink.closed)
+
+    def test_make_logger(self):
+        self.assertIsNone(make_logger(None))
+        with self.assertRaises(TypeError):
+            make_logger(3)
+
+class TestSchedulerWriter(unittest.TestCase):
+    NUMB_STEPS = 12
+
+    def run_scheduler(self, writer):
+        scheduler = OneCycle_Scheduler(DummyOptimizer(), num_batches=10, numb_annihlation_batches=2,
+                                       annihilation_divisor=10, max_lr=1.0, min_lr=0.1, max_momentum=.9,
+                                       min_momentum=.8, writer=writer)
+        for _ in range(self.NUMB_STEPS):
+            scheduler.batch_step()
+        scheduler.close()
+        return scheduler
+
+    def test_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.jsonl')
+            scheduler = self.run_scheduler(path)
+            with open(path) as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual(list(range(self.NUMB_STEPS)), [row['step'] for row in rows])
+        self.assertEqual(scheduler.lrs, [row['lr'] for row in rows])
+        self.assertEqual(scheduler.moms, [row['momentum'] for row in rows])
+        self.assertIsNone(rows[0]['step_time'])
+        self.assertGreaterEqual(rows[1]['step_time'], 0)
+
+    def test_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.csv')
+            scheduler = self.run_scheduler(path)
+            with open(path) as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(self.NUMB_STEPS, len(rows))
+        np.testing.assert_allclose(scheduler.lrs, [float(row['lr']) for row in rows])
+
+    def test_summary_writer(self):
+        writer = FakeSummaryWriter()
+        scheduler = LearningRateFinder(DummyOptimizer(), min_lr=0.1, max_lr=1.0, num_batches=5, writer=writer)
+        for _ in range(5):
+            scheduler.batch_step()
+        scheduler.close()
+        lrs = [(value, step) for tag, value, step in writer.scalars if tag == 'lr']
+        self.assertEqual(list(zip(scheduler._get_Vals(), range(5))), lrs)
+        self.assertFalse(any(tag == 'momentum' for tag, _, _ in writer.scalars))
@@ -7,6 +7,20 @@ import torch.optim as optim
 from torchvision import datasets, transforms
 import math
 
+# these use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+from cyclic_LR_scheduler import OneCycle_Scheduler, LearningRateFinder
+from lr_finder_sweep import run_range_tests
+from hyperband import build_scheduler, hyperband
+from training_snapshot import lr_range_test
+
+DATA_DIR = '../data'
+
 class Net(nn.Module):
     def __init__(self):
         super(Net, self).__init__()
@@ -27,22 +41,45 @@ class Net(nn.Module):
 
 
 def train(args, model, device, train_loader, optimizer, epoch, scheduler):
+    '''
+    :return: True if the scheduler is a learning rate finder that is done (loss diverged), stop training
+    '''
     model.train()
     for batch_idx, (data, target) in enumerate(train_loader):
+        scheduler.batch_step()   #the values for this batch, so the finder's losses line up with its learning rates
         data, target = data.to(device), target.to(device)
         optimizer.zero_grad()
         output = model(data)
         loss = F.nll_loss(output, target)
         loss.backward()
         optimizer.step()
-        scheduler.batch_step()
+
+        #learning rate finder watches the loss and quits once it diverges
+        if hasattr(scheduler, 'record_loss') and scheduler.record_loss(loss.item()):
+            print('Train Epoch: {} [{}/{}]\tlearning rate finder done at lr {:.6f}'.format(
+                epoch, batch_idx * len(data), len(train_loader.dataset), scheduler.get_currentLR()))
+            return True
 
         if batch_idx % args.log_interval == 0:
             print('Train Epoch: {} [{}/{} ({:.0f}%)]\tLoss: {:.6f}'.format(
                 epoch, batch_idx * len(data), len(train_loader.dataset),
                        100. * batch_idx / len(train_loader), loss.item()))
+    return False
 
 
+def train_step(model, device, optimizer, batch):
+    '''
+    one training batch
+    :return: loss as a python float
+    '''
+    model.train()
+    data, target = batch[0].to(device), batch[1].to(device)
+    optimizer.zero_grad()
+    loss = F.nll_loss(model(data), target)
+    loss.backward()
+    optimizer.step()
+    return loss.item()
+
 def test(args, model, device, test_loader):
     model.eval()
     test_loss = 0
@@ -60,6 +97,7 @@ def test(args, model, device, test_loader):
     print('\nTest set: Average loss: {:.4f}, Accuracy: {}/{} ({:.0f}%)\n'.format(
         test_loss, correct, len(test_loader.dataset),
         100. * correct / len(test_loader.dataset)))
+    return test_loss
 
 def parse_args():
     '''
@@ -88,23 +126,56 @@ def parse_args():
 
     parser.add_argument('--save-model', action='store_true', default=False,
                         help='For Saving the current Model')
+    parser.add_argument('--lr-sweep', action='store_true', default=False,
+                        help='run several learning rate range tests in parallel instead of training')
+    parser.add_argument('--hyperband', action='store_true', default=False,
+                        help='hyperband search over the 1cycle parameters instead of training, --epochs is the max budget')
+    parser.add_argument('--threads-per-worker', type=int, default=1, metavar='N',
+                        help='torch threads per range test or hyperband process (default: 1)')
     return parser.parse_args()
 
-def getOneCycle_Scheduler(args,optimizer, total_num_batches):
+def get_data_loaders(batch_size, test_batch_size, download=True, **kwargs):
+    '''
+    :return: MNIST train and test loaders
+    '''
+    train_loader = torch.utils.data.DataLoader(
+        datasets.MNIST(DATA_DIR, train=True, download=download,
+                       transform=transforms.Compose([
+                           transforms.ToTensor(),
+                           transforms.Normalize((0.1307,), (0.3081,))
+                       ])),
+        batch_size=batch_size, shuffle=True, **kwargs)
+    test_loader = torch.utils.data.DataLoader(
+        datasets.MNIST(DATA_DIR, train=False, transform=transforms.Compose([
+            transforms.ToTensor(),
+            transforms.Normalize((0.1307,), (0.3081,))
+        ])),
+        batch_size=test_batch_size, shuffle=True, **kwargs)
+    return train_loader, test_loader
+
+def getOneCycle_Scheduler(args,optimizer, total_num_batches, max_lr=None, min_lr=None):
+    '''
+    :param max_lr: defaults to args.lr
+    :param min_lr: defaults to max_lr/10
+    '''
     ANNIHILATION_PERCENTAGE = 0.1
     num_annihlation_batches = math.floor(total_num_batches * ANNIHILATION_PERCENTAGE)
     num_batches = total_num_batches - num_annihlation_batches
+    if max_lr is None:
+        max_lr = args.lr
+    if min_lr is None:
+        min_lr = max_lr/10
 
     scheduler = OneCycle_Scheduler(optimizer=optimizer, num_batches=num_batches,batch_size = args.batch_size,
                                       numb_annihlation_batches=num_annihlation_batches, annihilation_divisor=100,
-                                      max_lr=args.lr, min_lr=args.lr/10, max_momentum=args.momentum,
+                                      max_lr=max_lr, min_lr=min_lr, max_momentum=args.momentum,
                                       min_momentum=(args.momentum-(args.momentum/10)))
     return scheduler
 
-def getLearningRateFinderScheduler(args,optimizer, numb_batches, min_lr, max_lr):
+def getLearningRateFinderScheduler(args,optimizer, numb_batches, min_lr, max_lr, mode='exponential'):
 
     scheduler = LearningRateFinder(optimizer=optimizer,min_lr=min_lr, max_lr=max_lr, num_batches=numb_batches,
-                                    writer=None)
+                                    writer=None, mode=mode)
     return scheduler
 
 def main():
@@ -117,19 +188,7 @@ def main():
     device = torch.device("cuda" if use_cuda else "cpu")
 
     kwargs = {'num_workers': 1, 'pin_memory': True} if use_cuda else {}
-    train_loader = torch.utils.data.DataLoader(
-        datasets.MNIST('../data', train=True, download=True,
-                       transform=transforms.Compose([
-                           transforms.ToTensor(),
-                           transforms.Normalize((0.1307,), (0.3081,))
-                       ])),
-        batch_size=args.batch_size, shuffle=True, **kwargs)
-    test_loader = torch.utils.data.DataLoader(
-        datasets.MNIST('../data', train=False, transform=transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize((0.1307,), (0.3081,))
-        ])),
-        batch_size=args.test_batch_size, shuffle=True, **kwargs)
+    train_loader, test_loader = get_data_loaders(args.batch_size, args.test_batch_size, **kwargs)
 
     model = Net().to(device)
     optimizer = optim.SGD(model.parameters(), lr=args.lr, momentum=args.momentum)
@@ -137,13 +196,17 @@ def main():
     size_of_train_dataset = len(train_loader.dataset)
     total_num_batches = (size_of_train_dataset // args.batch_size + 1) * args.epochs
 
-    #lets try out this cyclic learning rate and
-    scheduler = getOneCycle_Scheduler(args,optimizer, total_num_batches)
+    #first the learning rate finder, sweeps up to one epoch but stops as soon as the loss diverges
+    #then model and optimizer are put back as they were, an in memory copy rather than a checkpoint
+    MAX_LR=10
+    MIN_LR=1e-4
+    model, (min_lr, max_lr), _ = lr_range_test(model, optimizer,
+                                               lambda batch: train_step(model, device, optimizer, batch),
+                                               train_loader, min_lr=MIN_LR, max_lr=MAX_LR)
+    print('suggested min_lr {:.6f}, max_lr {:.6f}'.format(min_lr, max_lr))
 
-    #or the learning rate finder
-    MAX_LR=.5
-    MIN_LR=.01
-    scheduler = getLearningRateFinderScheduler(args, optimizer, total_num_batches, min_lr=MIN_LR, max_lr=MAX_LR)
+    #then train from the same starting point with this cyclic learning rate over the suggested range
+    scheduler = getOneCycle_Scheduler(args,optimizer, total_num_batches, max_lr=max_lr, min_lr=min_lr)
 
     for epoch in range(1, args.epochs + 1):
         train(args, model, device, train_loader, optimizer, epoch, scheduler)
@@ -152,13 +215,101 @@ def main():
     if (args.save_model):
         torch.save(model.state_dict(), "mnist_cnn.pt")
 
+def range_test(config):
+    '''
+    one learning rate range test on the cpu, runs in a worker process of lr_finder_sweep.run_range_tests
+    :param config: dict with min_lr, max_lr, seed, batch_size
+                   optional num_batches (default one epoch), mode (default 'exponential'), momentum (default 0.5)
+    :return: dict with the recorded lrs and smoothed losses plus the finder's suggested (min_lr, max_lr)
+    '''
+    torch.manual_seed(config['seed'])
+    train_loader, _ = get_data_loaders(config['batch_size'], config['batch_size'], download=False)
+
+    model = Net()
+    optimizer = optim.SGD(model.parameters(), lr=config['min_lr'], momentum=config.get('momentum', 0.5))
+    finder = LearningRateFinder(optimizer, min_lr=config['min_lr'], max_lr=config['max_lr'],
+                                num_batches=config.get('num_batches', len(train_loader)),
+                                mode=config.get('mode', 'exponential'))
+
+    args = argparse.Namespace(log_interval=len(train_loader))   # quiet
+    epoch = 1
+    while not train(args, model, torch.device('cpu'), train_loader, optimizer, epoch, finder):
+        epoch += 1
+    return {'lrs': finder.lr_history, 'losses': finder.loss_history, 'suggested': finder.suggest_lr_range()}
+
+def sweep_main():
+    '''
+    range tests over a few lr ranges and seeds at once, one process each
+    '''
+    args = parse_args()
+    get_data_loaders(args.batch_size, args.test_batch_size)   # download once, before the workers start
+
+    configs = [{'min_lr': min_lr, 'max_lr': max_lr, 'seed': args.seed + seed, 'batch_size': args.batch_size}
+               for min_lr, max_lr in [(1e-5, 1.0), (1e-4, 10.0)] for seed in range(2)]
+    sweep = run_range_tests(range_test, configs, threads_per_worker=args.threads_per_worker)
+
+    for config, result in zip(sweep['configs'], sweep['results']):
+        print('{}\tsuggested min_lr {:.6f}, max_lr {:.6f}'.format(config, *result['suggested']))
+    print('lowest mean loss at lr {:.6f}'.format(sweep['best_lr']))
+
+def hyperband_trial(config, budget, checkpoint):
+    '''
+    trains one configuration on the cpu up to budget epochs, resuming from checkpoint if a lower rung saved one
+    runs in a worker process of hyperband.hyperband
+    :param config: dict with scheduler, scheduler_args (see hyperband.build_scheduler), seed, batch_size, epochs
+                   the 1cycle schedule spans all epochs, the max budget
+    :return: test set loss
+    '''
+    torch.manual_seed(config['seed'])
+    train_loader, test_loader = get_data_loaders(config['batch_size'], 1000, download=False)
+
+    model = Net()
+    optimizer = optim.SGD(model.parameters(), lr=config['scheduler_args']['max_lr'])
+    total_num_batches = len(train_loader) * config['epochs']
+    num_annihlation_batches = math.floor(total_num_batches * 0.1)
+    scheduler = build_scheduler(optimizer, config, num_batches=total_num_batches - num_annihlation_batches,
+                                numb_annihlation_batches=num_annihlation_batches, batch_size=config['batch_size'])
+
+    epoch = 0
+    if os.path.exists(checkpoint):
+        state = torch.load(checkpoint)
+        model.load_state_dict(state['model'])
+        optimizer.load_state_dict(state['optimizer'])
+        scheduler.load_state_dict(state['scheduler'])
+        epoch = state['epoch']
+
+    args = argparse.Namespace(log_interval=len(train_loader))   # quiet
+    for epoch in range(epoch + 1, budget + 1):
+        train(args, model, torch.device('cpu'), train_loader, optimizer, epoch, scheduler)
+    torch.save({'model': model.state_dict(), 'optimizer': optimizer.state_dict(),
+                'scheduler': scheduler.state_dict(), 'epoch': budget}, checkpoint)
+    return test(args, model, torch.device('cpu'), test_loader)
+
+def hyperband_main():
+    '''
+    hyperband over max_lr, annihilation_divisor and the momentum bounds, a process per trial
+    '''
+    args = parse_args()
+    get_data_loaders(args.batch_size, args.test_batch_size)   # download once, before the workers start
+
+    def sample_config(rng):
+        max_momentum = rng.uniform(0.85, 0.99)
+        max_lr = 10 ** rng.uniform(-3, 0)
+        return {'scheduler': 'OneCycle_Scheduler', 'seed': args.seed, 'batch_size': args.batch_size,
+                'epochs': args.epochs,
+                'scheduler_args': {'max_lr': max_lr, 'min_lr': max_lr / 10,
+                                   'annihilation_divisor': 10 ** rng.uniform(1, 3),
+                                   'max_momentum': max_momentum, 'min_momentum': max_momentum - 0.1}}
+
+    result = hyperband(hyperband_trial, sample_config, max_budget=args.epochs,
+                       threads_per_worker=args.threads_per_worker)
+    print('best test loss {:.4f} with {}'.format(result['best_loss'], result['best_config']['scheduler_args']))
+
 if __name__ == '__main__':
-    if __package__ is None:
-        import sys
-        from os import path
-        sys.path.append( path.dirname( path.dirname( path.abspath(__file__) ) ) )
-        from cyclic_LR_scheduler import OneCycle_Scheduler, LearningRateFinder
+    args = parse_args()
+    if args.lr_sweep:
+        sweep_main()
+    elif args.hyperband:
+        hyperband_main()
     else:
-        from ..cyclic_LR_scheduler import OneCycle_Scheduler, LearningRateFinder
-
-    main()
+        main()
@@ -0,0 +1,150 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+from cyclic_LR_scheduler import CyclicLR_Scheduler, OneCycle_Scheduler
+from population_scheduler import CyclicPopulation, OneCyclePopulation, PopulationScheduler
+from sequence_generators import CosignVals, TriangularVals
+from .dummy_optimizer import DummyOptimizer
+
+ONE_CYCLE_ARGS = {'num_batches': [20, 31, 10, 2], 'numb_annihlation_batches': [5, 0, 7, 1],
+                  'annihilation_divisor': 100, 'max_lr': [0.5, 1.0, 2.0, 4.0], 'min_lr': [0.1, 0.1, 0.2, 0.05],
+                  'max_momentum': 0.95, 'min_momentum': 0.85}
+STEP_SIZES = [[1, 1], [1, 2, 1], [2], [1, 1, 1]]
+CYCLIC_ARGS = {'min_lr': 0.1, 'max_lr': [0.5, 1.0, 2.0, 4.0], 'numb_images_in_dataset': 50, 'batch_size': 10,
+               'LR': TriangularVals(), 'LR_anneal': CosignVals(), 'step_size': STEP_SIZES}
+
+def member_args(args, member):
+    return {key: val[member] if isinstance(val, list) else val for key, val in args.items()}
+
+def step_all(schedulers):
+    for scheduler in schedulers:
+        try:
+            scheduler.batch_step()
+        except StopIteration:
+            pass
+
+def get_one_cycle(numb_param_groups=1):
+    optimizers = [DummyOptimizer(numb_param_groups) for _ in range(4)]
+    population = OneCyclePopulation(optimizers, **ONE_CYCLE_ARGS)
+    schedulers = [OneCycle_Scheduler(DummyOptimizer(numb_param_groups), **member_args(ONE_CYCLE_ARGS, member))
+                  for member in range(4)]
+    return population, schedulers
+
+def get_cyclic():
+    optimizers = [DummyOptimizer() for _ in range(4)]
+    population = CyclicPopulation(optimizers, **CYCLIC_ARGS)
+    schedulers = [CyclicLR_Scheduler(DummyOptimizer(), **dict(member_args(CYCLIC_ARGS, member),
+                                                              step_size=STEP_SIZES[member]))
+                  for member in range(4)]
+    return population, schedulers
+
+class TestPopulationScheduler(unittest.TestCase):
+    def assertMatches(self, population, schedulers):
+        self.assertEqual([scheduler.optimizer.param_groups for scheduler in schedulers],
+                         [optimizer.param_groups for optimizer in population.optimizers])
+
+    def test_one_cycle_matches(self):
+        population, schedulers = get_one_cycle(numb_param_groups=2)
+        self.assertEqual([scheduler.numb_steps for scheduler in schedulers], population.numb_steps.tolist())
+        for _ in range(population.numb_steps.max()):
+            population.batch_step()
+            step_all(schedulers)
+            self.assertMatches(population, schedulers)
+        self.assertTrue(population.done.all())
+        with self.assertRaises(StopIteration):
+            population.batch_step()
+
+    def test_cyclic_matches(self):
+        population, schedulers = get_cyclic()
+        self.assertEqual([scheduler.numb_steps for scheduler in schedulers], population.numb_steps.tolist())
+        for _ in range(population.numb_steps.max()):
+            population.batch_step()
+            step_all(schedulers)
+            self.assertMatches(population, schedulers)
+            self.assertEqual([scheduler.get_currentLR() for scheduler in schedulers],
+                             population.get_currentLR().tolist())
+        with self.assertRaises(StopIteration):
+            population.batch_step()
+
+    def test_finished_members_keep_values(self):
+        population, _ = get_one_cycle()
+        for _ in range(12):   # member 3 is done after 3 steps
+            population.batch_step()
+        self.assertEqual([False, False, False, True], population.done.tolist())
+        self.assertEqual(3, population.batch_idx[3])
+        last = dict(population.optimizers[3].param_groups[0])
+        population.batch_step()
+        self.assertEqual(last, population.optimizers[3].param_groups[0])
+
+    def test_exploit(self):
+        population, schedulers = get_cyclic()
+        for _ in range(7):
+            population.batch_step()
+            step_all(schedulers)
+        population.exploit(dst=0, src=2)
+        self.assertEqual(population.member_state(2), population.member_state(0))
+        for _ in range(5):
+            population.batch_step()
+            step_all(schedulers)
+            self.assertEqual(schedulers[2].optimizer.param_groups, population.optimizers[0].param_groups)
+
+    def test_perturb(self):
+        population, _ = get_one_cycle()
+        for _ in range(6):
+            population.batch_step()
+        population.perturb(1, 'max_lr', 1.5)
+        population.batch_step()
+
+        args = dict(member_args(ONE_CYCLE_ARGS, 1), max_lr=1.5)
+        scheduler = OneCycle_Scheduler(DummyOptimizer(), **args)
+        for _ in range(7):
+            scheduler.batch_step()
+        self.assertEqual(scheduler.optimizer.param_groups, population.optimizers[1].param_groups)
+        with self.assertRaises(ValueError):
+            population.perturb(1, 'batch_idx', 2)
+
+    def test_perturb_int_fields(self):
+        population, _ = get_one_cycle()
+        for name in ('num_batches', 'numb_annihlation_batches', 'unknown'):
+            with self.assertRaises(ValueError):
+                population.perturb(1, name, 1.5)
+        self.assertEqual(ONE_CYCLE_ARGS['num_batches'], population.num_batches.tolist())
+        cyclic, _ = get_cyclic()
+        with self.assertRaises(ValueError):
+            cyclic.perturb(1, 'cycle_lengths', 1.5)
+        cyclic.perturb(1, 'min_lr', 1.5)
+        self.assertEqual(0.1 * 1.5, cyclic.min_lr[1])
+
+    def test_state_dict(self):
+        population, schedulers = get_one_cycle()
+        for _ in range(9):
+            population.batch_step()
+            step_all(schedulers)
+        state = population.state_dict()
+
+        restored = OneCyclePopulation([DummyOptimizer() for _ in range(4)], **dict(ONE_CYCLE_ARGS, max_lr=3.0))
+        restored.load_state_dict(state)
+        self.assertEqual(state, restored.state_dict())
+        for _ in range(5):
+            restored.batch_step()
+            step_all(schedulers)
+            self.assertMatches(restored, schedulers)
+        with self.assertRaises(ValueError):
+            get_cyclic()[0].load_state_dict(state)
+
+class TestVectorizedPopulationScheduler(TestPopulationScheduler):
+    '''
+    the same, through the numpy path larger populations take
+    '''
+    def setUp(self):
+        self.vectorize_min_members = PopulationScheduler.VECTORIZE_MIN_MEMBERS
+        PopulationScheduler.VECTORIZE_MIN_MEMBERS = 0
+
+    def tearDown(self):
+        PopulationScheduler.VECTORIZE_MIN_MEMBERS = self.vectorize_min_members
@@ -0,0 +1,78 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+from cyclic_LR_scheduler import Piecewise_Scheduler
+from learning_rate_generators import get1CycleVals, getCosignAnnealedLinearDecreasingLRs
+from schedule_compiler import ScheduleBuilder, compile1Cycle, compileCosignAnnealedLinearDecreasing
+from sequence_generators import ReverseTriangularVals
+from .dummy_optimizer import DummyOptimizer
+
+class TestCompiledSchedule(unittest.TestCase):
+    def test_matches_1cycle(self):
+        self.assertEqual(get1CycleVals(201, 20, 100, 1.0, 0.1), compile1Cycle(201, 20, 100, 1.0, 0.1).getVals())
+        schedule = compile1Cycle(201, 20, 1, 0.99, 0.7, annihlation_val=0.99, seq_generator=ReverseTriangularVals())
+        self.assertEqual(get1CycleVals(201, 20, 1, 0.99, 0.7, annihlation_val=0.99,
+                                       seq_generator=ReverseTriangularVals()), schedule.getVals())
+
+    def test_matches_cosign_annealed(self):
+        schedule = compileCosignAnnealedLinearDecreasing(30, 9, 1.0, 0.1)
+        self.assertEqual(30, len(schedule.segments))
+        self.assertEqual(getCosignAnnealedLinearDecreasingLRs(30, 9, 1.0, 0.1),
+                         [schedule.value_at(step) for step in range(len(schedule))])
+
+    def test_builder(self):
+        schedule = ScheduleBuilder().warmup(5, 0.0, 1.0).constant(0, 7.0).cosine(11, 1.0, 0.1).linear(4, 0.1, 0.0)\
+            .constant(3, 0.5).compile()
+        self.assertEqual(23, len(schedule))
+        self.assertEqual([0, 5, 5, 16, 20], schedule.starts.tolist())
+        vals = schedule.getVals()
+        self.assertEqual([0.0, 0.25, 0.5, 0.75, 1.0], vals[:5])   # warmup, empty constant skipped
+        self.assertEqual(1.0, vals[5])
+        self.assertAlmostEqual(0.1, vals[15])
+        self.assertEqual(0.0, vals[19])
+        self.assertEqual([0.5] * 3, vals[20:])
+        self.assertEqual(vals, [schedule.value_at(step) for step in range(23)])
+
+        with self.assertRaises(IndexError):
+            schedule.value_at(23)
+        with self.assertRaises(IndexError):
+            schedule.values_at([0, -1])
+
+class TestPiecewise_Scheduler(unittest.TestCase):
+    def get_scheduler(self, optimizer):
+        lrs = ScheduleBuilder().warmup(5, 0.01, 1.0).cosine(10, 1.0, 0.01).compile()
+        moms = ScheduleBuilder().linear(5, 0.95, 0.85).linear(10, 0.85, 0.95).compile()
+        return Piecewise_Scheduler(optimizer, lr_schedule=lrs, momentum_schedule=moms)
+
+    def test_batch_step(self):
+        optimizer = DummyOptimizer()
+        scheduler = self.get_scheduler(optimizer)
+        vals = []
+        for _ in range(15):
+            scheduler.batch_step()
+            vals.append((optimizer.param_groups[0]['lr'], optimizer.param_groups[0]['momentum']))
+        self.assertEqual(list(scheduler._get_Vals()), vals)
+        with self.assertRaises(StopIteration):
+            scheduler.batch_step()
+
+    def test_state_dict(self):
+        optimizer = DummyOptimizer()
+        scheduler = self.get_scheduler(optimizer)
+        for _ in range(7):
+            scheduler.batch_step()
+        resumed = self.get_scheduler(DummyOptimizer())
+        resumed.load_state_dict(scheduler.state_dict())
+        scheduler.batch_step()
+        resumed.batch_step()
+        self.assertEqual(scheduler.get_currentLR(), resumed.get_currentLR())
+
+    def test_short_momentum(self):
+        with self.assertRaises(ValueError):
+            Piecewise_Scheduler(DummyOptimizer(), lr_schedule=ScheduleBuilder().constant(5, 0.1).compile(),
+                                momentum_schedule=ScheduleBuilder().constant(4, 0.9).compile())
@@ -0,0 +1,102 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+import json
+import tempfile
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import numpy as np
+from schedule_export import export_schedule, main, MinMaxDecimator, scheduler_from_config
+from sequence_generators import CosignVals
+
+try:
+    import matplotlib
+except ImportError:
+    matplotlib = None
+
+ONE_CYCLE_CONFIG = {'scheduler': 'OneCycle_Scheduler',
+                    'scheduler_args': {'num_batches': 1000, 'numb_annihlation_batches': 101, 'annihilation_divisor': 100,
+                                       'max_lr': 1.0, 'min_lr': 0.1, 'max_momentum': 0.95, 'min_momentum': 0.85}}
+CYCLIC_CONFIG = {'scheduler': 'CyclicLR_Scheduler',
+                 'scheduler_args': {'min_lr': 0.1, 'max_lr': 1.0, 'numb_images_in_dataset': 1000, 'batch_size': 10,
+                                    'step_size': [1, 2, 1], 'LR': 'TriangularVals', 'LR_anneal': 'CosignVals'}}
+PIECEWISE_CONFIG = {'scheduler': 'Piecewise_Scheduler',
+                    'scheduler_args': {'lr_schedule': [['LinearIncreaseVals', 50, 1.0, 0.01],
+                                                       ['CosignVals', 500, 1.0, 0.01]]}}
+
+class TestSchedulerFromConfig(unittest.TestCase):
+    def test_generators(self):
+        scheduler = scheduler_from_config(CYCLIC_CONFIG)
+        self.assertIsInstance(scheduler.LR_anneal, CosignVals)
+        self.assertEqual(2 * 4 * 100, scheduler.numb_steps)
+
+    def test_piecewise(self):
+        scheduler = scheduler_from_config(json.dumps(PIECEWISE_CONFIG))
+        self.assertEqual(550, scheduler.numb_steps)
+        self.assertEqual(PIECEWISE_CONFIG['scheduler_args']['lr_schedule'],
+                         [list(segment) for segment in scheduler.lr_schedule.describe()])
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            scheduler_from_config({'scheduler': 'StepLR', 'scheduler_args': {}})
+        with self.assertRaises(ValueError):
+            scheduler_from_config(dict(CYCLIC_CONFIG, scheduler_args=dict(CYCLIC_CONFIG['scheduler_args'],
+                                                                          LR='get1CycleVals')))
+
+class TestMinMaxDecimator(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.RandomState(0)
+        for numb_steps, numb_bins, chunk_size in [(1000, 7, 64), (1001, 1000, 10), (50, 200, 3), (97, 10, 97)]:
+            vals = rng.rand(numb_steps)
+            decimator = MinMaxDecimator(numb_steps, numb_bins)
+            for start in range(0, numb_steps, chunk_size):
+                decimator.add(start, {'lr': vals[start:start + chunk_size]})
+
+            bins = np.arange(numb_steps) * decimator.numb_bins // numb_steps
+            self.assertEqual(min(numb_bins, numb_steps), len(decimator.mins['lr']))
+            for idx in range(decimator.numb_bins):
+                self.assertEqual(vals[bins == idx].min(), decimator.mins['lr'][idx])
+                self.assertEqual(vals[bins == idx].max(), decimator.maxs['lr'][idx])
+                self.assertEqual(np.flatnonzero(bins == idx).mean(), decimator.steps[idx])
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_npy_and_csv(self):
+        for config in (ONE_CYCLE_CONFIG, CYCLIC_CONFIG, PIECEWISE_CONFIG):
+            scheduler = scheduler_from_config(config)
+            expected = scheduler.values_between(0, scheduler.numb_steps)
+            export_schedule(scheduler, self.path('schedule.npy'), self.path('schedule.csv'), chunk_size=128)
+
+            schedule = np.load(self.path('schedule.npy'))
+            self.assertEqual(list(expected), list(schedule.dtype.names))
+            for key, val in expected.items():
+                np.testing.assert_array_equal(val, schedule[key])
+
+            csv = np.genfromtxt(self.path('schedule.csv'), delimiter=',', names=True)
+            np.testing.assert_array_equal(np.arange(scheduler.numb_steps), csv['step'])
+            for key, val in expected.items():
+                np.testing.assert_array_equal(val, csv[key])   # %.17g round trips
+
+    def test_float32(self):
+        scheduler = scheduler_from_config(ONE_CYCLE_CONFIG)
+        export_schedule(scheduler, self.path('schedule.npy'), dtype=np.float32)
+        self.assertEqual(np.float32, np.load(self.path('schedule.npy'))['lr'].dtype)
+
+    @unittest.skipIf(matplotlib is None, 'needs matplotlib')
+    def test_png(self):
+        main([json.dumps(ONE_CYCLE_CONFIG), '--png', self.path('schedule.png'), '--width', '300', '--height', '200',
+              '--chunk-size', '100'])
+        with open(self.path('schedule.png'), 'rb') as f:
+            self.assertEqual(b'\x89PNG', f.read(4))
@@ -0,0 +1,71 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import numpy as np
+from learning_rate_generators import getCosignAnnealedLinearDecreasingLRs
+from sequence_cache import DEFAULT_CACHE, SequenceCache, cached_vals
+from sequence_generators import CosignVals, LinearIncreaseVals, TriangularVals, Vals
+
+class ScaledVals(Vals):
+    '''
+    generator with a parameter, must not share cache entries across scales
+    '''
+    def __init__(self, scale):
+        self.scale = scale
+
+    def getVals(self, numb_iterations, max_val, min_val):
+        return (self.scale * np.asarray(LinearIncreaseVals().getVals(numb_iterations, max_val, min_val))).tolist()
+
+class TestSequenceCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = SequenceCache()
+        vals = cached_vals(TriangularVals(), 11, 1.0, 0.1, cache=cache)
+        self.assertEqual(TriangularVals().getVals(11, 1.0, 0.1), vals.tolist())
+        self.assertIs(vals, cached_vals(TriangularVals(), 11, 1.0, 0.1, cache=cache))
+        cached_vals(TriangularVals(), 11, 1.0, 0.2, cache=cache)
+        cached_vals(TriangularVals(), 11, 1.0, 0.1, dtype=np.float32, cache=cache)
+        cached_vals(CosignVals(), 11, 1.0, 0.1, cache=cache)
+        info = cache.info()
+        self.assertEqual((1, 4, 4), (info['hits'], info['misses'], info['entries']))
+
+    def test_read_only(self):
+        vals = cached_vals(TriangularVals(), 11, 1.0, 0.1, cache=SequenceCache())
+        with self.assertRaises(ValueError):
+            vals[0] = 5
+
+    def test_memory_limit(self):
+        cache = SequenceCache(max_bytes=3 * 100 * 8)
+        for max_val in [1.0, 2.0, 3.0, 4.0]:
+            cached_vals(LinearIncreaseVals(), 100, max_val, 0.1, cache=cache)
+        self.assertEqual(3, cache.info()['entries'])
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+
+        cached_vals(LinearIncreaseVals(), 100, 1.0, 0.1, cache=cache)   # evicted first
+        self.assertEqual(0, cache.hits)
+        cached_vals(LinearIncreaseVals(), 100, 4.0, 0.1, cache=cache)
+        self.assertEqual(1, cache.hits)
+
+        cached_vals(LinearIncreaseVals(), 1000, 1.0, 0.1, cache=cache)   # too big to keep
+        self.assertEqual(3, cache.info()['entries'])
+        cache.resize(100 * 8)
+        self.assertEqual(1, cache.info()['entries'])
+
+    def test_generator_attributes(self):
+        cache = SequenceCache()
+        self.assertEqual(2 * cached_vals(ScaledVals(1), 5, 1.0, 0.0, cache=cache)[-1],
+                         cached_vals(ScaledVals(2), 5, 1.0, 0.0, cache=cache)[-1])
+        self.assertEqual(2, cache.misses)
+
+    def test_annealed_cycles_not_cached(self):
+        # every annealed cycle has its own max_val, caching them would only evict the reused ones
+        before = DEFAULT_CACHE.info()
+        lrs = getCosignAnnealedLinearDecreasingLRs(200, 20, 1.0, 0.1)
+        self.assertEqual(200 * 20, len(lrs))
+        after = DEFAULT_CACHE.info()
+        self.assertEqual((before['misses'], before['entries']), (after['misses'], after['entries']))
@@ -13,8 +13,10 @@ rootDir = os.path.abspath(os.path.join(currDir, '..'))
 if rootDir not in sys.path: # add parent dir to paths
     sys.path.append(rootDir)
 
+import numpy as np
 from  learning_rate_generators import CosignVals, LinearDecrease, LinearIncreaseVals, TriangularVals, \
             ReverseTriangularVals
+from sequence_generators import ExponentialIncreaseVals
 
 NUMB_EVEN_SAMPLES=10
 NUMB_ODD_SAMPLES=9
@@ -82,3 +84,89 @@ class TestReverseTriangular(TBase):
         self.assertAlmostEqual(self.ls[numb_samples - 1], MAX_VAL)
         midval = numb_samples // 2 + numb_samples % 2 - 1
         self.assertAlmostEqual(self.ls[midval], MIN_VAL)  # verify middle
+
+class TestValueAt(unittest.TestCase):
+    '''
+    value_at and values_at must match getVals exactly, including the odd length midpoints
+    '''
+    GENERATORS = [CosignVals, LinearDecrease, LinearIncreaseVals, TriangularVals, ReverseTriangularVals]
+
+    def test_value_at(self):
+        for gen in self.GENERATORS:
+            for numb_samples in [1, 2, 3, NUMB_ODD_SAMPLES, NUMB_EVEN_SAMPLES, 101]:
+                ls = list(gen().getVals(max_val=MAX_VAL, min_val=MIN_VAL, numb_iterations=numb_samples))
+                vals = [gen().value_at(i, numb_samples, MAX_VAL, MIN_VAL) for i in range(numb_samples)]
+                self.assertEqual(ls, vals, gen.__name__)
+
+    def test_values_at(self):
+        for gen in self.GENERATORS:
+            for numb_samples in [1, 2, 3, NUMB_ODD_SAMPLES, NUMB_EVEN_SAMPLES, 101]:
+                ls = list(gen().getVals(max_val=MAX_VAL, min_val=MIN_VAL, numb_iterations=numb_samples))
+                vals = gen().values_at(range(numb_samples), numb_samples, MAX_VAL, MIN_VAL).tolist()
+                self.assertEqual(ls, vals, gen.__name__)
+
+    def test_out_of_range(self):
+        with self.assertRaises(IndexError):
+            TriangularVals().value_at(NUMB_EVEN_SAMPLES, NUMB_EVEN_SAMPLES, MAX_VAL, MIN_VAL)
+
+class TestValsBatch(unittest.TestCase):
+    def test_getVals_batch(self):
+        max_vals = [MAX_VAL, 2 * MAX_VAL, 3 * MAX_VAL]
+        min_vals = [MIN_VAL, MIN_VAL / 2, MIN_VAL / 3]
+        for gen in TestValueAt.GENERATORS:
+            for numb_samples in [NUMB_ODD_SAMPLES, NUMB_EVEN_SAMPLES]:
+                batch = gen().getVals_batch(numb_samples, max_vals, min_vals)
+                self.assertEqual((len(max_vals), numb_samples), batch.shape)
+                for row, max_val, min_val in zip(batch, max_vals, min_vals):
+                    self.assertEqual(list(gen().getVals(numb_samples, max_val, min_val)), row.tolist())
+
+    def test_broadcast(self):
+        batch = TriangularVals().getVals_batch(NUMB_ODD_SAMPLES, [MAX_VAL, 2 * MAX_VAL], MIN_VAL)
+        self.assertEqual((2, NUMB_ODD_SAMPLES), batch.shape)
+        self.assertEqual(MIN_VAL, batch[1, 0])
+
+class TestGetValsOut(unittest.TestCase):
+    '''
+    getVals(out=..., dtype=...) fills in place, float64 bit for bit the same as the lists,
+    other dtypes the float64 values rounded once
+    '''
+    GENERATORS = TestValueAt.GENERATORS + [ExponentialIncreaseVals]
+    # past 1 << 16 to go over the chunk boundary
+    LENGTHS = [0, 1, 2, 3, NUMB_ODD_SAMPLES, NUMB_EVEN_SAMPLES, 101, (1 << 16) + 3]
+
+    def test_out(self):
+        for gen in self.GENERATORS:
+            for numb_samples in self.LENGTHS:
+                if numb_samples == 0 and gen in (TriangularVals, ReverseTriangularVals):
+                    continue   # the lists fail on empty cycles
+                ls = list(gen().getVals(numb_samples, MAX_VAL, MIN_VAL))
+                buffer = np.zeros(2 * numb_samples)
+                out = buffer[1::2]   # strided view
+                self.assertIs(out, gen().getVals(numb_samples, MAX_VAL, MIN_VAL, out=out))
+                self.assertEqual(ls, out.tolist(), gen.__name__)
+                self.assertFalse(buffer[::2].any())
+
+    def test_dtype(self):
+        for gen in self.GENERATORS:
+            for numb_samples in self.LENGTHS[1:]:
+                ls = np.asarray(gen().getVals(numb_samples, MAX_VAL, MIN_VAL))
+                vals = gen().getVals(numb_samples, MAX_VAL, MIN_VAL, dtype=np.float32)
+                self.assertEqual(np.float32, vals.dtype)
+                np.testing.assert_array_equal(ls.astype(np.float32), vals, gen.__name__)
+
+    def test_return_types(self):
+        self.assertIsInstance(TriangularVals().getVals(NUMB_ODD_SAMPLES, MAX_VAL, MIN_VAL), list)
+        self.assertIsInstance(TriangularVals().getVals(NUMB_ODD_SAMPLES, MAX_VAL, MIN_VAL, dtype=float), np.ndarray)
+
+    def test_wrong_length(self):
+        with self.assertRaises(ValueError):
+            TriangularVals().getVals(NUMB_ODD_SAMPLES, MAX_VAL, MIN_VAL, out=np.empty(NUMB_EVEN_SAMPLES))
+
+    def test_fill(self):
+        for gen in self.GENERATORS:
+            ls = list(gen().getVals(NUMB_ODD_SAMPLES, MAX_VAL, MIN_VAL))
+            out = np.zeros(NUMB_ODD_SAMPLES)
+            self.assertIs(out, gen().fill(out, MAX_VAL, MIN_VAL))
+            self.assertEqual(ls, out.tolist(), gen.__name__)
+        with self.assertRaises(ValueError):
+            TriangularVals().fill(np.empty((2, NUMB_ODD_SAMPLES)), MAX_VAL, MIN_VAL)
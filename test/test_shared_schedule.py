@@ -0,0 +1,101 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+import json
+import subprocess
+import tempfile
+import uuid
+
+import numpy as np
+from cyclic_LR_scheduler import OneCycle_Scheduler
+from learning_rate_generators import get1Cycle_schedule
+from shared_schedule import share_1cycle_schedule
+from .dummy_optimizer import DummyOptimizer
+
+CONFIG = dict(num_batches=21, numb_annihlation_batches=5, annihilation_divisor=100, max_lr=1.0, min_lr=0.1,
+              max_momentum=.99, min_momentum=.7)
+
+def rank_lrs(location, rank):
+    '''
+    a non zero rank, runs in another process
+    '''
+    with share_1cycle_schedule(location, rank=rank, timeout=10, **CONFIG) as table:
+        return table.schedule['lr'].tolist()
+
+def rank_lrs_in_new_process(location):
+    '''
+    rank_lrs in a python started on its own like torchrun's ranks, not forked from this one
+    '''
+    code = 'import json, sys; sys.path.insert(0, {!r}); from test.test_shared_schedule import rank_lrs; ' \
+           'print(json.dumps(rank_lrs({!r}, 1)))'.format(rootDir, location)
+    return json.loads(subprocess.run([sys.executable, '-c', code], check=True, capture_output=True).stdout)
+
+class TestSharedSchedule(unittest.TestCase):
+    def check_location(self, location):
+        with share_1cycle_schedule(location, rank=0, **CONFIG) as owner:
+            expected = get1Cycle_schedule(21, 5, 100, 1.0, 0.1, .99, .7)
+            np.testing.assert_array_equal(expected, owner.schedule)
+
+            with share_1cycle_schedule(location, rank=1, **CONFIG) as table:
+                np.testing.assert_array_equal(expected, table.schedule)
+                with self.assertRaises(ValueError):
+                    table.schedule[0] = (0, 0)
+
+            self.assertEqual(expected['lr'].tolist(), rank_lrs_in_new_process(location))
+
+            # still there for the owner after the other ranks detached
+            np.testing.assert_array_equal(expected, owner.schedule)
+
+    def test_shared_memory(self):
+        name = 'hph_' + uuid.uuid4().hex[:12]
+        self.check_location(name)
+        with self.assertRaises(TimeoutError):   #removed by the owner
+            share_1cycle_schedule(name, rank=1, timeout=0.05, **CONFIG)
+
+    def test_closed_after_last_view(self):
+        name = 'hph_' + uuid.uuid4().hex[:12]
+        table = share_1cycle_schedule(name, rank=0, **CONFIG)
+        shm = table._shm
+        lrs = table.schedule['lr']
+        table.close()
+        self.assertIsNotNone(shm.buf)   #lrs still maps it
+        self.assertEqual(np.float32(0.1), lrs[0])
+        del lrs
+        self.assertIsNone(shm.buf)
+
+    def test_memmap_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'schedule.npy')
+            self.check_location(path)
+            self.assertFalse(os.path.exists(path))
+
+    def test_layout_mismatch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'schedule.npy')
+            with share_1cycle_schedule(path, rank=0, dtype=np.float64, **CONFIG):
+                with self.assertRaises(ValueError):
+                    share_1cycle_schedule(path, rank=1, dtype=np.float32, **CONFIG)
+
+    def test_scheduler(self):
+        name = 'hph_' + uuid.uuid4().hex[:12]
+        with share_1cycle_schedule(name, rank=0, **CONFIG) as table:
+            optimizer = DummyOptimizer()
+            scheduler = OneCycle_Scheduler(optimizer, schedule=table.schedule, **CONFIG)
+            built = OneCycle_Scheduler(DummyOptimizer(), dtype=np.float32, **CONFIG)
+            for _ in range(10):
+                scheduler.batch_step()
+                built.batch_step()
+            self.assertEqual(built.optimizer.param_groups, optimizer.param_groups)
+
+            with self.assertRaises(ValueError):
+                OneCycle_Scheduler(optimizer, schedule=table.schedule[:5], **CONFIG)
+
+        scheduler.batch_step()   #the owner closed the table, the scheduler's views keep it mapped
+        built.batch_step()
+        self.assertEqual(built.optimizer.param_groups, optimizer.param_groups)
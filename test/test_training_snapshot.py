@@ -0,0 +1,125 @@
+import unittest
+
+# these test use the parent directory, make sure its there
+import os, sys
+currDir = os.path.dirname(os.path.realpath(__file__))
+rootDir = os.path.abspath(os.path.join(currDir, '..'))
+if rootDir not in sys.path: # add parent dir to paths
+    sys.path.append(rootDir)
+
+try:
+    import torch
+    from training_snapshot import TrainingSnapshot, lr_range_test, restore_after
+except ImportError:
+    torch = None
+
+NUMB_BATCHES = 20
+BATCH_SIZE = 8
+
+def get_model_and_optimizer(seed=0):
+    torch.manual_seed(seed)
+    model = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.BatchNorm1d(8), torch.nn.ReLU(),
+                                torch.nn.Linear(8, 1))
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.01, momentum=0.9)
+    return model, optimizer
+
+def get_batches(seed=1):
+    generator = torch.Generator().manual_seed(seed)
+    return [(torch.randn(BATCH_SIZE, 4, generator=generator), torch.randn(BATCH_SIZE, 1, generator=generator))
+            for _ in range(NUMB_BATCHES)]
+
+def train_step(model, optimizer, batch):
+    model.train()
+    optimizer.zero_grad()
+    loss = torch.nn.functional.mse_loss(model(batch[0]), batch[1])
+    loss.backward()
+    optimizer.step()
+    return loss.item()
+
+def clone_state(model, optimizer):
+    return ({name: val.clone() for name, val in model.state_dict().items()},
+            [{key: val for key, val in group.items() if key != 'params'} for group in optimizer.param_groups],
+            {param: {key: val.clone() for key, val in state.items()} for param, state in optimizer.state.items()})
+
+@unittest.skipIf(torch is None, 'needs torch')
+class TestTrainingSnapshot(unittest.TestCase):
+    def assertStateEqual(self, expected, model, optimizer):
+        model_state, param_groups, optimizer_state = expected
+        for name, val in model.state_dict().items():
+            self.assertTrue(torch.equal(model_state[name], val), name)
+        self.assertEqual(param_groups, [{key: val for key, val in group.items() if key != 'params'}
+                                        for group in optimizer.param_groups])
+        self.assertEqual(set(optimizer_state), set(optimizer.state))
+        for param, state in optimizer_state.items():
+            for key, val in state.items():
+                self.assertTrue(torch.equal(val, optimizer.state[param][key]), key)
+
+    def test_restore_in_place(self):
+        model, optimizer = get_model_and_optimizer()
+        batches = get_batches()
+        for batch in batches[:3]:
+            train_step(model, optimizer, batch)   # momentum buffers exist
+        expected = clone_state(model, optimizer)
+        params = [param.data_ptr() for param in model.parameters()]
+        momentum_buffers = [optimizer.state[param]['momentum_buffer'] for param in model.parameters()]
+
+        snapshot = TrainingSnapshot(model, optimizer)
+        for batch in batches[3:]:
+            optimizer.param_groups[0]['lr'] = 1.0
+            train_step(model, optimizer, batch)
+        self.assertIs(model, snapshot.restore())
+
+        self.assertStateEqual(expected, model, optimizer)
+        self.assertEqual(params, [param.data_ptr() for param in model.parameters()])
+        for param, momentum_buffer in zip(model.parameters(), momentum_buffers):
+            self.assertIs(momentum_buffer, optimizer.state[param]['momentum_buffer'])
+
+    def test_fresh_optimizer(self):
+        # the momentum buffers the sweep creates are dropped again
+        model, optimizer = get_model_and_optimizer()
+        expected = clone_state(model, optimizer)
+        with restore_after(model, optimizer) as snapshot:
+            train_step(model, optimizer, get_batches()[0])
+        self.assertGreater(snapshot.nbytes, 0)
+        self.assertEqual(0, len(optimizer.state))
+        self.assertStateEqual(expected, model, optimizer)
+
+    def test_take_again(self):
+        model, optimizer = get_model_and_optimizer()
+        batches = get_batches()
+        snapshot = TrainingSnapshot(model, optimizer)
+        train_step(model, optimizer, batches[0])
+        expected = clone_state(model, optimizer)
+        buffers = dict(snapshot._model_state)
+        snapshot.take()
+        for name, buffer in buffers.items():
+            self.assertIs(buffer, snapshot._model_state[name])   # reused
+        train_step(model, optimizer, batches[1])
+        snapshot.restore()
+        self.assertStateEqual(expected, model, optimizer)
+
+    def test_restore_on_exception(self):
+        model, optimizer = get_model_and_optimizer()
+        expected = clone_state(model, optimizer)
+        with self.assertRaises(RuntimeError):
+            with restore_after(model, optimizer):
+                train_step(model, optimizer, get_batches()[0])
+                raise RuntimeError
+        self.assertStateEqual(expected, model, optimizer)
+
+    def test_lr_range_test(self):
+        model, optimizer = get_model_and_optimizer()
+        batches = get_batches()
+        expected = clone_state(model, optimizer)
+        restored, (min_lr, max_lr), finder = lr_range_test(model, optimizer, lambda batch: train_step(model,
+                                                           optimizer, batch), batches, min_lr=1e-4, max_lr=10.0)
+        self.assertIs(model, restored)
+        self.assertStateEqual(expected, model, optimizer)
+        self.assertLessEqual(len(finder.lr_history), NUMB_BATCHES)
+        self.assertEqual(1e-4, finder.lr_history[0])
+        self.assertLessEqual(min_lr, max_lr)
+
+        # training afterwards is the same as from a fresh model
+        fresh_model, fresh_optimizer = get_model_and_optimizer()
+        for batch in batches[:3]:
+            self.assertEqual(train_step(fresh_model, fresh_optimizer, batch), train_step(model, optimizer, batch))
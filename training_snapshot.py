@@ -0,0 +1,168 @@
+import contextlib
+import copy
+import sys
+import torch
+parent_module = sys.modules['.'.join(__name__.split('.')[:-1]) or '__main__']
+if __name__ == '__main__' or parent_module.__name__ == '__main__':
+    from cyclic_LR_scheduler import LearningRateFinder
+else:
+    from .cyclic_LR_scheduler import LearningRateFinder
+
+'''
+In memory snapshots of a model and its optimizer, for putting them back after a learning rate range test
+
+A range test drives the learning rate up until the loss blows up, the weights and the optimizer's momentum
+buffers are wrecked by the end of it.  Instead of re-initializing or a torch.save/torch.load round trip,
+TrainingSnapshot copies every tensor into cpu buffers allocated once (no pickling, no disk) and restore()
+copies them back in place, so the model's parameters and the optimizer's state stay the same objects.
+usage:
+>>>model, (min_lr, max_lr), finder = lr_range_test(model, optimizer, train_step, train_loader, min_lr=1e-5, max_lr=1)
+>>>scheduler = OneCycle_Scheduler(optimizer, ..., max_lr=max_lr, min_lr=min_lr)    # from the original weights
+or around any code
+>>>with restore_after(model, optimizer):
+>>>    ... range test ...
+'''
+
+class TrainingSnapshot(object):
+    '''
+    model state_dict, optimizer param_groups and optimizer state held in preallocated cpu buffers
+    '''
+    def __init__(self, model, optimizer, pin_memory=None):
+        '''
+        takes the snapshot straight away
+        :param pin_memory: page locked buffers for faster gpu copies, by default for tensors on a gpu
+        '''
+        self.model = model
+        self.optimizer = optimizer
+        self.pin_memory = pin_memory
+        self._model_state = {}
+        self._param_groups = []
+        self._optimizer_state = {}
+        self.take()
+
+    def _copy(self, buffers, key, val):
+        '''
+        copies a tensor into buffers[key], reusing the buffer from the last take if it still fits
+        anything else is deep copied
+        '''
+        if not isinstance(val, torch.Tensor):
+            buffers[key] = copy.deepcopy(val)
+            return
+        buf = buffers.get(key)
+        if not isinstance(buf, torch.Tensor) or buf.shape != val.shape or buf.dtype != val.dtype:
+            pin_memory = val.is_cuda if self.pin_memory is None else self.pin_memory
+            buf = buffers[key] = torch.empty(val.shape, dtype=val.dtype, pin_memory=pin_memory)
+        buf.copy_(val)
+
+    def take(self):
+        '''
+        copies the current model and optimizer state into the buffers, overwriting the last snapshot
+        '''
+        with torch.no_grad():
+            model_state = self.model.state_dict()
+            for name in set(self._model_state) - set(model_state):
+                del self._model_state[name]
+            for name, val in model_state.items():
+                self._copy(self._model_state, name, val)
+
+            if len(self._param_groups) != len(self.optimizer.param_groups):
+                self._param_groups = [{} for _ in self.optimizer.param_groups]
+            for saved, param_group in zip(self._param_groups, self.optimizer.param_groups):
+                for key in set(saved) - set(param_group):
+                    del saved[key]
+                for key, val in param_group.items():
+                    if key != 'params':
+                        self._copy(saved, key, val)
+
+            for param in set(self._optimizer_state) - set(self.optimizer.state):
+                del self._optimizer_state[param]
+            for param, state in self.optimizer.state.items():
+                saved = self._optimizer_state.setdefault(param, {})
+                for key in set(saved) - set(state):
+                    del saved[key]
+                for key, val in state.items():
+                    self._copy(saved, key, val)
+        # devices of the optimizer state tensors ('step' often stays on the cpu while the buffers are on the gpu)
+        self._state_devices = {(param, key): val.device for param, state in self.optimizer.state.items()
+                               for key, val in state.items() if isinstance(val, torch.Tensor)}
+        return self
+
+    def restore(self):
+        '''
+        copies the snapshot back into the model and optimizer, in place where the tensors still fit
+        optimizer state created since the snapshot (momentum buffers of a fresh optimizer) is dropped
+        :return: the model
+        '''
+        with torch.no_grad():
+            self.model.load_state_dict(self._model_state)
+
+            for saved, param_group in zip(self._param_groups, self.optimizer.param_groups):
+                for key, val in saved.items():
+                    _restore_val(param_group, key, val, None)
+
+            for param in list(self.optimizer.state):
+                if param not in self._optimizer_state:
+                    del self.optimizer.state[param]
+            for param, saved in self._optimizer_state.items():
+                state = self.optimizer.state[param]
+                for key in set(state) - set(saved):
+                    del state[key]
+                for key, val in saved.items():
+                    _restore_val(state, key, val, self._state_devices.get((param, key)))
+        return self.model
+
+    @property
+    def nbytes(self):
+        '''
+        memory held by the buffers
+        '''
+        buffers = list(self._model_state.values()) + [val for saved in self._param_groups for val in saved.values()] \
+            + [val for saved in self._optimizer_state.values() for val in saved.values()]
+        return sum(val.numel() * val.element_size() for val in buffers if isinstance(val, torch.Tensor))
+
+def _restore_val(target, key, val, device):
+    '''
+    target[key] = val, copied into the tensor already there if it fits, otherwise a new copy
+    (never the buffer itself, the next take() would write through it)
+    '''
+    if not isinstance(val, torch.Tensor):
+        target[key] = copy.deepcopy(val)
+        return
+    current = target.get(key)
+    if isinstance(current, torch.Tensor) and current.shape == val.shape and current.dtype == val.dtype:
+        current.copy_(val)
+    else:
+        target[key] = val.to(device if device is not None else val.device, copy=True)
+
+@contextlib.contextmanager
+def restore_after(model, optimizer, pin_memory=None):
+    '''
+    snapshots model and optimizer on entry, restores them on exit (on an exception too)
+    :return: the TrainingSnapshot
+    '''
+    snapshot = TrainingSnapshot(model, optimizer, pin_memory)
+    try:
+        yield snapshot
+    finally:
+        snapshot.restore()
+
+def lr_range_test(model, optimizer, train_step, batches, *, min_lr, max_lr, num_batches=None, mode='exponential',
+                  pin_memory=None, **finder_kwargs):
+    '''
+    LearningRateFinder range test, then model and optimizer are put back as they were
+    :param train_step: train_step(batch) -> loss as a python float, runs forward, backward and optimizer.step()
+    :param batches: iterable of what train_step takes, like a DataLoader, the test stops early if it runs out
+    :param num_batches: learning rates in the sweep, defaults to len(batches)
+    :param finder_kwargs: the rest of the LearningRateFinder arguments
+    :return: the restored model, the suggested (min_lr, max_lr) and the finder (lr_history, loss_history)
+    '''
+    if num_batches is None:
+        num_batches = len(batches)
+    with restore_after(model, optimizer, pin_memory):
+        finder = LearningRateFinder(optimizer, min_lr=min_lr, max_lr=max_lr, num_batches=num_batches, mode=mode,
+                                    **finder_kwargs)
+        for batch in batches:
+            finder.batch_step()
+            if finder.record_loss(train_step(batch)):
+                break
+    return model, finder.suggest_lr_range(), finder
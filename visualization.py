@@ -0,0 +1,54 @@
+'''
+plotting helpers for looking at schedules
+
+matplotlib is only imported when something is actually plotted, the schedulers never import this module
+so training jobs (and every dataloader worker) only need numpy
+'''
+
+def get_pyplot(backend=None):
+    '''
+    imports matplotlib.pyplot on first use
+    :param backend: switch to this matplotlib backend first, 'Agg' renders to files without a display
+    '''
+    try:
+        import matplotlib
+        if backend is not None:
+            matplotlib.use(backend)
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise ImportError("plotting needs matplotlib, try: pip install matplotlib")
+    return plt
+
+def plot_vals(*vals, xlabel="sample", ylabel="learning rate", show=True):
+    '''
+    scatter plot of each sequence in vals against its index
+    :param vals: one or more sequences, for instance lrs and momentums
+    :param show: call plt.show() when done
+    '''
+    plt = get_pyplot()
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    for v in vals:
+        plt.scatter(range(len(v)), v)
+    if show:
+        plt.show()
+
+def plot_minmax(steps, mins, maxs, path, xlabel="batch", title=None, width=1200, height=600, dpi=100):
+    '''
+    saves a plot of min/max decimated sequences (schedule_export.MinMaxDecimator) with the Agg backend,
+    the band between min and max of every column, one panel per sequence
+    :param steps: x value of every column
+    :param mins: dict of name (the panel's ylabel): array of column minimums
+    :param maxs: same for the maximums
+    :param path: image file, the format goes by its extension
+    '''
+    plt = get_pyplot('Agg')
+    fig, axes = plt.subplots(len(mins), 1, sharex=True, squeeze=False, figsize=(width / dpi, height / dpi), dpi=dpi)
+    for ax, name in zip(axes[:, 0], mins):
+        ax.fill_between(steps, mins[name], maxs[name], linewidth=1, edgecolor='C0', facecolor='C0')
+        ax.set_ylabel(name)
+    axes[-1, 0].set_xlabel(xlabel)
+    if title is not None:
+        axes[0, 0].set_title(title)
+    fig.savefig(path)
+    plt.close(fig)